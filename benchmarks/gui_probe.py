@@ -0,0 +1,143 @@
+"""
+GUI side of the benchmarks, run by run_benchmarks.py in its own process.
+
+Builds the real DateTimeApp window on the display given in the environment,
+opens the Timezone tab once the window is painted and prints one JSON
+object with the timings of the startup phases, the per-keystroke search
+latency and the resident memory of the populated list, then quits.
+
+Usage:
+    python3 gui_probe.py QUERY [QUERY ...]
+"""
+
+# Standard library imports
+import importlib.util
+import json
+import os
+import sys
+import time
+
+STARTED_AT = time.perf_counter()
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "usr", "share", "comm-xfce-datetime"
+)
+# Longest time to wait for the timezone list before giving up
+POPULATE_TIMEOUT_SECONDS = 60
+
+
+def elapsed_ms(since=STARTED_AT):
+    return (time.perf_counter() - since) * 1000
+
+
+def read_rss_kb():
+    """Return the resident set size of this process in KiB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def load_app_module():
+    """Import comm-xfce-datetime.py, whose name is not a valid module name."""
+    sys.path.insert(0, APP_DIR)
+    spec = importlib.util.spec_from_file_location(
+        "comm_xfce_datetime", os.path.join(APP_DIR, "comm-xfce-datetime.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(queries):
+    result = {}
+
+    app = load_app_module()
+    result["import_ms"] = elapsed_ms()
+    Gtk, GLib = app.Gtk, app.GLib
+
+    app.setup_gtk()
+    result["gtk_setup_ms"] = elapsed_ms()
+    result["rss_before_window_kb"] = read_rss_kb()
+
+    win = app.DateTimeApp()
+    result["window_ms"] = elapsed_ms()
+
+    def on_first_draw(widget, cr):
+        widget.disconnect_by_func(on_first_draw)
+        result["first_paint_ms"] = elapsed_ms()
+        GLib.idle_add(open_timezone_tab)
+        return False
+
+    def open_timezone_tab():
+        # Tabs are built on first view, this is what the user waits for
+        switch_started = time.perf_counter()
+        win.notebook.set_current_page(app.TAB_TIMEZONE)
+        result["timezone_tab_ms"] = elapsed_ms(switch_started)
+        return False
+
+    on_populate_finished = win._on_populate_finished
+
+    def populate_finished(cancel, error=None):
+        on_populate_finished(cancel, error)
+        if not cancel.is_set():
+            result["populated_ms"] = elapsed_ms()
+            # Measure once the main loop is idle again
+            GLib.idle_add(measure_populated_list)
+        return False
+
+    def measure_populated_list():
+        result["rows"] = len(win.timezone_store)
+        result["rss_populated_kb"] = read_rss_kb()
+        result["search_keystroke_ms"] = measure_search(win, queries, Gtk)
+        Gtk.main_quit()
+        return False
+
+    def on_timeout():
+        result["error"] = "timezone list was not populated in time"
+        Gtk.main_quit()
+        return False
+
+    # Looked up on the instance by the population's completion callback
+    win._on_populate_finished = populate_finished
+    win.connect_after("draw", on_first_draw)
+    GLib.timeout_add_seconds(POPULATE_TIMEOUT_SECONDS, on_timeout)
+
+    win.show_all()
+    Gtk.main()
+
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+def measure_search(win, queries, Gtk):
+    """
+    Type each query one character at a time.
+
+    The debounce is bypassed: each keystroke runs the search directly and
+    the time includes handling the resulting events, i.e. the redraw.
+    """
+    latencies = {}
+
+    for query in queries:
+        latencies[query] = []
+        for length in range(1, len(query) + 1):
+            keystroke_started = time.perf_counter()
+            win.search_text = query[:length]
+            win.filter_timezone_list()
+            while Gtk.events_pending():
+                Gtk.main_iteration_do(False)
+            latencies[query].append(elapsed_ms(keystroke_started))
+
+    win.search_text = ""
+    win.filter_timezone_list()
+    return latencies
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
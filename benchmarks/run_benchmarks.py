@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks of the XFCE DateTime Tool.
+
+Every run uses the fake timedatectl, date, pkexec, systemctl and dbus-send in fakebin/
+(first on PATH), an empty system D-Bus address, so timedated is never
+reached, and a private XDG_CACHE_HOME. Results are therefore reproducible
+and nothing on the machine is changed.
+
+Measured:
+    catalog     cold (no cache) and warm (cached) catalog load
+    search      search latency per keystroke and memory of the search index
+    preview     loading the transition tables of every zone and resolving
+                all zones at one instant, per-zone tz_engine for reference
+    apply       apply pipeline latency, through a mock D-Bus backend and
+                through the pkexec script route
+    sntp        probe of local SNTP stand-in servers; the offset, delay,
+                stratum and ranking found are checked against the stand-ins
+    cli         cold and warm start of the command line interface
+    gui         cold and warm start of the window, first paint, opening the
+                Timezone tab, time until the list is populated, per-keystroke search latency with
+                redraw and resident memory of the populated list
+
+"Cold" means a fresh process with an empty application cache; the OS page
+cache is not dropped. The GUI benchmarks need a display: the current one,
+or a private Xvfb or Broadway server started for the run.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py [-o results.json] [--compare old.json]
+"""
+
+# Standard library imports
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_DIR = os.path.join(REPO_DIR, "usr", "share", "comm-xfce-datetime")
+FAKEBIN_DIR = os.path.join(BENCH_DIR, "fakebin")
+
+# Typed queries and a zone each must find, so no keystroke only times an empty result
+SEARCH_QUERIES = {
+    "sao paulo": "America/Sao_Paulo",
+    "new york": "America/New_York",
+    "utc+5:30": "Asia/Kolkata",
+    "berlni": "Europe/Berlin",
+    "pacific": "Pacific/Auckland",
+}
+CLI_COMMAND = ["search", "sao paulo"]
+APPLY_TIMEZONE = "America/Sao_Paulo"
+# Instants the preview benchmark resolves every zone at, one per month
+PREVIEW_INSTANTS = [
+    datetime.datetime(2030, month, 15, 12, tzinfo=datetime.timezone.utc) for month in range(1, 13)
+]
+# Simulated timedated round trip of the mock D-Bus backend
+MOCK_DBUS_LATENCY_SECONDS = 0.005
+# SNTP stand-ins as (name, clock offset s, round trip delay s, stratum), the
+# answering ones in the order they must be ranked; stratum 0 is unsynchronized,
+# None never answers
+SNTP_STAND_INS = [
+    ("near", 0.25, 0.0, 2),
+    ("far", -0.5, 0.05, 1),
+    ("unsynchronized", 0.0, 0.0, 0),
+    ("silent", 0.0, 0.0, None),
+]
+SNTP_TIMEOUT_SECONDS = 0.5
+# Largest deviation accepted between a measured and a simulated value
+SNTP_TOLERANCE_SECONDS = 0.02
+DISPLAY_NUMBER = 97
+DISPLAY_START_TIMEOUT_SECONDS = 10
+# Metrics slower by more than this are reported as regressions by --compare
+DEFAULT_REGRESSION_THRESHOLD = 0.20
+
+# Must be in place before the core is imported, so its subprocesses see it
+os.environ["PATH"] = FAKEBIN_DIR + os.pathsep + os.environ.get("PATH", "")
+os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = "unix:path=/nonexistent"
+os.environ["LANGUAGE"] = "C"
+sys.path.insert(0, APP_DIR)
+
+# Local imports
+from datetime_core import (
+    apply_pipeline, privileged, sntp, timedate, tz_batch, tz_catalog, tz_engine, tz_search
+)
+
+
+def summarize(samples_ms):
+    """Return the statistics of a list of timings in milliseconds."""
+    return {
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "min_ms": round(min(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+        "runs": len(samples_ms),
+    }
+
+
+def timed(func, *args):
+    """Return (result, elapsed milliseconds) of func(*args)."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def bench_catalog(repeat):
+    cold, warm = [], []
+    for _run in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            catalog = tz_catalog.TimezoneCatalog(cache_dir=cache_dir)
+            entries, elapsed = timed(catalog.load)
+            cold.append(elapsed)
+            _entries, elapsed = timed(catalog.load)
+            warm.append(elapsed)
+
+    return {"zones": len(entries), "cold": summarize(cold), "warm": summarize(warm)}
+
+
+def bench_search(repeat):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        catalog = tz_catalog.TimezoneCatalog(cache_dir=cache_dir)
+        catalog.rebuild()
+
+        tracemalloc.start()
+        entries = catalog.load()
+        entries_kb = tracemalloc.get_traced_memory()[0] / 1024
+        _index, build_ms = timed(tz_search.SearchIndex, entries)
+        index_kb = tracemalloc.get_traced_memory()[0] / 1024 - entries_kb
+        tracemalloc.stop()
+
+    keystrokes = {}
+    all_samples = []
+    for query, expected in SEARCH_QUERIES.items():
+        samples_by_length = [[] for _char in query]
+        for _run in range(repeat):
+            # Type into a fresh index, as after opening the window
+            index = tz_search.SearchIndex(entries)
+            for length in range(1, len(query) + 1):
+                scores, elapsed = timed(index.rank, query[:length])
+                samples_by_length[length - 1].append(elapsed)
+                all_samples.append(elapsed)
+            if expected not in (scores or {}):
+                raise RuntimeError(f"search: {query!r} does not find {expected}")
+        keystrokes[query] = [round(statistics.median(samples), 3) for samples in samples_by_length]
+
+    return {
+        "index_build_ms": round(build_ms, 3),
+        "catalog_memory_kb": round(entries_kb, 1),
+        "index_memory_kb": round(index_kb, 1),
+        "keystroke": summarize(all_samples),
+        "keystroke_by_query_ms": keystrokes,
+    }
+
+
+def bench_preview(repeat):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        entries = tz_catalog.TimezoneCatalog(cache_dir=cache_dir).load()
+    zones = [entry.timezone for entry in entries]
+
+    load, batch, per_zone = [], [], []
+    for _run in range(repeat):
+        tables, elapsed = timed(tz_batch.ZoneTables, zones)
+        load.append(elapsed)
+        for when in PREVIEW_INSTANTS:
+            batch.append(timed(tables.resolve, when)[1])
+            per_zone.append(timed(
+                lambda: [tz_engine.get_offset_seconds(zone, when) for zone in zones]
+            )[1])
+
+    return {
+        "zones": len(zones),
+        "numpy": tables._numpy is not None,
+        "tables_load": summarize(load),
+        "resolve_all_zones": summarize(batch),
+        "per_zone_engine": summarize(per_zone),
+    }
+
+
+class MockTimedateClient:
+    """Stands in for timedated: fixed properties, calls succeed after a delay."""
+
+    def get_properties(self):
+        return timedate.TimedateProperties(APPLY_TIMEZONE, False, False, False, True)
+
+    def call_async(self, calls, callback):
+        threading.Timer(MOCK_DBUS_LATENCY_SECONDS * len(calls), callback, (None,)).start()
+
+
+def run_apply(executor):
+    """
+    Run the apply pipeline the way DateTimeApp builds it, wait for the end.
+
+    Every setting is changed, as when the current ones cannot be read. The
+    app's last step also switches its own TZ on the main loop; that is left
+    out, it costs nothing and would change the zone of this process.
+    """
+    finished = threading.Event()
+    outcome = {}
+
+    changes = privileged.plan_timezone_changes(
+        None, APPLY_TIMEZONE, "2024-01-01", "12:00:00", use_utc=True, set_time=True
+    )
+    batch = privileged.PrivilegedBatch(executor, changes)
+    steps = [
+        apply_pipeline.ApplyStep(change.setting, lambda done, index=index: batch.run(index, done))
+        for index, change in enumerate(changes)
+    ]
+    steps += [
+        apply_pipeline.ApplyStep(
+            "session",
+            lambda done, timezone=change.desired: executor.run_in_thread(
+                lambda: privileged.apply_timezone_to_session(timezone), done
+            )
+        )
+        for change in changes
+        if change.setting == "set-timezone"
+    ]
+
+    def on_finished(error, cancelled):
+        outcome["error"] = error
+        finished.set()
+
+    apply_pipeline.ApplyPipeline(steps, on_finished=on_finished).start()
+    finished.wait()
+    if outcome["error"] is not None:
+        raise RuntimeError(f"apply failed: {outcome['error']}")
+
+
+def bench_apply(repeat):
+    routes = {
+        "mock_dbus": privileged.PrivilegedExecutor(MockTimedateClient()),
+        "pkexec": privileged.PrivilegedExecutor(
+            timedate.TimedateClient([timedate.TimedatectlClient()])
+        ),
+    }
+
+    results = {}
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    # The session step writes environment.d there, keep it private
+    with tempfile.TemporaryDirectory() as private_runtime_dir:
+        os.environ["XDG_RUNTIME_DIR"] = private_runtime_dir
+        try:
+            for name, executor in routes.items():
+                results[name] = summarize([timed(run_apply, executor)[1] for _run in range(repeat)])
+        finally:
+            if runtime_dir is None:
+                del os.environ["XDG_RUNTIME_DIR"]
+            else:
+                os.environ["XDG_RUNTIME_DIR"] = runtime_dir
+    results["mock_dbus_latency_ms"] = MOCK_DBUS_LATENCY_SECONDS * 1000
+    return results
+
+
+class SntpStandIn:
+    """Answers SNTP requests on a local UDP port with a simulated clock."""
+
+    def __init__(self, offset, delay, stratum):
+        self.offset = offset
+        self.delay = delay
+        self.stratum = stratum
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.1)
+        self.address = "127.0.0.1:{}".format(self.socket.getsockname()[1])
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.socket.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                request, client = self.socket.recvfrom(512)
+            except socket.timeout:
+                continue
+            if self.stratum is None or len(request) < sntp.NTP_PACKET_SIZE:
+                continue
+
+            # Half the delay on the way in and half on the way out, so the
+            # measured offset is not skewed
+            time.sleep(self.delay / 2)
+            received = sntp.to_ntp_timestamp(time.time() + self.offset)
+            originate = struct.unpack_from("!Q", request, 40)[0]
+            transmitted = sntp.to_ntp_timestamp(time.time() + self.offset)
+            response = struct.pack(
+                sntp.NTP_PACKET_FORMAT, (4 << 3) | sntp.NTP_MODE_SERVER, self.stratum,
+                0, 0, 0, 0, b"\0" * 4, 0, originate, received, transmitted
+            )
+            time.sleep(self.delay / 2)
+            self.socket.sendto(response, client)
+
+
+def check_sntp_results(results, stand_ins):
+    """
+    Compare probe results with what the stand-ins simulate.
+
+    Raises:
+        RuntimeError: On a wrong ranking or value
+    """
+    names = {stand_in.address: name for name, stand_in in stand_ins.items()}
+    ranked = [names[result.server] for result in results]
+    answering = [name for name, _offset, _delay, stratum in SNTP_STAND_INS if stratum]
+    # Failed servers come last, in no particular order
+    if ranked[:len(answering)] != answering or set(ranked) != set(stand_ins):
+        raise RuntimeError(f"sntp ranked {ranked}, expected {answering} then the failures")
+
+    for result in results:
+        stand_in = stand_ins[names[result.server]]
+        if stand_in.stratum is None:
+            if result.error != "timeout":
+                raise RuntimeError(f"sntp: silent server reported {result.error!r}")
+        elif stand_in.stratum == 0:
+            if result.error is None or "unsynchronized" not in result.error:
+                raise RuntimeError(f"sntp: unsynchronized server reported {result.error!r}")
+        elif (
+            result.error is not None
+            or result.stratum != stand_in.stratum
+            or abs(result.offset - stand_in.offset) > SNTP_TOLERANCE_SECONDS
+            or abs(result.delay - stand_in.delay) > SNTP_TOLERANCE_SECONDS
+        ):
+            raise RuntimeError(f"sntp: {result} does not match the stand-in")
+
+
+def bench_sntp(repeat):
+    stand_ins = {
+        name: SntpStandIn(offset, delay, stratum)
+        for name, offset, delay, stratum in SNTP_STAND_INS
+    }
+    # Listed in reverse, so the ranking has to reorder them
+    servers = [stand_ins[name].address for name, *_simulated in reversed(SNTP_STAND_INS)]
+
+    try:
+        probes = []
+        for _run in range(repeat):
+            results, elapsed = timed(sntp.probe_servers, servers, SNTP_TIMEOUT_SECONDS)
+            check_sntp_results(results, stand_ins)
+            probes.append(elapsed)
+    finally:
+        for stand_in in stand_ins.values():
+            stand_in.close()
+
+    return {
+        "probe": summarize(probes),
+        "timeout_ms": SNTP_TIMEOUT_SECONDS * 1000,
+        "servers": len(servers),
+    }
+
+
+def bench_cli(repeat):
+    def run_cli(env):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "datetime_core.cli", *CLI_COMMAND],
+            cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, check=True
+        )
+        return (time.perf_counter() - started) * 1000
+
+    cold, warm = [], []
+    for _run in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = dict(os.environ, XDG_CACHE_HOME=cache_dir)
+            cold.append(run_cli(env))
+            warm.append(run_cli(env))
+
+    return {"command": CLI_COMMAND, "cold": summarize(cold), "warm": summarize(warm)}
+
+
+def start_display(kind):
+    """
+    Provide a display for the GUI benchmarks.
+
+    Returns:
+        tuple: (environment overrides, server process or None, display name),
+               or None when no display is available
+    """
+    if kind == "auto":
+        if os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+            kind = "current"
+        elif shutil.which("Xvfb"):
+            kind = "xvfb"
+        elif shutil.which("broadwayd"):
+            kind = "broadway"
+        else:
+            return None
+
+    if kind == "current":
+        return {}, None, "current"
+
+    if kind == "xvfb":
+        server = subprocess.Popen(
+            ["Xvfb", f":{DISPLAY_NUMBER}", "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        ready = lambda: os.path.exists(f"/tmp/.X11-unix/X{DISPLAY_NUMBER}")
+        env = {"DISPLAY": f":{DISPLAY_NUMBER}", "GDK_BACKEND": "x11"}
+    else:
+        server = subprocess.Popen(
+            ["broadwayd", f":{DISPLAY_NUMBER}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        # broadwayd listens on 8080 + display number
+        ready = lambda: _port_open(8080 + DISPLAY_NUMBER)
+        env = {"BROADWAY_DISPLAY": f":{DISPLAY_NUMBER}", "GDK_BACKEND": "broadway"}
+
+    deadline = time.monotonic() + DISPLAY_START_TIMEOUT_SECONDS
+    while not ready():
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            raise RuntimeError(f"{kind} display server did not start")
+        time.sleep(0.05)
+
+    return env, server, kind
+
+
+def _port_open(port):
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def run_gui_probe(env):
+    """Run gui_probe.py once and return its measurements with the wall time."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(BENCH_DIR, "gui_probe.py"), *SEARCH_QUERIES.keys()],
+        env=env, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    # The application may print warnings, the measurements are the last line
+    measurements = json.loads(result.stdout.strip().splitlines()[-1])
+    if "error" in measurements:
+        raise RuntimeError(measurements["error"])
+    measurements["process_wall_ms"] = wall_ms
+    return measurements
+
+
+def bench_gui(repeat, display):
+    try:
+        started = start_display(display)
+    except RuntimeError as e:
+        return {"skipped": str(e)}
+    if started is None:
+        return {"skipped": "no display, Xvfb or broadwayd available"}
+    display_env, server, display_kind = started
+
+    try:
+        runs = {"cold": [], "warm": []}
+        for _run in range(repeat):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                env = dict(os.environ, XDG_CACHE_HOME=cache_dir, **display_env)
+                runs["cold"].append(run_gui_probe(env))
+                runs["warm"].append(run_gui_probe(env))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {"display": display_kind}
+    for phase, measurements in runs.items():
+        phase_results = {
+            key: summarize([run[key] for run in measurements])
+            for key in ("import_ms", "gtk_setup_ms", "window_ms", "first_paint_ms",
+                        "timezone_tab_ms", "populated_ms", "process_wall_ms")
+            if all(key in run for run in measurements)
+        }
+        keystrokes = [
+            latency
+            for run in measurements
+            for latencies in run["search_keystroke_ms"].values()
+            for latency in latencies
+        ]
+        phase_results["search_keystroke"] = summarize(keystrokes)
+        phase_results["rows"] = measurements[-1]["rows"]
+        phase_results["list_memory_kb"] = statistics.median(
+            run["rss_populated_kb"] - run["rss_before_window_kb"] for run in measurements
+        )
+        results[phase] = phase_results
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """Yield (path, value) for every timing and memory figure in results."""
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, path + ".")
+        elif isinstance(value, (int, float)) and key.endswith(("median_ms", "_kb")):
+            yield path, value
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every metric against a baseline; return the regressions."""
+    old_values = dict(flatten(baseline["results"]))
+    regressions = []
+
+    for path, new in flatten(results):
+        old = old_values.get(path)
+        if not old:
+            continue
+        change = (new - old) / old
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(path)
+        print(f"{path}: {old:.3f} -> {new:.3f} ({change:+.1%}){flag}")
+
+    return regressions
+
+
+BENCHMARKS = {
+    "catalog": bench_catalog,
+    "search": bench_search,
+    "preview": bench_preview,
+    "apply": bench_apply,
+    "sntp": bench_sntp,
+    "cli": bench_cli,
+    "gui": bench_gui,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", default="benchmark-results.json",
+                        help="where to write the JSON results")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        help="run only these benchmarks")
+    parser.add_argument("--display", default="auto",
+                        choices=("auto", "current", "xvfb", "broadway"),
+                        help="display used by the GUI benchmarks")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare with an earlier results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ["XDG_CACHE_HOME"] = cache_home
+        for name in args.only or BENCHMARKS:
+            print(f"Running {name} benchmark...", file=sys.stderr)
+            if name == "gui":
+                results[name] = bench_gui(args.repeat, args.display)
+            else:
+                results[name] = BENCHMARKS[name](args.repeat)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tzdata": tz_catalog.get_tzdata_version(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,169 @@
 # Standard library imports
 import datetime
-import os
-import re
-import subprocess
-import tempfile
+import sys
 import threading
 import time
 
+# Local imports
+from datetime_core import startup  # First, so the startup timer covers every layer
+from datetime_core import (
+    apply_pipeline, commands, i18n, privileged, time_state, timedate,
+    tz_catalog, tz_engine, tz_offsets, tz_records, tz_search, workers
+)
+# sntp and clock_monitor (asyncio) and tz_batch (NumPy) are imported where
+# they are first needed, they alone would take longer than the whole core
+from datetime_core.i18n import _
+
+startup.timer.mark("core")
+
 # Third-party imports
 import gi
-import gettext
 
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, GLib, Gdk
 
+startup.timer.mark("gtk-import")
+
 # Application constants
 DEFAULT_WINDOW_SIZE = (450, 400)
 DEFAULT_NTP_SERVER = "pool.ntp.org"
 UI_MARGIN_SMALL = 5
 UI_MARGIN_STANDARD = 10
+
+# Columns of the timezone list model: the position of the row's record, and
+# for the header rows of the grouped view the offset group they stand for
+TZ_COL_RECORD, TZ_COL_GROUP = range(2)
+# Record position of a header row
+TZ_HEADER_ROW = -1
+# Group of the zones whose offset is unknown, sorted after every real offset
+TZ_UNKNOWN_GROUP = 24 * 3600
+
+# Notebook pages, only the first one is built before the window is shown
+TAB_DATE_TIME, TAB_TIMEZONE, TAB_SYSTEM = range(3)
+# Idle time after which the tab following the current one is built ahead
+TAB_PREFETCH_DELAY_MS = 1500
+
+# Number of timezone rows handed to the main loop per idle callback
+TIMEZONE_CHUNK_SIZE = 64
+# Refresh interval of the elapsed time shown for a running apply step
+APPLY_PROGRESS_INTERVAL_MS = 200
+# Seconds between two clock offset samples of the monitoring panel
+MONITOR_INTERVAL_SECONDS = 10
+# Number of samples drawn in the offset sparkline
+MONITOR_SPARKLINE_WIDTH = 60
+# Worker pool key of the settings query, so concurrent reads share one
+TIME_STATE_QUERY = "time-state"
+# Seconds after which a background task is reported as failed
+STATE_QUERY_TIMEOUT_SECONDS = 10
+NTP_PROBE_TIMEOUT_SECONDS = 15
 CSS_STYLE = b"""
     .blue-button { background: #3584e4; color: white; }
     .red-button { background: #e43e35; color: white; }
 """
 
-# Uses the previously defined constant CSS_STYLE
-css_provider = Gtk.CssProvider()
-css_provider.load_from_data(CSS_STYLE)
-Gtk.StyleContext.add_provider_for_screen(
-    Gdk.Screen.get_default(),
-    css_provider,
-    Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-)
 
-# Translation support - Implementação melhorada
-lang_translations = gettext.translation(
-    "comm-xfce-datetime", localedir="/usr/share/locale", fallback=True
-)
-lang_translations.install()
-# define _ shortcut for translations
-_ = lang_translations.gettext
+def setup_gtk():
+    """
+    Install the application stylesheet and translations.
+
+    Needs a display, so it runs only once the window is actually requested
+    rather than when the module is imported.
+    """
+    css_provider = Gtk.CssProvider()
+    css_provider.load_from_data(CSS_STYLE)
+    Gtk.StyleContext.add_provider_for_screen(
+        Gdk.Screen.get_default(),
+        css_provider,
+        Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+    )
+
+    i18n.get_translations().install()
+
+
+def idle_dispatch(callback, *args):
+    """Deliver a result produced on a worker thread on the main loop."""
+    def deliver():
+        callback(*args)
+        return False
+
+    GLib.idle_add(deliver)
+
+
+class ApplyProgressDialog(Gtk.Dialog):
+    """Shows the state and elapsed time of each step of an ApplyPipeline."""
+
+    def __init__(self, parent, pipeline):
+        super().__init__(title=_("Applying settings..."), transient_for=parent, modal=True)
+        self.set_default_size(320, -1)
+        self.pipeline = pipeline
+        self.step_widgets = {}
+
+        grid = Gtk.Grid(row_spacing=UI_MARGIN_SMALL, column_spacing=UI_MARGIN_STANDARD)
+        grid.set_margin_start(UI_MARGIN_STANDARD)
+        grid.set_margin_end(UI_MARGIN_STANDARD)
+        grid.set_margin_top(UI_MARGIN_STANDARD)
+        grid.set_margin_bottom(UI_MARGIN_STANDARD)
+
+        for row, step in enumerate(pipeline.steps):
+            name_label = Gtk.Label(label=step.name)
+            name_label.set_xalign(0)
+            name_label.set_hexpand(True)
+            state_label = Gtk.Label()
+            state_label.set_xalign(0)
+            elapsed_label = Gtk.Label()
+            elapsed_label.set_xalign(1)
+
+            grid.attach(name_label, 0, row, 1, 1)
+            grid.attach(state_label, 1, row, 1, 1)
+            grid.attach(elapsed_label, 2, row, 1, 1)
+            self.step_widgets[step] = (state_label, elapsed_label)
+            self.update_step(step)
+
+        self.get_content_area().add(grid)  # GTK3
+        self.cancel_button = self.add_button(_("Cancel"), Gtk.ResponseType.CANCEL)
+        self.connect("response", self.on_response)
+
+        # Keep the elapsed time of the running step moving
+        self._timer_id = GLib.timeout_add(APPLY_PROGRESS_INTERVAL_MS, self._on_timer)
+        self.connect("destroy", self._on_destroy)
+
+    def update_step(self, step):
+        """Refresh the row of a step."""
+        state_label, elapsed_label = self.step_widgets[step]
+        state_text = {
+            apply_pipeline.STEP_PENDING: _("Pending"),
+            apply_pipeline.STEP_RUNNING: _("Running..."),
+            apply_pipeline.STEP_DONE: _("Done"),
+            apply_pipeline.STEP_FAILED: _("Failed"),
+            apply_pipeline.STEP_CANCELLED: _("Cancelled"),
+        }[step.state]
+        state_label.set_markup(f"<i>{state_text}</i>")
+
+        elapsed = step.elapsed
+        elapsed_label.set_text("" if elapsed is None else f"{elapsed:.1f} s")
+
+    def set_finished(self):
+        """Turn the Cancel button into a Close button."""
+        self.cancel_button.set_label(_("Close"))
+
+    def on_response(self, dialog, response):
+        if self.pipeline.finished:
+            self.destroy()
+        else:
+            # The running step completes, the ones after it are skipped
+            self.cancel_button.set_sensitive(False)
+            self.pipeline.cancel()
+
+    def _on_timer(self):
+        step = self.pipeline.current_step
+        if step is not None:
+            self.update_step(step)
+        return True
+
+    def _on_destroy(self, widget):
+        if self._timer_id:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = 0
 
 
 class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
@@ -52,7 +176,36 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         # Initialize application state
         self.selected_timezone = None
         self.search_text = ""
-        self.timezone_info_cache = {}  # Cache for timezone info
+        self.timezone_records = tz_records.RecordStore()  # Data of the listed zones
+        self.search_index = None  # Built from the catalog by the population worker
+        self.timezone_matches = None  # Zones matching the search, None for all
+        self.sort_key = tz_records.SORT_REGION  # Order of the list without a search
+        self.group_by_offset = False  # Show a header row per UTC offset
+        self._group_sizes = {}  # Number of zones per offset group
+        self._visible_groups = None  # Groups with a search match, None for all
+        self._row_times = {}  # Row times of the current minute, by zone
+        self._clock_minute = int(time.time() // 60)
+        self._clock_source_id = 0
+        self.current_tz_description = None  # Timezone and offset shown in the status area
+        self.workers = workers.WorkerPool(dispatch=idle_dispatch)  # Runs all blocking work
+        self.timedate = timedate.get_client()  # Shared client of timedated
+        self.time_state = time_state.TimeState(self.timedate)  # Cached settings snapshot
+        self.privileged = privileged.PrivilegedExecutor(
+            self.timedate, self.time_state, pool=self.workers
+        )
+        self.clock_monitor = None  # Offset samples, created when monitoring starts
+        self._monitor_source_id = 0
+        self._monitor_probe = None  # Event set once the current monitor's probe returned
+        self.zone_offsets = tz_offsets.OffsetCache()  # Offsets valid until each zone's next transition
+        self._populate_cancel = None  # Cancels the running timezone population
+        self._tab_builders = {}  # Tabs still showing their placeholder, by page
+        self._prefetch_source_id = 0
+        self.zone_tables = None  # Transition tables of the listed zones, for the preview
+        self._zone_tables_records = None  # Record store the tables were loaded for
+        self._zone_tables_loading = None  # Record store whose tables are being loaded
+        self._preview_instant = None  # Chosen date and time shown in the list
+        self._preview_results = None  # (offset, abbreviation) at that instant, by record
+        self._preview_source_id = 0
 
         # Create main layout container
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
@@ -62,10 +215,12 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         self.notebook = Gtk.Notebook()
         main_box.pack_start(self.notebook, True, True, 0)
 
-        # Create tab pages
-        self.create_date_time_tab()
-        self.create_timezone_tab()
-        self.create_system_tab()
+        # Create tab pages; only the first is built now, the others on first view
+        self._add_tab(_("Date & Time"), self.create_date_time_tab)
+        self._add_tab(_("Timezone"), self.create_timezone_tab)
+        self._add_tab(_("System"), self.create_system_tab)
+        self._build_tab(TAB_DATE_TIME)
+        self.notebook.connect("switch-page", self.on_switch_page)
 
         # Add status area at the bottom
         self._create_status_area(main_box)
@@ -73,8 +228,17 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         # Add button bar at the bottom
         self._create_button_bar(main_box)
 
-        # Populate timezone list
-        self.populate_timezone_list()
+        # Stop background work when the window goes away
+        self.connect("destroy", self._on_window_destroy)
+
+        # Warm the tab the user is most likely to open next
+        self._schedule_tab_prefetch()
+
+        # One shared timer keeps the status clock and the visible row times current
+        self._schedule_clock_tick()
+
+        # The widgets showing the settings are filled in once they are read
+        self.refresh_time_state()
 
     def _create_status_area(self, main_box):
         """Create and add the status area to the main box."""
@@ -128,6 +292,64 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
 
         main_box.pack_start(button_box, False, False, 0)
 
+    def _add_tab(self, title, builder):
+        """Append a tab showing a placeholder until builder() is run."""
+        placeholder = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        loading_label = Gtk.Label(label=_("Loading..."))
+        loading_label.set_vexpand(True)
+        placeholder.pack_start(loading_label, True, True, 0)
+
+        page = self.notebook.append_page(placeholder, Gtk.Label(label=title))
+        self._tab_builders[page] = builder
+
+    def _build_tab(self, page):
+        """Replace the placeholder of a tab with its content, once."""
+        builder = self._tab_builders.pop(page, None)
+        if builder is None:
+            return
+
+        container = self.notebook.get_nth_page(page)
+        for child in container.get_children():
+            container.remove(child)
+
+        content = builder()
+        container.pack_start(content, True, True, 0)
+        content.show_all()
+
+        # Work that only the tab's own widgets need starts with the tab
+        if page == TAB_TIMEZONE:
+            self.populate_timezone_list()
+
+    def is_tab_built(self, page):
+        return page not in self._tab_builders
+
+    def on_switch_page(self, notebook, page_widget, page):
+        """Build a tab the first time it is shown."""
+        self._build_tab(page)
+        self._schedule_tab_prefetch(page)
+
+    def _schedule_tab_prefetch(self, page=TAB_DATE_TIME):
+        """Build the tab after page once the user has been idle for a while."""
+        if self._prefetch_source_id:
+            GLib.source_remove(self._prefetch_source_id)
+            self._prefetch_source_id = 0
+
+        next_page = page + 1
+        if next_page in self._tab_builders:
+            self._prefetch_source_id = GLib.timeout_add(
+                TAB_PREFETCH_DELAY_MS, self._on_tab_prefetch, next_page
+            )
+
+    def _on_tab_prefetch(self, page):
+        """Build the tab in an idle moment, after anything more urgent."""
+        self._prefetch_source_id = 0
+        GLib.idle_add(self._build_tab_idle, page, priority=GLib.PRIORITY_LOW)
+        return False
+
+    def _build_tab_idle(self, page):
+        self._build_tab(page)
+        return False
+
     def create_date_time_tab(self):
         """Create the Date & Time tab"""
         date_time_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -161,6 +383,10 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         self.hour_spinner = Gtk.SpinButton.new_with_range(0, 23, 1)
         self.minute_spinner = Gtk.SpinButton.new_with_range(0, 59, 1)
         self.second_spinner = Gtk.SpinButton.new_with_range(0, 59, 1)
+        # The spinners do not follow the clock, so the time is only set once
+        # the user picked a date or time, until it is applied
+        self.time_modified = False
+        self.time_seeding = False
         self.set_initial_time()
 
         time_box.pack_start(Gtk.Label(label=_("Hour:")), False, False, 0)  # GTK3
@@ -173,9 +399,16 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         time_frame.add(time_box)  # GTK3
         date_time_box.pack_start(time_frame, False, False, 0)  # GTK3
 
-        # Add the tab
-        tab_label = Gtk.Label(label=_("Date & Time"))
-        self.notebook.append_page(date_time_box, tab_label)
+        # Show the chosen instant in every zone of the timezone list
+        self.preview_checkbox = Gtk.CheckButton(label=_("Preview this date and time in the timezone list"))
+        self.preview_checkbox.connect("toggled", self.on_preview_toggled)
+        date_time_box.pack_start(self.preview_checkbox, False, False, 0)  # GTK3
+
+        self.calendar.connect("day-selected", self.on_date_time_changed)
+        for spinner in (self.hour_spinner, self.minute_spinner, self.second_spinner):
+            spinner.connect("value-changed", self.on_date_time_changed)
+
+        return date_time_box
 
     def create_timezone_tab(self):
         """Create the Timezone tab"""
@@ -189,6 +422,8 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         search_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
         search_label = Gtk.Label(label=_("Search:"))
         self.search_entry = Gtk.SearchEntry()
+        # GTK3 emits search-changed 150 ms after the last keystroke, so fast
+        # typing already triggers a single refilter
         self.search_entry.connect("search-changed", self.on_search_changed)
         # Configuração para expandir o search entry
         self.search_entry.set_hexpand(True)
@@ -196,16 +431,49 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         search_box.pack_start(self.search_entry, True, True, 0)
         tz_box.pack_start(search_box, False, False, 0)  # GTK3
 
+        # Sort order and grouping, applied by reordering the existing rows
+        view_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        view_box.pack_start(Gtk.Label(label=_("Sort by:")), False, False, 0)
+        self.sort_combo = Gtk.ComboBoxText()
+        self.sort_combo.append(tz_records.SORT_OFFSET, _("UTC offset"))
+        self.sort_combo.append(tz_records.SORT_CITY, _("City"))
+        self.sort_combo.append(tz_records.SORT_COUNTRY, _("Country"))
+        self.sort_combo.append(tz_records.SORT_REGION, _("Region"))
+        self.sort_combo.set_active_id(self.sort_key)
+        self.sort_combo.connect("changed", self.on_sort_changed)
+        view_box.pack_start(self.sort_combo, False, False, 0)
+        self.group_checkbox = Gtk.CheckButton(label=_("Group by offset"))
+        self.group_checkbox.set_active(self.group_by_offset)
+        self.group_checkbox.connect("toggled", self.on_group_toggled)
+        view_box.pack_start(self.group_checkbox, False, False, 0)
+        tz_box.pack_start(view_box, False, False, 0)  # GTK3
+
+        # Loading indicator, hidden once the list is fully populated
+        self.timezone_loading_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.timezone_loading_spinner = Gtk.Spinner()
+        self.timezone_loading_box.pack_start(self.timezone_loading_spinner, False, False, 0)
+        self.timezone_loading_box.pack_start(Gtk.Label(label=_("Loading timezones...")), False, False, 0)
+        tz_box.pack_start(self.timezone_loading_box, False, False, 0)  # GTK3
+
         # Create scrollable list for timezones
         scrolled_window = Gtk.ScrolledWindow()
         scrolled_window.set_min_content_height(200)
         scrolled_window.set_vexpand(True)
         scrolled_window.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
 
-        # Create list box for timezone items
-        self.timezone_list = Gtk.ListBox()
-        self.timezone_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.timezone_list.connect("row-selected", self.on_timezone_selected)
+        # Model-backed timezone list: rows are only rendered when scrolled into view,
+        # and each row only holds the position of its record in timezone_records
+        self.timezone_store = Gtk.ListStore(int, int)
+        self.timezone_filter = self.timezone_store.filter_new()
+        self.timezone_filter.set_visible_func(self._is_timezone_row_visible)
+
+        self.timezone_list = Gtk.TreeView(model=self.timezone_filter)
+        self.timezone_list.set_headers_visible(False)
+        self.timezone_list.set_enable_search(False)
+        self._add_timezone_columns()
+        self.timezone_list.get_selection().set_mode(Gtk.SelectionMode.SINGLE)
+        self.timezone_list.get_selection().set_select_function(self._is_timezone_row_selectable, None)
+        self.timezone_list.get_selection().connect("changed", self.on_timezone_selected)
         scrolled_window.add(self.timezone_list)  # GTK3
         tz_box.pack_start(scrolled_window, True, True, 0)  # GTK3
 
@@ -215,9 +483,7 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         self.selection_label.set_xalign(0)
         tz_box.pack_start(self.selection_label, False, False, 0)  # GTK3
 
-        # Add the tab
-        tab_label = Gtk.Label(label=_("Timezone"))
-        self.notebook.append_page(tz_box, tab_label)
+        return tz_box
 
     def create_system_tab(self):
         """Create the System tab"""
@@ -240,20 +506,33 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
             label=_("Enable Network Time Synchronization")
         )
         self.ntp_checkbox.set_active(self.is_ntp_enabled())
+        # Until a snapshot was shown the widgets hold defaults, not the system's settings
+        self.system_tab_seeded = self.time_state.peek() is not None
         self.ntp_toggle_lock = False
         self.ntp_checkbox.connect("toggled", self.on_ntp_toggled)
         sync_box.pack_start(self.ntp_checkbox, False, False, 0)  # GTK3
 
-        # NTP server info (example only, not functional)
+        # NTP servers to probe, the system configuration is not changed
         server_label = Gtk.Label(label=_("NTP Servers:"))
         server_label.set_xalign(0)
         server_label.set_margin_top(5)
         sync_box.pack_start(server_label, False, False, 0)  # GTK3
 
-        server_entry = Gtk.Entry()
-        server_entry.set_text("pool.ntp.org")
-        server_entry.set_sensitive(False)  # Read-only example
-        sync_box.pack_start(server_entry, False, False, 0)  # GTK3
+        server_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.ntp_server_entry = Gtk.Entry()
+        self.ntp_server_entry.set_text(DEFAULT_NTP_SERVER)
+        self.ntp_server_entry.set_tooltip_text(_("Servers separated by spaces or commas"))
+        server_box.pack_start(self.ntp_server_entry, True, True, 0)  # GTK3
+
+        self.ntp_test_button = Gtk.Button(label=_("Test Servers"))
+        self.ntp_test_button.connect("clicked", self.on_test_servers_clicked)
+        server_box.pack_start(self.ntp_test_button, False, False, 0)  # GTK3
+        sync_box.pack_start(server_box, False, False, 0)  # GTK3
+
+        self.ntp_results_label = Gtk.Label()
+        self.ntp_results_label.set_xalign(0)
+        self.ntp_results_label.set_selectable(True)
+        sync_box.pack_start(self.ntp_results_label, False, False, 0)  # GTK3
 
         note_label = Gtk.Label()
         note_label.set_markup("<i>" + _("Note: NTP servers are configured in /etc/ntp.conf") + "</i>")
@@ -277,9 +556,12 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
             self.hw_utc_radio, _("Hardware clock uses local time")
         )
 
-        # Set initial state based on system setting
-        self.hw_utc_radio.set_active(self.is_hw_clock_utc())
-        self.hw_local_radio.set_active(not self.is_hw_clock_utc())
+        # Set initial state based on system setting; a mode the user picks
+        # is kept until it is applied
+        self.hw_clock_modified = False
+        self.hw_clock_seeding = False
+        self._seed_hw_clock_radios(not self.is_hw_clock_utc())
+        self.hw_utc_radio.connect("toggled", self.on_hw_clock_toggled)
 
         hw_box.pack_start(self.hw_utc_radio, False, False, 0)  # GTK3
         hw_box.pack_start(self.hw_local_radio, False, False, 0)  # GTK3
@@ -287,218 +569,577 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         hw_frame.add(hw_box)  # GTK3
         system_box.pack_start(hw_frame, False, False, 0)  # GTK3
 
-        # Add the tab
-        tab_label = Gtk.Label(label=_("System"))
-        self.notebook.append_page(system_box, tab_label)
-
-    def create_timezone_row(self, city, country, region_path, timezone, utc_offset):
-        """Create a stylized row for the timezone list"""
-        # Main row container
-        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
-        row.set_margin_start(5)
-        row.set_margin_end(5)
-        row.set_margin_top(5)
-        row.set_margin_bottom(5)
-
-        # Left side: City and region info
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
-        info_box.set_hexpand(True)
-
-        # City and country
-        city_label = Gtk.Label()
-        city_label.set_markup(f"<span weight='bold'>{city}</span> {country}")
-        city_label.set_xalign(0)
-        info_box.pack_start(city_label, False, False, 0)  # GTK3
-
-        # Region path and UTC
-        region_label = Gtk.Label()
-        region_label.set_markup(f"<span foreground='#cccccc' size='small'>{region_path} • {utc_offset}</span>")
-        region_label.set_xalign(0)
-        info_box.pack_start(region_label, False, False, 0)  # GTK3
-
-        row.pack_start(info_box, True, True, 0)  # GTK3
-
-        # Right side: Current time in that timezone
-        local_time = self.get_time_in_timezone(timezone)
-        time_label = Gtk.Label()
-        time_label.set_markup(f"<span foreground='#cccccc' size='small'>{local_time}</span>")
-        row.pack_start(time_label, False, False, 0)  # GTK3
-
-        # Create the list row
-        list_row = Gtk.ListBoxRow()
-        list_row.add(row)  # GTK3
-
-        # Store timezone data
-        list_row.timezone = timezone
-        list_row.city = city
-        list_row.country = country
-        list_row.utc_offset = utc_offset
-
-        return list_row
+        # Clock offset monitoring frame
+        from datetime_core import clock_monitor
+        monitor_frame = Gtk.Frame(label=_("Clock Monitor"))
+        monitor_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        monitor_box.set_margin_start(10)
+        monitor_box.set_margin_end(10)
+        monitor_box.set_margin_top(10)
+        monitor_box.set_margin_bottom(10)
+
+        monitor_options = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.monitor_checkbox = Gtk.CheckButton(label=_("Monitor clock offset"))
+        self.monitor_checkbox.connect("toggled", self.on_monitor_toggled)
+        monitor_options.pack_start(self.monitor_checkbox, True, True, 0)  # GTK3
+
+        self.monitor_source_combo = Gtk.ComboBoxText()
+        self.monitor_source_combo.append(clock_monitor.ClockMonitor.SOURCE_KERNEL, _("Kernel (adjtimex)"))
+        self.monitor_source_combo.append(clock_monitor.ClockMonitor.SOURCE_SNTP, _("NTP servers"))
+        self.monitor_source_combo.set_active_id(clock_monitor.ClockMonitor.SOURCE_KERNEL)
+        self.monitor_source_combo.connect("changed", self.on_monitor_source_changed)
+        monitor_options.pack_start(self.monitor_source_combo, False, False, 0)  # GTK3
+        monitor_box.pack_start(monitor_options, False, False, 0)  # GTK3
+
+        self.monitor_sparkline_label = Gtk.Label()
+        self.monitor_sparkline_label.set_xalign(0)
+        monitor_box.pack_start(self.monitor_sparkline_label, False, False, 0)  # GTK3
+
+        self.monitor_stats_label = Gtk.Label()
+        self.monitor_stats_label.set_xalign(0)
+        monitor_box.pack_start(self.monitor_stats_label, False, False, 0)  # GTK3
+
+        monitor_frame.add(monitor_box)  # GTK3
+        system_box.pack_start(monitor_frame, False, False, 0)  # GTK3
+
+        return system_box
+
+    def _add_timezone_columns(self):
+        """Add the info and time columns to the timezone list."""
+        info_renderer = Gtk.CellRendererText()
+        info_renderer.set_padding(5, 5)
+        info_column = Gtk.TreeViewColumn()
+        info_column.pack_start(info_renderer, True)
+        info_column.set_cell_data_func(info_renderer, self._render_timezone_info)
+        info_column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+        info_column.set_expand(True)
+        self.timezone_list.append_column(info_column)
+
+        time_renderer = Gtk.CellRendererText()
+        time_renderer.set_padding(5, 5)
+        time_renderer.set_property("foreground", "#cccccc")
+        time_renderer.set_property("scale", 0.83)
+        time_column = Gtk.TreeViewColumn()
+        time_column.pack_start(time_renderer, False)
+        time_column.set_cell_data_func(time_renderer, self._render_timezone_time)
+        time_column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+        time_column.set_fixed_width(90)
+        self.timezone_list.append_column(time_column)
+
+        # All columns are fixed size, so row heights need not be measured up front
+        self.timezone_list.set_fixed_height_mode(True)
+
+    def _get_row_record(self, model, tree_iter):
+        """Return the TimezoneRecord shown by a row of the timezone list, None for headers."""
+        position = model.get_value(tree_iter, TZ_COL_RECORD)
+        if position == TZ_HEADER_ROW:
+            return None
+        return self.timezone_records[position]
+
+    def _group_of(self, record):
+        """Return the offset group of a record."""
+        if record.offset_seconds is None:
+            return TZ_UNKNOWN_GROUP
+        return record.offset_seconds
+
+    def _render_timezone_info(self, column, renderer, model, tree_iter, data=None):
+        """Build the city/region markup of a row when it is drawn."""
+        record = self._get_row_record(model, tree_iter)
+        if record is None:
+            group = model.get_value(tree_iter, TZ_COL_GROUP)
+            title = _("Unknown offset") if group == TZ_UNKNOWN_GROUP else tz_engine.format_offset(group)
+            size = _("Zones: {}").format(self._group_sizes.get(group, 0))
+            renderer.set_property(
+                "markup",
+                f"<span weight='bold'>{title}</span>\n"
+                f"<span foreground='#cccccc' size='small'>{size}</span>"
+            )
+            return
+
+        renderer.set_property(
+            "markup",
+            f"<span weight='bold'>{GLib.markup_escape_text(record.city)}</span> "
+            f"{GLib.markup_escape_text(record.country)}\n"
+            f"<span foreground='#cccccc' size='small'>"
+            f"{GLib.markup_escape_text(record.region_path)} • {record.utc_offset}</span>"
+        )
+
+    def _render_timezone_time(self, column, renderer, model, tree_iter, data=None):
+        """Show the current time of a row, resolved when the row is drawn."""
+        record = self._get_row_record(model, tree_iter)
+        if record is None:
+            renderer.set_property("text", self._get_group_time(model.get_value(tree_iter, TZ_COL_GROUP)))
+            return
+
+        if self._preview_results is not None:
+            renderer.set_property("text", self._get_preview_time(record))
+            return
+
+        timezone = record.timezone
+        local_time = self._row_times.get(timezone)
+        if local_time is None:
+            local_time = self._row_times[timezone] = self.get_time_in_timezone(timezone)
+        renderer.set_property("text", local_time)
+
+    def refresh_visible_row_times(self):
+        """Recompute the times of the rows on screen in one batch."""
+        # Rows scrolled into view later are resolved when they are drawn
+        self._row_times = {}
+        if not self.is_tab_built(TAB_TIMEZONE):
+            return
+
+        visible_range = self.timezone_list.get_visible_range()
+        if visible_range is None:
+            return
+
+        model = self.timezone_list.get_model()
+        start, end = (path.get_indices()[0] for path in visible_range)
+        for index in range(start, end + 1):
+            tree_iter = model.iter_nth_child(None, index)
+            record = None if tree_iter is None else self._get_row_record(model, tree_iter)
+            if record is not None:
+                self._row_times[record.timezone] = self.get_time_in_timezone(record.timezone)
+
+        self.timezone_list.queue_draw()
+
+    def _schedule_clock_tick(self):
+        """Arm the shared clock timer for the start of the next second."""
+        delay_ms = 1000 - int(time.time() * 1000) % 1000
+        self._clock_source_id = GLib.timeout_add(delay_ms, self._on_clock_tick)
+
+    def _on_clock_tick(self):
+        """Update the status clock, and the row times when the minute changes."""
+        self._render_current_timezone_label()
+
+        minute = int(time.time() // 60)
+        if minute != self._clock_minute:
+            self._clock_minute = minute
+            self.refresh_zone_offsets()
+            self.refresh_visible_row_times()
+
+        # Re-arm aligned to the wall clock so ticks do not drift
+        self._schedule_clock_tick()
+        return False
+
+    def _get_group_time(self, group):
+        """Return the time shown in the rows at the offset of a group."""
+        if group == TZ_UNKNOWN_GROUP:
+            return ""
+        offset = datetime.timezone(datetime.timedelta(seconds=group))
+        if self._preview_results is not None:
+            return self._preview_instant.astimezone(offset).strftime(tz_engine.ROW_TIME_FORMAT)
+        return datetime.datetime.now(offset).strftime(tz_engine.ROW_TIME_FORMAT)
+
+    def _get_preview_time(self, record):
+        """Return the chosen instant in the zone of a record."""
+        if record.index >= len(self._preview_results) or self._preview_results[record.index] is None:
+            return ""
+        offset_seconds, _abbreviation = self._preview_results[record.index]
+        offset = datetime.timezone(datetime.timedelta(seconds=offset_seconds))
+        return self._preview_instant.astimezone(offset).strftime(tz_engine.ROW_TIME_FORMAT)
+
+    def get_chosen_instant(self):
+        """
+        Return the date and time of the calendar and spinners as an aware datetime.
+
+        They are read as local time of the selected zone, or of the system
+        zone when none is selected, as applying them would set.
+        """
+        year, month, day = self.calendar.get_date()
+        chosen = datetime.datetime(
+            year, month + 1, day,
+            self.hour_spinner.get_value_as_int(),
+            self.minute_spinner.get_value_as_int(),
+            self.second_spinner.get_value_as_int()
+        )
+
+        timezone = self.selected_timezone
+        if not timezone:
+            snapshot = self.time_state.peek()
+            timezone = snapshot.timezone if snapshot is not None else None
+
+        if timezone:
+            try:
+                return chosen.replace(tzinfo=tz_engine.get_zone(timezone))
+            except tz_engine.TimezoneEngineError:
+                pass
+        return chosen.astimezone()
+
+    def on_preview_toggled(self, button):
+        """Switch the time column of the timezone list between now and the chosen instant."""
+        if button.get_active():
+            self._schedule_preview_update()
+        else:
+            self._preview_instant = None
+            self._preview_results = None
+            if self.is_tab_built(TAB_TIMEZONE):
+                self.timezone_list.queue_draw()
+
+    def on_date_time_changed(self, widget):
+        """Remember a date or time picked by the user, and follow it in the preview."""
+        if not self.time_seeding:
+            self.time_modified = True
+        self._schedule_preview_update()
+
+    def _schedule_preview_update(self):
+        """Recompute the preview once, however many values changed meanwhile."""
+        if self.preview_checkbox.get_active() and not self._preview_source_id:
+            self._preview_source_id = GLib.idle_add(self._update_preview)
+
+    def _update_preview(self):
+        """Resolve the chosen instant in every listed zone in one batch."""
+        self._preview_source_id = 0
+        records = self.timezone_records
+        # Groups are counted once the list is fully populated, which reschedules this
+        if not self.preview_checkbox.get_active() or not self._group_sizes:
+            return False
+
+        # Tables are loaded once per populated list
+        if self.zone_tables is None or self._zone_tables_records is not records:
+            if self._zone_tables_loading is not records:
+                from datetime_core import tz_batch
+                self._zone_tables_loading = records
+                self.workers.submit(
+                    tz_batch.ZoneTables, [record.timezone for record in records],
+                    callback=lambda tables, error: self._on_zone_tables_loaded(records, tables, error)
+                )
+            return False
+
+        self._preview_instant = self.get_chosen_instant()
+        self._preview_results = self.zone_tables.resolve(self._preview_instant)
+        self.timezone_list.queue_draw()
+        return False
+
+    def _on_zone_tables_loaded(self, records, tables, error):
+        """Install the tables and show the preview they were loaded for."""
+        if self._zone_tables_loading is records:
+            self._zone_tables_loading = None
+        if error is not None:
+            print(f"Warning: Cannot load the zone transition tables: {error}")
+        elif records is self.timezone_records:
+            self.zone_tables = tables
+            self._zone_tables_records = records
+            self._schedule_preview_update()
+        return False
 
     def get_time_in_timezone(self, timezone):
         """Get the current time in the specified timezone"""
         try:
-            # Use env to set TZ environment variable properly
-            result = subprocess.run(
-                ["env", f"TZ={timezone}", "date", "+%a %H:%M"],
-                capture_output=True, text=True, check=True
-            )
-            return result.stdout.strip()
-        except Exception:
-            return ""
+            return tz_engine.format_local_time(timezone)
+        except tz_engine.TimezoneEngineError:
+            return tz_engine.date_local_time(timezone)
 
     def get_timezone_utc_offset(self, timezone):
         """Get the UTC offset for a timezone."""
-        # Check if we have this info cached
-        if timezone in self.timezone_info_cache:
-            return self.timezone_info_cache[timezone]
+        utc_offset = self.zone_offsets.get(timezone).utc_offset
 
-        try:
-            # Use env to set TZ environment variable properly
-            result = subprocess.run(
-                ["env", f"TZ={timezone}", "date", "+%z"],
-                capture_output=True, text=True, check=True
-            )
-            offset_raw = result.stdout.strip()
-
-            # Parse offset properly
-            if offset_raw and len(offset_raw) >= 5:  # Format should be +HHMM or -HHMM
-                sign = offset_raw[0]
-                hours = int(offset_raw[1:3])
-                minutes = int(offset_raw[3:5])
-                
-                # Format the offset string
-                if minutes == 0:
-                    offset_str = f"UTC{sign}{hours}"
-                else:
-                    offset_str = f"UTC{sign}{hours}:{minutes:02d}"
+        # Default fallback if we can't determine
+        return utc_offset or "UTC"
 
-                # Cache the result
-                self.timezone_info_cache[timezone] = offset_str
-                return offset_str
-        except Exception as e:
-            print(f"Error getting timezone offset for {timezone}: {e}")
+    def get_timezone_offset_seconds(self, timezone):
+        """Get the UTC offset of a timezone in seconds, None if unknown."""
+        return self.zone_offsets.get(timezone).offset_seconds
 
-        # Default fallback if we can't determine
-        return "UTC"
+    def describe_next_offset_change(self, timezone):
+        """Describe when the offset of a zone changes next, and to what."""
+        info = self.zone_offsets.get(timezone)
+        if info.next_utc_offset is None:
+            return _("No offset change within a year")
 
-    def populate_timezone_list(self):
-        """Populate the timezone list with available timezones."""
+        # Shown in the zone's own time, right after the change
         try:
-            # Get available timezones
-            result = subprocess.run(
-                ["timedatectl", "list-timezones"],
-                capture_output=True, text=True, check=True
-            )
-            all_timezones = result.stdout.splitlines()
+            when = tz_engine.now_in_zone(timezone, info.valid_until).strftime("%a %Y-%m-%d %H:%M")
+        except tz_engine.TimezoneEngineError:
+            when = info.valid_until.strftime("%Y-%m-%d %H:%M UTC")
 
-            # Process and map common country codes for better display
-            country_mapping = self.create_country_mapping()
+        next_offset = info.next_utc_offset
+        if info.next_abbreviation and info.next_abbreviation[:1].isalpha():
+            next_offset = f"{next_offset}, {info.next_abbreviation}"
+        return _("Next change: {} to {}").format(when, next_offset)
 
-            # Process each timezone
-            for timezone in sorted(all_timezones):
-                parts = timezone.split('/')
+    def refresh_zone_offsets(self):
+        """
+        Move the zones whose offset changed, after a DST transition.
 
-                if len(parts) >= 2:
-                    region = parts[0]
-                    city_raw = parts[-1]
+        Only the changed rows move and only the headers of the groups that
+        appear or become empty are added or removed.
+        """
+        # Groups are counted once the list is fully populated
+        if not self.is_tab_built(TAB_TIMEZONE) or not self._group_sizes:
+            return
+
+        # Cached offsets are only recomputed for the zones past their transition
+        moves = []
+        for record in self.timezone_records:
+            info = self.zone_offsets.get(record.timezone)
+            if info.offset_seconds is None or info.offset_seconds == record.offset_seconds:
+                continue
+
+            old_group = self._group_of(record)
+            self.timezone_records.update_offset(record.timezone, info.utc_offset, info.offset_seconds)
+            moves.append((old_group, self._group_of(record)))
 
-                    # Format the city name
-                    city = city_raw.replace('_', ' ')
+        if not moves:
+            return
 
-                    # Try to determine country from region or mapping
-                    country = country_mapping.get(city_raw, "")
+        if self.selected_timezone in self.timezone_records:
+            self._render_selection_label(self.timezone_records.get(self.selected_timezone))
 
-                    # Get UTC offset
-                    utc_offset = self.get_timezone_utc_offset(timezone)
+        for old_group, new_group in moves:
+            self._group_sizes[old_group] -= 1
+            if not self._group_sizes[old_group]:
+                del self._group_sizes[old_group]
+            self._group_sizes[new_group] = self._group_sizes.get(new_group, 0) + 1
 
-                    # Create the region path for display
-                    region_path = f"{region}/{city_raw}"
+        self._sync_group_headers()
+        self._update_timezone_rows()
 
-                    # Create and add row to list
-                    row = self.create_timezone_row(city, country, region_path, timezone, utc_offset)
-                    self.timezone_list.add(row)  # GTK3
+    def populate_timezone_list(self, entries=None):
+        """
+        Populate the timezone list with available timezones.
 
-            # Show all rows
-            self.timezone_list.show_all()  # GTK3
+        The catalog is loaded and each zone resolved on the worker pool; rows
+        are handed to the main loop in chunks so the window stays usable.
 
-            # Update list based on initial search (empty)
+        Args:
+            entries: Catalog entries to show, loaded from the catalog if None
+        """
+        # Cancel a population that is still running
+        if self._populate_cancel is not None:
+            self._populate_cancel.set()
+        cancel = threading.Event()
+        self._populate_cancel = cancel
+
+        self.timezone_store.clear()
+        self.timezone_records = tz_records.RecordStore()
+        self._group_sizes = {}
+        self._preview_results = None
+        self._set_timezone_loading(True)
+
+        self.workers.submit(
+            self._populate_timezone_worker, cancel, entries,
+            callback=lambda _result, error: self._on_populate_finished(cancel, error)
+        )
+
+    def _populate_timezone_worker(self, cancel, entries):
+        """Resolve timezone rows on a worker and hand them to the main loop in chunks."""
+        dispatch = self.workers.dispatch
+        if entries is None:
+            # Paint from the cached catalog, a stale one is refreshed in background
+            catalog = tz_catalog.TimezoneCatalog(pool=self.workers)
+            entries = catalog.load(on_update=self._on_catalog_updated)
+
+        search_index = tz_search.SearchIndex(entries)
+        dispatch(self._set_search_index, search_index, cancel)
+
+        for start in range(0, len(entries), TIMEZONE_CHUNK_SIZE):
+            if cancel.is_set():
+                return
+
+            rows = [
+                (
+                    entry,
+                    self.get_timezone_utc_offset(entry.timezone),
+                    self.get_timezone_offset_seconds(entry.timezone),
+                )
+                for entry in entries[start:start + TIMEZONE_CHUNK_SIZE]
+            ]
+            dispatch(self._append_timezone_rows, rows, cancel)
+
+    def _append_timezone_rows(self, rows, cancel):
+        """Add a chunk of resolved (entry, utc_offset, offset_seconds) rows to the records and the model."""
+        if not cancel.is_set():
+            for entry, utc_offset, offset_seconds in rows:
+                record = self.timezone_records.append(entry, utc_offset, offset_seconds)
+                self.timezone_store.append((record.index, 0))
+
+    def _set_search_index(self, search_index, cancel):
+        """Install the search index built for the catalog being shown."""
+        if not cancel.is_set():
+            self.search_index = search_index
             self.filter_timezone_list()
 
-        except Exception as e:
-            self.show_message_dialog(
-                Gtk.MessageType.ERROR,
-                _("Error loading timezone data: ") + str(e)
-            )
+    def _on_populate_finished(self, cancel, error=None):
+        """Hide the loading indicator once the last chunk is in, reporting a failure."""
+        if not cancel.is_set():
+            if error is not None:
+                self.show_message_dialog(
+                    Gtk.MessageType.ERROR,
+                    _("Error loading timezone data: ") + str(error)
+                )
 
-    def create_country_mapping(self):
-        """Create a mapping of common cities to their countries"""
-        return {
-            "Sao_Paulo": _("Brazil"),
-            "New_York": _("United States"),
-            "Los_Angeles": _("United States"),
-            "Chicago": _("United States"),
-            "Toronto": _("Canada"),
-            "Mexico_City": _("Mexico"),
-            "London": _("United Kingdom"),
-            "Paris": _("France"),
-            "Berlin": _("Germany"),
-            "Rome": _("Italy"),
-            "Madrid": _("Spain"),
-            "Moscow": _("Russia"),
-            "Cairo": _("Egypt"),
-            "Johannesburg": _("South Africa"),
-            "Dubai": _("UAE"),
-            "Mumbai": _("India"),
-            "Tokyo": _("Japan"),
-            "Shanghai": _("China"),
-            "Seoul": _("South Korea"),
-            "Singapore": _("Singapore"),
-            "Sydney": _("Australia"),
-            "Auckland": _("New Zealand"),
-            # Add more as needed
-        }
+            self._set_timezone_loading(False)
+            self._group_sizes = {
+                TZ_UNKNOWN_GROUP if offset is None else offset: size
+                for offset, size in self.timezone_records.offset_groups().items()
+            }
+            self._sync_group_headers()
+
+            # Rows that arrived while a search was active still need ranking,
+            # and rows of a non default order or grouping their place
+            if self.search_text:
+                self.filter_timezone_list()
+            elif self.group_by_offset or self.sort_key != tz_records.SORT_REGION:
+                self._update_timezone_rows()
+
+            self._schedule_preview_update()
+
+    def _set_timezone_loading(self, loading):
+        """Show or hide the timezone loading indicator."""
+        if loading:
+            self.timezone_loading_spinner.start()
+            self.timezone_loading_box.show_all()
+        else:
+            self.timezone_loading_spinner.stop()
+            self.timezone_loading_box.hide()
+
+    def _on_catalog_updated(self, entries):
+        """Replace the rows painted from a stale cache with the fresh catalog."""
+        # The tzdata changed, offsets resolved from the old files are stale
+        tz_engine.clear_caches()
+        self.zone_offsets.clear()
+        self.populate_timezone_list(entries)
+
+    def _on_window_destroy(self, widget):
+        """Cancel background work that would outlive the window."""
+        if self._populate_cancel is not None:
+            self._populate_cancel.set()
+        if self._clock_source_id:
+            GLib.source_remove(self._clock_source_id)
+            self._clock_source_id = 0
+        if self._prefetch_source_id:
+            GLib.source_remove(self._prefetch_source_id)
+            self._prefetch_source_id = 0
+        if self._preview_source_id:
+            GLib.source_remove(self._preview_source_id)
+            self._preview_source_id = 0
+        self._stop_clock_monitor()
+        self.workers.shutdown()
 
     def on_search_changed(self, entry):
         """Filter the timezone list based on search text"""
-        self.search_text = entry.get_text().strip().lower()
+        self.search_text = entry.get_text()
         self.filter_timezone_list()
 
     def filter_timezone_list(self):
-        """Show/hide rows based on search text in GTK3"""
-        for row in self.timezone_list.get_children():
-            if not hasattr(row, 'timezone'):
-                continue
-
-            # Get the data from the row
-            city = row.city.lower() if hasattr(row, 'city') else ""
-            country = row.country.lower() if hasattr(row, 'country') else ""
-            timezone = row.timezone.lower() if hasattr(row, 'timezone') else ""
+        """Rank the zones matching the search text and show them best first"""
+        if self.search_index is not None:
+            self.timezone_matches = self.search_index.rank(self.search_text)
+        else:
+            self.timezone_matches = None
+
+        self._update_timezone_rows()
+
+        # Preselect the best match
+        if self.timezone_matches:
+            self._select_first_timezone_row()
+
+    def on_sort_changed(self, combo):
+        """Reorder the timezone list by the chosen sort key."""
+        self.sort_key = combo.get_active_id()
+        self._sort_timezone_rows()
+        self._scroll_to_selected_timezone_row()
+
+    def on_group_toggled(self, button):
+        """Show or hide the offset header rows."""
+        self.group_by_offset = button.get_active()
+        self._sync_group_headers()
+        self._update_timezone_rows()
+        self._scroll_to_selected_timezone_row()
+
+    def _sync_group_headers(self):
+        """Add or remove header rows so each offset group shown has exactly one."""
+        wanted = set(self._group_sizes) if self.group_by_offset else set()
+        present = set()
+        stale = []
+        for row in self.timezone_store:
+            if row[TZ_COL_RECORD] == TZ_HEADER_ROW:
+                if row[TZ_COL_GROUP] in wanted:
+                    present.add(row[TZ_COL_GROUP])
+                else:
+                    stale.append(row.iter)
+
+        # List store iterators stay valid while other rows are removed
+        for tree_iter in stale:
+            self.timezone_store.remove(tree_iter)
+        for group in wanted - present:
+            self.timezone_store.append((TZ_HEADER_ROW, group))
+
+    def _update_timezone_rows(self):
+        """Apply the current search result, grouping and order to the rows."""
+        if self.timezone_matches is None:
+            self._visible_groups = None
+        else:
+            records = (self.timezone_records.get(timezone) for timezone in self.timezone_matches)
+            self._visible_groups = {self._group_of(record) for record in records if record is not None}
+
+        self.timezone_filter.refilter()
+        self._sort_timezone_rows()
+
+    def _sort_timezone_rows(self):
+        """Reorder the model rows by group, relevance, then the chosen sort key."""
+        scores = self.timezone_matches or {}
+        records = self.timezone_records
+        ranks = records.ranks(self.sort_key)
+        rows = [(row[TZ_COL_RECORD], row[TZ_COL_GROUP]) for row in self.timezone_store]
+
+        def row_key(i):
+            position, group = rows[i]
+            if position == TZ_HEADER_ROW:
+                # Headers come first in their group
+                return (group, 0, 0, 0)
+            record = records[position]
+            group = self._group_of(record) if self.group_by_offset else 0
+            return (group, 1, -scores.get(record.timezone, 0), ranks[position])
+
+        order = sorted(range(len(rows)), key=row_key)
+
+        # A single reorder moves the rows without rebuilding them
+        if order != list(range(len(rows))):
+            self.timezone_store.reorder(order)
+
+    def _select_first_timezone_row(self):
+        """Select and reveal the first visible zone row of the timezone list."""
+        tree_iter = self.timezone_filter.get_iter_first()
+        while tree_iter is not None and self._get_row_record(self.timezone_filter, tree_iter) is None:
+            tree_iter = self.timezone_filter.iter_next(tree_iter)
+
+        if tree_iter is not None:
+            self.timezone_list.get_selection().select_iter(tree_iter)
+            self.timezone_list.scroll_to_cell(self.timezone_filter.get_path(tree_iter), None, False, 0, 0)
+
+    def _scroll_to_selected_timezone_row(self):
+        """Keep the selected zone in view after the rows moved."""
+        model, tree_iter = self.timezone_list.get_selection().get_selected()
+        if tree_iter is not None:
+            self.timezone_list.scroll_to_cell(model.get_path(tree_iter), None, True, 0.5, 0)
+
+    def _is_timezone_row_visible(self, model, tree_iter, data=None):
+        """Check if a row is part of the current search result."""
+        if self.timezone_matches is None:
+            return True
 
-            # Check if the search text is in any of the fields
-            visible = (
-                self.search_text in city or
-                self.search_text in country or
-                self.search_text in timezone
-            )
+        record = self._get_row_record(model, tree_iter)
+        if record is None:
+            return model.get_value(tree_iter, TZ_COL_GROUP) in self._visible_groups
+        return record.timezone in self.timezone_matches
 
-            row.set_visible(visible)  # GTK3
+    def _is_timezone_row_selectable(self, selection, model, path, path_currently_selected, data=None):
+        """Header rows cannot be selected."""
+        return self._get_row_record(model, model.get_iter(path)) is not None
 
-    def on_timezone_selected(self, list_box, row):
+    def on_timezone_selected(self, selection):
         """Handle timezone selection from the list"""
-        if row:
-            timezone = row.timezone
-            city = row.city
-            country = row.country
-            utc_offset = row.utc_offset
-
-            self.selected_timezone = timezone
-            self.selection_label.set_markup(
-                f"<b>{_('Selected:')}</b> {timezone} ({utc_offset})"
-            )
+        model, tree_iter = selection.get_selected()
+        record = None if tree_iter is None else self._get_row_record(model, tree_iter)
+        if record is not None:
+            self.selected_timezone = record.timezone
+            self._render_selection_label(record)
+            # The chosen date and time are read in the selected zone
+            self._schedule_preview_update()
             self.status_label.set_markup(
-                f"<i>{_('Status:')}</i> {_('Selected')} {city}, {country}"
+                f"<i>{_('Status:')}</i> {_('Selected')} "
+                f"{GLib.markup_escape_text(record.city)}, {GLib.markup_escape_text(record.country)}"
             )
         else:
             self.selected_timezone = None
@@ -506,100 +1147,185 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
                 f"<b>{_('Selected:')}</b> {_('None')}"
             )
 
+    def _render_selection_label(self, record):
+        """Show the selected zone, its offset and its next offset change."""
+        self.selection_label.set_markup(
+            f"<b>{_('Selected:')}</b> {record.timezone} ({record.utc_offset})\n"
+            f"<small>{GLib.markup_escape_text(self.describe_next_offset_change(record.timezone))}</small>"
+        )
+
     def update_current_timezone_label(self):
-        """Update the label showing current timezone."""
-        try:
-            result = subprocess.run(
-                ["timedatectl", "status"],
-                capture_output=True, text=True, check=True
-            )
-            tz_line = None
-            timezone = None
-
-            for line in result.stdout.splitlines():
-                if "Time zone:" in line:
-                    tz_line = line.strip()
-                    # Extract timezone
-                    match = re.search(r'Time zone: ([^\s]+)', tz_line)
-                    if match:
-                        timezone = match.group(1)
-                    break
-
-            if tz_line:
-                # Get UTC offset
-                utc_offset = ""
-                if timezone:
-                    utc_offset = self.get_timezone_utc_offset(timezone)
-
-                # Enhanced display with local time and UTC offset
-                now = datetime.datetime.now()
-                local_time = now.strftime("%H:%M:%S")
-                self.current_tz_label.set_markup(
-                    f"<b>{_('Current:')}</b> {timezone} {utc_offset} ({_('Local time:')} {local_time})"
-                )
-            else:
-                self.current_tz_label.set_markup(f"<b>{_('Current:')}</b> {_('Unknown')}")
-        except Exception:
+        """Update the label showing current timezone, from the last settings read."""
+        snapshot = self.time_state.peek()
+        if snapshot is None:
+            self.current_tz_description = None
+            self.current_tz_label.set_markup(f"<b>{_('Current:')}</b> <i>{_('Loading...')}</i>")
+            return
+
+        timezone = snapshot.timezone
+        if timezone:
+            # Get UTC offset
+            utc_offset = self.get_timezone_utc_offset(timezone)
+
+            self.current_tz_description = f"{timezone} {utc_offset}"
+            self._render_current_timezone_label()
+        else:
+            self.current_tz_description = None
+            self.current_tz_label.set_markup(f"<b>{_('Current:')}</b> {_('Unknown')}")
+
+    def _render_current_timezone_label(self):
+        """Redraw the current timezone label with the local time."""
+        if self.current_tz_description is None:
+            return
+
+        # Enhanced display with local time and UTC offset
+        now = datetime.datetime.now()
+        local_time = now.strftime("%H:%M:%S")
+        self.current_tz_label.set_markup(
+            f"<b>{_('Current:')}</b> {self.current_tz_description} ({_('Local time:')} {local_time})"
+        )
+
+    def refresh_time_state(self):
+        """Re-read the system time settings once and update the widgets showing them."""
+        self.time_state.invalidate()
+        self.workers.submit(
+            self.time_state.get, 0,
+            key=TIME_STATE_QUERY, timeout=STATE_QUERY_TIMEOUT_SECONDS,
+            callback=self._on_time_state_refreshed
+        )
+
+    def _on_time_state_refreshed(self, snapshot, error):
+        """Update every widget that shows the system time settings."""
+        if error is not None:
+            print(f"Warning: Cannot read the time settings: {error}")
+            self.current_tz_description = None
             self.current_tz_label.set_markup(f"<b>{_('Current:')}</b> {_('Error getting timezone')}")
+        else:
+            self.update_current_timezone_label()
 
-    def is_ntp_enabled(self):
-        """Check if automatic synchronization service is active."""
+        # An unbuilt System tab reads the settings when it is first shown
+        if snapshot is not None and self.is_tab_built(TAB_SYSTEM):
+            self.system_tab_seeded = True
+            self.ntp_toggle_lock = True
+            try:
+                self.ntp_checkbox.set_active(snapshot.ntp)
+            finally:
+                self.ntp_toggle_lock = False
+
+            self._seed_hw_clock_radios(snapshot.local_rtc)
+        return False
+
+    def _seed_hw_clock_radios(self, local_rtc):
+        """Show the system hardware clock mode, unless the user picked one not applied yet."""
+        if self.hw_clock_modified:
+            return
+
+        self.hw_clock_seeding = True
         try:
-            result = subprocess.run(
-                ["timedatectl", "show", "--property=NTP"],
-                capture_output=True, text=True, check=True
-            )
-            return "NTP=yes" in result.stdout
-        except subprocess.CalledProcessError:
-            return False
+            self.hw_utc_radio.set_active(not local_rtc)
+            self.hw_local_radio.set_active(local_rtc)
+        finally:
+            self.hw_clock_seeding = False
+
+    def on_hw_clock_toggled(self, button):
+        """Remember that the hardware clock mode shown is the user's choice."""
+        if not self.hw_clock_seeding:
+            self.hw_clock_modified = True
+
+    def get_ntp_active(self, current):
+        """
+        NTP as shown on the System tab, or as in current.
+
+        The checkbox is only trusted once it showed the system's settings;
+        a change to it is applied right away, so current follows it.
+
+        Args:
+            current: Fresh TimedateProperties snapshot, None if it could not be read
+
+        Returns:
+            bool: The NTP state, None if it is unknown
+        """
+        if self.is_tab_built(TAB_SYSTEM) and self.system_tab_seeded:
+            return self.ntp_checkbox.get_active()
+        return None if current is None else current.ntp
+
+    def get_hw_clock_utc(self, current):
+        """
+        Hardware clock mode as shown on the System tab, or as in current.
+
+        The radios are trusted once they showed the system's settings or
+        the user picked a mode; see get_ntp_active.
+        """
+        if self.is_tab_built(TAB_SYSTEM) and (self.system_tab_seeded or self.hw_clock_modified):
+            return self.hw_utc_radio.get_active()
+        return None if current is None else not current.local_rtc
+
+    def get_ntp_servers(self):
+        """NTP servers listed on the System tab, or the default ones."""
+        from datetime_core import sntp
+        if self.is_tab_built(TAB_SYSTEM):
+            return sntp.parse_server_list(self.ntp_server_entry.get_text())
+        return sntp.parse_server_list(DEFAULT_NTP_SERVER)
+
+    def is_ntp_enabled(self):
+        """Check if automatic synchronization service is active, as last read."""
+        snapshot = self.time_state.peek()
+        return snapshot.ntp if snapshot is not None else False
 
     def is_hw_clock_utc(self):
-        """Check if hardware clock uses UTC."""
-        try:
-            result = subprocess.run(
-                ["timedatectl", "show", "--property=LocalRTC"],
-                capture_output=True, text=True, check=True
-            )
-            # LocalRTC=yes means hardware clock uses local time, not UTC
-            return "LocalRTC=no" in result.stdout
-        except subprocess.CalledProcessError:
-            return True  # Default to UTC
+        """Check if hardware clock uses UTC, as last read."""
+        snapshot = self.time_state.peek()
+        # LocalRTC means hardware clock uses local time, not UTC
+        return not snapshot.local_rtc if snapshot is not None else True  # Default to UTC
 
     def on_ntp_toggled(self, button):
         """Enable or disable automatic synchronization"""
         if self.ntp_toggle_lock:  # Avoid loop
             return
 
-        self.ntp_toggle_lock = True
-
         new_state = "true" if button.get_active() else "false"
         if new_state == "true":
             msg = _("Network time synchronization enabled.")
         else:
             msg = _("Network time synchronization disabled.")
 
-        try:
-            # Execute command with administrative privileges
-            self.run_privileged_commands([
-                ["timedatectl", "set-ntp", new_state]
-            ])
+        # Execute command with administrative privileges, without blocking the UI
+        button.set_sensitive(False)
+        self.privileged.run_async(
+            [["timedatectl", "set-ntp", new_state]],
+            lambda error: self._on_ntp_toggle_finished(error, button, msg)
+        )
+
+    def _on_ntp_toggle_finished(self, error, button, msg):
+        """Report the NTP change, restoring the checkbox if it failed."""
+        button.set_sensitive(True)
+
+        if error is None:
             self.status_label.set_markup("<i>" + _("Status:") + "</i> " + msg)
-        except Exception as e:
-            GLib.idle_add(
-                self.show_message_dialog,
-                Gtk.MessageType.ERROR,
-                str(e)
-            )
+            self.refresh_time_state()
+            return
+
+        self.show_message_dialog(Gtk.MessageType.ERROR, str(error))
+
+        self.ntp_toggle_lock = True
+        try:
             button.set_active(not button.get_active())
         finally:
             self.ntp_toggle_lock = False
 
     def set_initial_time(self):
-        """Set initial time based on the system's current time."""
+        """Show the system's current date and time, dropping a time picked by the user."""
         now = datetime.datetime.now()
-        self.hour_spinner.set_value(now.hour)
-        self.minute_spinner.set_value(now.minute)
-        self.second_spinner.set_value(now.second)
+        self.time_seeding = True
+        try:
+            self.calendar.select_month(now.month - 1, now.year)
+            self.calendar.select_day(now.day)
+            self.hour_spinner.set_value(now.hour)
+            self.minute_spinner.set_value(now.minute)
+            self.second_spinner.set_value(now.second)
+        finally:
+            self.time_seeding = False
+        self.time_modified = False
 
     def on_apply_clicked(self, button):
         """Confirmation before applying settings."""
@@ -614,36 +1340,61 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
             # Check if we have a selected timezone
             if not self.selected_timezone:
                 # Select current tab to guide user
-                self.notebook.set_current_page(1)  # Timezone tab
+                self.notebook.set_current_page(TAB_TIMEZONE)
                 raise ValueError(_("No timezone selected. Please select a timezone from the list."))
 
             timezone = self.selected_timezone
 
-            # Get UTC offset for display
-            utc_offset = self.get_timezone_utc_offset(timezone)
-
-            # Check hardware clock setting
-            use_utc = self.hw_utc_radio.get_active()
-
             date_str = f"{year}-{month:02}-{day:02}"
             time_str = f"{hour:02}:{minute:02}:{second:02}"
-            date_str_inverted = f"{day:02}/{month:02}/{year}"
+
+            # Only the settings that differ from the system are changed,
+            # compared against a fresh read of them
+            button.set_sensitive(False)
+            self.workers.submit(
+                self.time_state.get, 0,
+                key=TIME_STATE_QUERY, timeout=STATE_QUERY_TIMEOUT_SECONDS,
+                callback=lambda current, error: self._confirm_changes(
+                    current, error, button, timezone, date_str, time_str
+                )
+            )
+
+        except Exception as e:
+            self.show_message_dialog(Gtk.MessageType.ERROR, str(e))
+
+    def _confirm_changes(self, current, error, button, timezone, date_str, time_str):
+        """Ask to apply the settings that differ from the current ones, if any."""
+        button.set_sensitive(True)
+        if error is not None:
+            print(f"Warning: Cannot read the current settings: {error}")
+            current = None
+
+        try:
+            # Settings the System tab does not show reliably are kept as they are
+            use_utc = self.get_hw_clock_utc(current)
+            ntp_active = self.get_ntp_active(current)
+            if use_utc is None or ntp_active is None:
+                raise RuntimeError(_("Cannot read the current time settings. Nothing was changed."))
+
+            # The time shown is only set if the user picked it
+            changes = privileged.plan_timezone_changes(
+                current, timezone, date_str, time_str, use_utc,
+                set_time=self.time_modified and not ntp_active
+            )
+            if not changes:
+                self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Nothing to apply."))
+                self.show_message_dialog(
+                    Gtk.MessageType.INFO,
+                    _("The system already uses these settings. Nothing was changed.")
+                )
+                return
 
             # Confirmation message
             confirm_msg = _(
-                "The following settings will be applied:\n\n"
-                "Date: {}\n"
-                "Time: {}\n"
-                "Timezone: {} ({})\n"
-                "Hardware clock: {}\n\n"
+                "The following changes will be applied:\n\n"
+                "{}\n\n"
                 "Do you want to continue?"
-            ).format(
-                date_str_inverted,
-                time_str,
-                timezone,
-                utc_offset,
-                _("UTC") if use_utc else _("Local time")
-            )
+            ).format("\n".join(self.describe_change(change) for change in changes))
 
             # Create dialog - Adaptado para GTK3
             dialog = Gtk.MessageDialog(
@@ -655,194 +1406,328 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
             )
 
             # Connect signal to capture user response
-            dialog.connect(
-                "response", self.on_confirm_response,
-                date_str, time_str, timezone, use_utc
-            )
+            dialog.connect("response", self.on_confirm_response, changes)
             dialog.show_all()  # GTK3
 
         except Exception as e:
             self.show_message_dialog(Gtk.MessageType.ERROR, str(e))
 
-    def _apply_timezone_to_session(self, timezone):
-        """Apply timezone to current session and update environment."""
-        # Apply TZ to current session
-        os.environ['TZ'] = timezone
-        time.tzset()
-
-        # Update session environment using dbus for all applications
-        try:
-            self.run_command([
-                "dbus-send", "--session", "--dest=org.freedesktop.DBus",
-                "--type=method_call", "--print-reply", "/org/freedesktop/DBus",
-                "org.freedesktop.DBus.UpdateActivationEnvironment",
-                f"array:string:TZ={timezone}"
-            ])
-        except Exception as e:
-            print(f"Warning: Failed to update session environment: {e}")
-
-        # Export TZ to XDG runtime dir to ensure new applications have the setting
-        runtime_dir = os.environ.get('XDG_RUNTIME_DIR', f"/run/user/{os.getuid()}")
-        if os.path.exists(runtime_dir):
-            os.makedirs(f"{runtime_dir}/environment.d", exist_ok=True)
-            try:
-                with open(f"{runtime_dir}/environment.d/50-timezone.conf", "w") as f:
-                    f.write(f"TZ={timezone}\n")
-            except Exception as e:
-                print(f"Warning: Failed to write timezone to runtime directory: {e}")
-
-    def _prepare_timezone_commands(self, timezone, date_str, time_str, use_utc):
-        """Prepare commands for system timezone changes."""
-        commands = []
-
-        # Add command to set hardware clock mode
-        local_rtc = "false" if use_utc else "true"
-        commands.append(["timedatectl", "set-local-rtc", local_rtc])
+    def describe_change(self, change):
+        """Return the line describing a privileged.Change to the user."""
+        if change.setting == "set-timezone":
+            new = f"{change.desired} ({self.get_timezone_utc_offset(change.desired)})"
+            if change.current:
+                return _("Timezone: {} → {}").format(change.current, new)
+            return _("Timezone: {}").format(new)
 
-        # Add command to set timezone
-        commands.append(["timedatectl", "set-timezone", timezone])
+        if change.setting == "set-local-rtc":
+            return _("Hardware clock: {}").format(_("Local time") if change.desired else _("UTC"))
 
-        # Add command to set date/time if NTP is disabled
-        if not self.ntp_checkbox.get_active():
-            commands.append(["timedatectl", "set-time", f"{date_str} {time_str}"])
+        if change.setting == "set-time":
+            chosen = datetime.datetime.strptime(change.desired, "%Y-%m-%d %H:%M:%S")
+            return _("Date and time: {}").format(chosen.strftime("%d/%m/%Y %H:%M:%S"))
 
-        return commands
+        return " ".join(change.command)
 
-    def on_confirm_response(
-        self, dialog, response,
-        date_str, time_str, timezone, use_utc
-    ):
+    def on_confirm_response(self, dialog, response, changes):
         """Apply settings if user confirms in the dialog."""
         dialog.destroy()
 
         if response == Gtk.ResponseType.YES:
-            try:
-                # Show progress dialog
-                progress_dialog = Gtk.MessageDialog(
-                    parent=self,
-                    flags=Gtk.DialogFlags.MODAL,
-                    type=Gtk.MessageType.INFO,
-                    buttons=Gtk.ButtonsType.NONE,
-                    message_format=_("Applying settings...")
+            steps = self._create_apply_steps(changes)
+            pipeline = apply_pipeline.ApplyPipeline(steps)
+            progress_dialog = ApplyProgressDialog(self, pipeline)
+
+            pipeline.on_progress = progress_dialog.update_step
+            pipeline.on_finished = (
+                lambda error, cancelled: self._on_apply_finished(
+                    error, cancelled, progress_dialog, pipeline, changes
                 )
-                progress_dialog.show_all()
+            )
 
-                # Process all events to show dialog
-                while Gtk.events_pending():
-                    Gtk.main_iteration()
+            progress_dialog.show_all()
+            pipeline.start()
 
-                # Prepare and execute privileged commands
-                commands = self._prepare_timezone_commands(timezone, date_str, time_str, use_utc)
-                self.run_privileged_commands(commands)
+    def _create_apply_steps(self, changes):
+        """Create one pipeline step per change, plus the session for a new timezone."""
+        step_names = {
+            "set-local-rtc": _("Hardware clock"),
+            "set-timezone": _("Timezone"),
+            "set-time": _("Time"),
+        }
 
-                # Apply timezone to session environment
-                self._apply_timezone_to_session(timezone)
+        # A set-time is local time of the planned zone, which an earlier step
+        # may only just have set; the batch falls back to one pkexec script
+        batch = privileged.PrivilegedBatch(self.privileged, changes)
+        steps = [
+            apply_pipeline.ApplyStep(
+                step_names.get(change.setting, " ".join(change.command)),
+                lambda done, index=index: batch.run(index, done)
+            )
+            for index, change in enumerate(changes)
+        ]
+
+        for change in changes:
+            if change.setting == "set-timezone":
+                steps.append(apply_pipeline.ApplyStep(
+                    _("Session environment"),
+                    lambda done, timezone=change.desired: self._apply_session_timezone(
+                        timezone, done
+                    )
+                ))
+        return steps
+
+    def _apply_session_timezone(self, timezone, done):
+        """Export the timezone on a worker, then switch this process on the main loop."""
+        def on_exported(error):
+            privileged.set_process_timezone(timezone)
+            done(error)
+
+        self.privileged.run_in_thread(
+            lambda: privileged.apply_timezone_to_session(timezone), on_exported
+        )
 
-                # Close progress dialog
-                progress_dialog.destroy()
+    def _on_apply_finished(self, error, cancelled, progress_dialog, pipeline, changes):
+        """Report the outcome once the apply pipeline stopped, with what was changed."""
+        progress_dialog.set_finished()
+        if error is None and not cancelled and self.is_tab_built(TAB_SYSTEM):
+            # The chosen mode is the system's now, follow it again
+            self.hw_clock_modified = False
+        if error is None and not cancelled:
+            # The time picked was applied, later applies leave the clock alone
+            self.time_modified = False
+        self.refresh_time_state()
+
+        # Steps are in the order of the changes, the session step comes last
+        applied = [
+            self.describe_change(change)
+            for change, step in zip(changes, pipeline.steps)
+            if step.state == apply_pipeline.STEP_DONE
+        ]
+        applied_text = "\n".join(applied) if applied else _("Nothing was changed.")
+
+        if error is not None:
+            self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Applying settings failed."))
+            self.show_message_dialog(
+                Gtk.MessageType.ERROR,
+                f"{error}\n\n{_('Applied before the failure:')}\n{applied_text}"
+            )
+            return
 
-                self.update_current_timezone_label()
-                self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Settings applied successfully!"))
+        if cancelled:
+            self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Applying settings was cancelled."))
+            return
 
-                # Show success message with important information
-                self.show_message_dialog(
-                    Gtk.MessageType.INFO,
-                    _("Settings have been applied successfully!\n\n"
-                    "The new timezone is now active for system services and new applications. "
-                    "Some running applications may need to be restarted to use the new timezone settings.")
-                )
-            except Exception as e:
-                self.show_message_dialog(Gtk.MessageType.ERROR, str(e))
+        # Close progress dialog
+        progress_dialog.destroy()
+
+        self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Settings applied successfully!"))
+
+        # Show success message with important information
+        message = _("Settings have been applied successfully!") + "\n\n" + applied_text
+        if any(change.setting == "set-timezone" for change in changes):
+            message += "\n\n" + _(
+                "The new timezone is now active for system services and new applications. "
+                "Some running applications may need to be restarted to use the new timezone settings."
+            )
+        self.show_message_dialog(Gtk.MessageType.INFO, message)
 
     def on_cancel_clicked(self, button):
         """Close the application without making any changes."""
         Gtk.main_quit()  # GTK3
 
-    def _get_ntp_sync_command(self):
+    def on_sync_clicked(self, button):
+        """Synchronize time with NTP servers and display a message."""
+        button.set_sensitive(False)  # Disable button during synchronization
+        self.status_label.set_markup(
+            "<i>" + _("Status:") + "</i> " + _("Please wait, synchronizing...")
+        )
+
+        # No timeout, the administrator password may take a while to be typed
+        self.workers.submit(
+            self._run_ntp_sync, self.get_ntp_servers(),
+            callback=lambda results, error: self._on_sync_finished(results, error, button)
+        )
+
+    def _run_ntp_sync(self, servers):
         """
-        Determine the appropriate NTP synchronization command for the system.
+        Synchronize the clock, then measure the remaining offset.
 
         Returns:
-            list: Command to execute for NTP synchronization
+            list: SNTP results of the servers; a failed sync raises instead
         """
-        # Try to detect which time synchronization system is available
-        try:
-            # Check for systemd-timesyncd
-            result = subprocess.run(
-                ["systemctl", "status", "systemd-timesyncd"],
-                capture_output=True, text=True
-            )
-            if "active" in result.stdout:
-                return ["systemctl", "restart", "systemd-timesyncd"]
-        except Exception:
-            pass
+        # Get appropriate NTP sync command for this system
+        sync_command = privileged.get_ntp_sync_command()
+
+        # Use privileged commands function to execute NTP sync
+        privileged.run_privileged_commands([sync_command])
+
+        # Measure the remaining offset against the configured servers
+        from datetime_core import sntp
+        results = sntp.probe_servers(servers) if servers else []
+        return results
+
+    def _on_sync_finished(self, results, error, button):
+        """Show the synchronized time and settings after a sync."""
+        button.set_sensitive(True)
+        if error is not None:
+            self.show_message_dialog(Gtk.MessageType.ERROR, str(error))
+            self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Synchronization failed."))
+            return
 
-        try:
-            # Check for chronyd
-            result = subprocess.run(
-                ["systemctl", "status", "chronyd"],
-                capture_output=True, text=True
+        message = _("Synchronization completed successfully!")
+        if results and results[0].error is None:
+            best = results[0]
+            message += " " + _("Offset: {} ms ({})").format(
+                f"{best.offset * 1000:+.1f}", GLib.markup_escape_text(best.server)
             )
-            if "active" in result.stdout:
-                return ["chronyc", "makestep"]
-        except Exception:
-            pass
+        self.status_label.set_markup("<i>" + _("Status:") + "</i> " + message)
+        self._show_ntp_probe_results(results)
 
-        # Default to ntpd if available
-        return ["ntpd", "-gq"]
+        self.set_initial_time()
+        self.refresh_time_state()
 
-    def on_sync_clicked(self, button):
-        """Synchronize time with NTP servers and display a message."""
-        button.set_sensitive(False)  # Disable button during synchronization
-        self.status_label.set_markup(
-            "<i>" + _("Status:") + "</i> " + _("Please wait, synchronizing...")
+    def on_monitor_toggled(self, button):
+        """Start or stop sampling the clock offset."""
+        if button.get_active():
+            self._start_clock_monitor()
+        else:
+            self._stop_clock_monitor()
+
+    def on_monitor_source_changed(self, combo):
+        """Restart monitoring with a fresh buffer for the new source."""
+        if self.monitor_checkbox.get_active():
+            self._stop_clock_monitor()
+            self._start_clock_monitor()
+
+    def _start_clock_monitor(self):
+        """Create the sample buffer and schedule sampling."""
+        from datetime_core import clock_monitor, sntp
+        self.clock_monitor = clock_monitor.ClockMonitor(
+            source=self.monitor_source_combo.get_active_id(),
+            servers=sntp.parse_server_list(self.ntp_server_entry.get_text())
+        )
+        # A probe of the replaced monitor only writes to that monitor's buffer
+        self._monitor_probe = None
+        self.monitor_sparkline_label.set_text("")
+        self.monitor_stats_label.set_markup("<i>" + _("Sampling...") + "</i>")
+
+        self._on_monitor_tick()
+        self._monitor_source_id = GLib.timeout_add_seconds(
+            MONITOR_INTERVAL_SECONDS, self._on_monitor_tick
         )
 
-        def sync_thread():
-            try:
-                # Get appropriate NTP sync command for this system
-                sync_command = self._get_ntp_sync_command()
-
-                # Use privileged commands function to execute NTP sync
-                self.run_privileged_commands([sync_command])
+    def _stop_clock_monitor(self):
+        if self._monitor_source_id:
+            GLib.source_remove(self._monitor_source_id)
+            self._monitor_source_id = 0
+
+    def _on_monitor_tick(self):
+        """Take one offset sample, on the worker pool for SNTP."""
+        from datetime_core import clock_monitor
+        monitor = self.clock_monitor
+        if monitor.source == clock_monitor.ClockMonitor.SOURCE_KERNEL:
+            self._record_monitor_sample(monitor, self._take_monitor_sample(monitor))
+            return True
 
-                GLib.idle_add(
-                    lambda: self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Synchronization completed successfully!"))
-                )
-                GLib.idle_add(self.set_initial_time)
-                GLib.idle_add(self.update_current_timezone_label)
-            except Exception as e:
-                GLib.idle_add(
-                    self.show_message_dialog,
-                    Gtk.MessageType.ERROR,
-                    str(e)
+        # Skip ticks while the previous probe is still running, even after
+        # its result timed out, so two probes never fill the buffer at once
+        if self._monitor_probe is None or self._monitor_probe.is_set():
+            probe_done = threading.Event()
+            self._monitor_probe = probe_done
+            self.workers.submit(
+                self._take_monitor_sample, monitor, probe_done, timeout=MONITOR_INTERVAL_SECONDS,
+                callback=lambda message, error: self._record_monitor_sample(
+                    monitor, message if error is None else str(error)
                 )
-                GLib.idle_add(
-                    lambda: self.status_label.set_markup("<i>" + _("Status:") + "</i> " + _("Synchronization failed."))
+            )
+        return True
+
+    def _take_monitor_sample(self, monitor, done=None):
+        """Sample the offset, returning the error message if it failed; then set done."""
+        try:
+            monitor.sample()
+        except OSError as e:
+            return str(e)
+        finally:
+            if done is not None:
+                done.set()
+        return None
+
+    def _record_monitor_sample(self, monitor, error):
+        """Redraw the sparkline and statistics after a sample."""
+        from datetime_core import clock_monitor
+        if monitor is not self.clock_monitor:
+            return False
+
+        samples = monitor.samples
+        if error is not None:
+            self.monitor_stats_label.set_markup(
+                "<i>" + _("Sampling failed:") + "</i> " + GLib.markup_escape_text(error)
+            )
+        if not len(samples):
+            return False
+
+        self.monitor_sparkline_label.set_text(
+            clock_monitor.sparkline(samples.values(), MONITOR_SPARKLINE_WIDTH)
+        )
+        if error is None:
+            jitter = samples.jitter
+            self.monitor_stats_label.set_markup(
+                _("Offset {} ms, min {} ms, max {} ms, mean {} ms, jitter {} ms").format(
+                    f"{samples.last * 1000:+.3f}",
+                    f"{samples.minimum * 1000:+.3f}",
+                    f"{samples.maximum * 1000:+.3f}",
+                    f"{samples.mean * 1000:+.3f}",
+                    f"{jitter * 1000:.3f}" if jitter is not None else "-",
                 )
-            finally:
-                GLib.idle_add(lambda: button.set_sensitive(True))
+            )
+        return False
+
+    def on_test_servers_clicked(self, button):
+        """Query the listed NTP servers in parallel and show them ranked."""
+        from datetime_core import sntp
+        servers = sntp.parse_server_list(self.ntp_server_entry.get_text())
+        if not servers:
+            return
 
-        threading.Thread(target=sync_thread, daemon=True).start()
+        button.set_sensitive(False)
+        self.ntp_results_label.set_markup("<i>" + _("Querying servers...") + "</i>")
 
-    def run_command(self, command):
-        """Run a command in the shell with better error handling"""
-        try:
-            # Use check=True to raise an exception in case of error
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True
+        # A probe of the same servers already running is joined
+        self.workers.submit(
+            sntp.probe_servers, servers,
+            key=("ntp-probe", tuple(servers)), timeout=NTP_PROBE_TIMEOUT_SECONDS,
+            callback=lambda results, error: self._on_ntp_probe_finished(results, error, button)
+        )
+
+    def _on_ntp_probe_finished(self, results, error, button):
+        button.set_sensitive(True)
+        if error is not None:
+            self.ntp_results_label.set_markup(
+                "<i>" + _("Querying servers failed:") + "</i> " + GLib.markup_escape_text(str(error))
             )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr.strip() if e.stderr else str(e)
-            # Check if it's an authorization error
-            if "polkit" in error_msg.lower() or "authentication" in error_msg.lower():
-                raise RuntimeError(_("Permission denied. Please provide administrator password when prompted."))
+            return
+        self._show_ntp_probe_results(results)
+
+    def _show_ntp_probe_results(self, results):
+        """Show SNTP probe results, best candidate first."""
+        if not self.is_tab_built(TAB_SYSTEM):
+            return
+
+        lines = []
+        for result in results:
+            server = GLib.markup_escape_text(result.server)
+            if result.error is not None:
+                lines.append(f"{server}: <i>{GLib.markup_escape_text(result.error)}</i>")
             else:
-                raise RuntimeError(f"{_('Command failed')}: {error_msg}")
+                lines.append(_("{}: offset {} ms, delay {} ms, stratum {}").format(
+                    f"<b>{server}</b>" if not lines else server,
+                    f"{result.offset * 1000:+.1f}",
+                    f"{result.delay * 1000:.1f}",
+                    result.stratum
+                ))
+        self.ntp_results_label.set_markup("\n".join(lines))
 
     def show_message_dialog(self, message_type, message):
         """Display a dialog with a message."""
@@ -857,165 +1742,39 @@ class DateTimeApp(Gtk.Window):  # Alterado para Gtk.Window
         dialog.connect("response", lambda d, r: d.destroy())  # GTK3
         dialog.show_all()  # GTK3
 
-    def create_temp_script(self, commands):
-        """
-        Creates a temporary Python script that executes the provided commands with privileges.
 
-        Args:
-            commands: List of lists, where each inner list is a command to be executed
-
-        Returns:
-            str: Path to the created temporary script
-        """
-        # Create a temporary file with correct permissions
-        fd, script_path = tempfile.mkstemp(suffix='.py', prefix='datetime_')
-
-        try:
-            with os.fdopen(fd, 'w') as f:
-                # Write shebang and imports
-                f.write("#!/usr/bin/env python3\n")
-                f.write("import os, sys, subprocess\n\n")
-
-                # Check for root privileges
-                f.write("if os.geteuid() != 0:\n")
-                f.write("    print('This script must be run as root', file=sys.stderr)\n")
-                f.write("    sys.exit(1)\n\n")
-
-                # Command execution function
-                f.write("def run_command(cmd):\n")
-                f.write("    try:\n")
-                f.write("        subprocess.run(cmd, check=True)\n")
-                f.write("        print(f'Successfully executed: {\" \".join(cmd)}')\n")
-                f.write("        return True\n")
-                f.write("    except subprocess.CalledProcessError as e:\n")
-                f.write("        print(f'Error executing {\" \".join(cmd)}: {e}', file=sys.stderr)\n")
-                f.write("        return False\n\n")
-
-                # Setup success tracking
-                f.write("success = True\n\n")
-
-                # Add each command
-                for cmd in commands:
-                    cmd_str = str(cmd).replace("'", "\"")
-                    f.write(f"success = run_command({cmd_str}) and success\n")
-
-                # Exit with appropriate status
-                f.write("\nsys.exit(0 if success else 1)\n")
-
-            # Make the script executable
-            os.chmod(script_path, 0o755)
-            return script_path
-
-        except Exception as e:
-            # Clean up in case of error
-            try:
-                os.unlink(script_path)
-            except Exception:
-                pass
-            raise RuntimeError(f"Failed to create temporary script: {e}")
-
-    def _create_temp_script_inline(self, commands):
-        """Fallback method to create script without external template."""
-        fd, script_path = tempfile.mkstemp(suffix='.py', prefix='datetime_')
-
-        with os.fdopen(fd, 'w') as f:
-            f.write("#!/usr/bin/env python3\n")
-            f.write("import os\n")
-            f.write("import sys\n")
-            f.write("import subprocess\n\n")
-
-            # Check if running as root
-            f.write("if os.geteuid() != 0:\n")
-            f.write("    print('This script must be run as root', file=sys.stderr)\n")
-            f.write("    sys.exit(1)\n\n")
-
-            # Function to execute commands with error checking
-            f.write("def run_command(cmd):\n")
-            f.write("    try:\n")
-            f.write("        subprocess.run(cmd, check=True)\n")
-            f.write("        print(f'Successfully executed: {\" \".join(cmd)}')\n")
-            f.write("        return True\n")
-            f.write("    except subprocess.CalledProcessError as e:\n")
-            f.write("        print(f'Error executing {\" \".join(cmd)}: {e}', file=sys.stderr)\n")
-            f.write("        return False\n\n")
-
-            # Add all commands to the script
-            f.write("# Execute all privileged commands\n")
-            f.write("success = True\n")
-
-            for cmd in commands:
-                cmd_str = str(cmd).replace("'", "\"")
-                f.write(f"success = run_command({cmd_str}) and success\n")
-
-            f.write("\nsys.exit(0 if success else 1)\n")
-
-        # Make the script executable
-        os.chmod(script_path, 0o755)
-        return script_path
-
-    def run_privileged_commands(self, commands):
-        """
-        Execute multiple commands with administrator privileges using a single authentication.
-
-        This function creates a temporary script containing all the specified commands,
-        then executes it with administrative privileges using pkexec. This approach
-        ensures the user is only prompted for a password once, regardless of how many
-        privileged operations need to be performed.
-
-        Args:
-            commands: List of lists, where each inner list is a command to be executed
-                    Example: [["timedatectl", "set-timezone", "America/Sao_Paulo"],
-                            ["timedatectl", "set-time", "2023-01-01 12:00:00"]]
-
-        Returns:
-            bool: True if all commands were executed successfully
-
-        Raises:
-            RuntimeError: If authentication fails or command execution fails
-        """
-        script_path = None
-
-        try:
-            # Create temporary script
-            script_path = self.create_temp_script(commands)
-
-            # Execute the script with pkexec (single authentication)
-            result = subprocess.run(
-                ["pkexec", script_path],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            # Check if there were any errors in the output
-            if "Error executing" in result.stdout:
-                self.status_label.set_markup(
-                    "<i>" + _("Status:") + "</i> " +
-                    _("Some commands failed. Check system logs for details.")
-                )
-
-            return True
-
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr.strip() if e.stderr else str(e)
-
-            if "polkit" in error_msg.lower() or "authentication" in error_msg.lower():
-                raise RuntimeError(_("Permission denied. Please provide administrator password when prompted."))
-            else:
-                raise RuntimeError(f"{_('Command failed')}: {error_msg}")
-
-        finally:
-            # Remove the temporary script regardless of the outcome
-            if script_path and os.path.exists(script_path):
-                try:
-                    os.unlink(script_path)
-                except OSError as e:
-                    print(f"Warning: Failed to remove temporary script: {e}")
+def _on_first_draw(window, cr):
+    """Record the first paint of the window and report startup times."""
+    window.disconnect_by_func(_on_first_draw)
+    startup.timer.mark("first-paint")
+    startup.timer.report()
+    return False
 
 
 # Adaptado para GTK3 - modelo de aplicativo mais simples
-if __name__ == "__main__":
+def main():
+    # --trace or --trace-file PATH records every external command, spelled
+    # as in datetime_core.cli; see datetime_core.commands
+    args = sys.argv[1:]
+    for index, arg in enumerate(args):
+        if arg == "--trace":
+            commands.enable_tracing()
+        elif arg == "--trace-file" and index + 1 < len(args):
+            commands.enable_tracing(args[index + 1])
+        elif arg.startswith("--trace-file="):
+            commands.enable_tracing(arg.partition("=")[2])
+
+    setup_gtk()
+    startup.timer.mark("gtk-setup")
+
     win = DateTimeApp()
+    startup.timer.mark("window")
+
     win.connect("destroy", Gtk.main_quit)
+    win.connect_after("draw", _on_first_draw)
     win.show_all()
     Gtk.main()
+
+
+if __name__ == "__main__":
+    main()
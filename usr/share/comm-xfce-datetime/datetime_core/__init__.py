@@ -0,0 +1 @@
+"""GUI-free core of the XFCE DateTime Tool."""
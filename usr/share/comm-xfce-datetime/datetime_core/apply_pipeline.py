@@ -0,0 +1,134 @@
+"""
+Staged, asynchronous execution of the steps that apply settings.
+
+Each step starts its work and reports back through a completion callback,
+so no step blocks the main loop. Steps run one after another; progress and
+elapsed time are reported for each of them, and steps that have not started
+yet can be cancelled.
+"""
+
+# Standard library imports
+import time
+
+# Step states
+STEP_PENDING = "pending"
+STEP_RUNNING = "running"
+STEP_DONE = "done"
+STEP_FAILED = "failed"
+STEP_CANCELLED = "cancelled"
+
+
+class ApplyStep:
+    """One stage of the apply pipeline."""
+
+    def __init__(self, name, action):
+        """
+        Args:
+            name: Label shown to the user for this step
+            action: Callable started as action(done); it must call done(error)
+                    exactly once, with error None on success
+        """
+        self.name = name
+        self.action = action
+        self.state = STEP_PENDING
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        """Seconds spent in this step so far, or None if it never started."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class ApplyPipeline:
+    """Runs ApplyStep items in order and reports their progress."""
+
+    def __init__(self, steps, on_progress=None, on_finished=None):
+        """
+        Args:
+            steps: List of ApplyStep items
+            on_progress: Called as on_progress(step) whenever a step changes state
+            on_finished: Called as on_finished(error, cancelled) once the
+                         pipeline stops; error is the first failure, if any
+        """
+        self.steps = list(steps)
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.cancelled = False
+        self.finished = False
+        self._index = 0
+
+    @property
+    def current_step(self):
+        """Return the step being run, or None."""
+        if self._index < len(self.steps) and self.steps[self._index].state == STEP_RUNNING:
+            return self.steps[self._index]
+        return None
+
+    def start(self):
+        """Start running the steps."""
+        self._run_next()
+
+    def cancel(self):
+        """Cancel the steps that have not started yet."""
+        if self.finished:
+            return
+
+        self.cancelled = True
+        if self.current_step is None:
+            self._finish(None)
+
+    def _run_next(self):
+        """Start the next step, or finish if none is left."""
+        if self.cancelled or self._index >= len(self.steps):
+            self._finish(None)
+            return
+
+        step = self.steps[self._index]
+        step.state = STEP_RUNNING
+        step.started_at = time.monotonic()
+        self._report(step)
+
+        try:
+            step.action(lambda error, step=step: self._on_step_done(step, error))
+        except Exception as e:
+            self._on_step_done(step, e)
+
+    def _on_step_done(self, step, error):
+        """Record the outcome of a step and move on."""
+        if step.state != STEP_RUNNING:
+            return
+
+        step.finished_at = time.monotonic()
+        step.error = error
+        step.state = STEP_FAILED if error is not None else STEP_DONE
+        self._report(step)
+
+        if error is not None:
+            self._finish(error)
+            return
+
+        self._index += 1
+        self._run_next()
+
+    def _finish(self, error):
+        """Mark the remaining steps as cancelled and report the outcome."""
+        if self.finished:
+            return
+        self.finished = True
+
+        for step in self.steps:
+            if step.state == STEP_PENDING:
+                step.state = STEP_CANCELLED
+                self._report(step)
+
+        if self.on_finished is not None:
+            self.on_finished(error, self.cancelled)
+
+    def _report(self, step):
+        if self.on_progress is not None:
+            self.on_progress(step)
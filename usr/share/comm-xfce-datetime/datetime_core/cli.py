@@ -0,0 +1,284 @@
+"""
+Headless command line interface.
+
+Exposes the timezone catalog, search and the time settings as subcommands
+that print JSON, for scripting changes across many machines. Nothing here
+imports gi, so the interface starts quickly and works without a display.
+
+Usage:
+    comm-xfce-datetime --cli list
+    comm-xfce-datetime --cli search "sao paulo"
+    comm-xfce-datetime --cli status
+    comm-xfce-datetime --cli set-timezone America/Sao_Paulo
+    comm-xfce-datetime --cli set-time "2024-01-31 12:00:00"
+    comm-xfce-datetime --cli set-ntp true
+    comm-xfce-datetime --cli set-local-rtc false
+    comm-xfce-datetime --cli --trace status
+    comm-xfce-datetime --cli --trace-file /tmp/trace.jsonl status
+
+--cli may be left out when a subcommand is given, also after the tracing
+options: `comm-xfce-datetime --trace status` runs headless as well.
+"""
+
+# Standard library imports
+import argparse
+import datetime
+import json
+import subprocess
+import sys
+
+# Local imports
+from datetime_core import startup  # First, so the startup timer covers every layer
+from datetime_core import (
+    commands, timedate, tz_catalog, tz_engine, tz_offsets, tz_periods, tz_records, tz_search
+)
+
+startup.timer.mark("core")
+
+BOOLEAN_CHOICES = ("true", "false", "yes", "no", "on", "off", "1", "0")
+
+
+class CliError(Exception):
+    """Raised for errors reported to the caller as JSON."""
+
+
+def _load_entries():
+    """Load the timezone catalog, sharing the cache with the GUI."""
+    return tz_catalog.TimezoneCatalog().load()
+
+
+def _load_periods(entries):
+    """Load this year's offsets of the catalog zones, cached next to the catalog."""
+    return tz_periods.PeriodCache().load([entry.timezone for entry in entries])
+
+
+def _offset_seconds(periods, timezone, now):
+    try:
+        return periods.get(timezone, now)[0]
+    except tz_engine.TimezoneEngineError:
+        return None
+
+
+def _describe_zone(entry, periods, now):
+    """Return the JSON description of a catalog entry."""
+    try:
+        offset_seconds, abbreviation = periods.get(entry.timezone, now)
+        utc_offset = tz_engine.format_offset(offset_seconds)
+    except tz_engine.TimezoneEngineError:
+        utc_offset = abbreviation = None
+
+    return {
+        "timezone": entry.timezone,
+        "city": entry.city,
+        "country": entry.country,
+        "region_path": entry.region_path,
+        "country_codes": list(entry.country_codes),
+        "latitude": entry.latitude,
+        "longitude": entry.longitude,
+        "utc_offset": utc_offset,
+        "abbreviation": abbreviation,
+    }
+
+
+def _to_bool_arg(value):
+    """Normalize a boolean argument to what timedatectl expects."""
+    return "true" if value.lower() in ("true", "yes", "on", "1") else "false"
+
+
+def _run_timedatectl(*args):
+    """Run a timedatectl setter; polkit prompts on the terminal if needed."""
+    command = ["timedatectl", *args]
+    try:
+        commands.run(command, capture_output=True, text=True, check=True)
+    except FileNotFoundError as e:
+        raise CliError(f"timedatectl not found: {e}")
+    except subprocess.CalledProcessError as e:
+        raise CliError((e.stderr or "").strip() or str(e))
+    return {"applied": command}
+
+
+def cmd_list(args):
+    entries = _load_entries()
+    periods = _load_periods(entries)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if args.sort != tz_records.SORT_REGION:
+        store = tz_records.RecordStore()
+        for entry in entries:
+            store.append(entry, offset_seconds=_offset_seconds(periods, entry.timezone, now))
+        ranks = store.ranks(args.sort)
+        entries = sorted(entries, key=lambda entry: ranks[store.index_of(entry.timezone)])
+    return [_describe_zone(entry, periods, now) for entry in entries]
+
+
+def cmd_search(args):
+    entries = _load_entries()
+    periods = _load_periods(entries)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    by_zone = {entry.timezone: entry for entry in entries}
+    scores = tz_search.SearchIndex(entries, now, periods.get).rank(args.query) or {}
+
+    ranked = sorted(scores, key=lambda timezone: (-scores[timezone], timezone))
+    results = []
+    for timezone in ranked[:args.limit]:
+        description = _describe_zone(by_zone[timezone], periods, now)
+        description["score"] = scores[timezone]
+        results.append(description)
+    return results
+
+
+def cmd_status(args):
+    client = timedate.TimedateClient([timedate.TimedatectlClient()])
+    try:
+        properties = client.get_properties()
+    except timedate.TimedateError as e:
+        raise CliError(str(e))
+
+    status = properties._asdict()
+    status["local_time"] = datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+    if properties.timezone:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        info = tz_offsets.resolve(properties.timezone, now)
+        if info.offset_seconds is not None:
+            status["utc_offset"] = info.utc_offset
+            status["abbreviation"] = info.abbreviation
+            status["next_offset_change"] = None
+            if info.next_utc_offset is not None:
+                status["next_offset_change"] = {
+                    "at": info.valid_until.isoformat(),
+                    "utc_offset": info.next_utc_offset,
+                    "abbreviation": info.next_abbreviation,
+                }
+    return status
+
+
+def _current_properties():
+    """Return the current settings, or None if they cannot be read."""
+    try:
+        return timedate.TimedateClient([timedate.TimedatectlClient()]).get_properties()
+    except timedate.TimedateError:
+        return None
+
+
+def _apply_changes(requested, **desired):
+    """
+    Run the commands of the desired settings that differ from the system.
+
+    Args:
+        requested: timedatectl arguments reported when nothing differs
+        desired: Keyword arguments of privileged.plan_timezone_changes,
+                 the settings left out are not changed
+    """
+    # Imported here, only the setters need it and listing must start fast
+    from datetime_core import privileged
+
+    desired = {
+        "timezone": None, "date_str": None, "time_str": None,
+        "use_utc": None, "set_time": False, **desired
+    }
+    changes = privileged.plan_timezone_changes(_current_properties(), **desired)
+    if not changes:
+        return {"applied": None, "unchanged": ["timedatectl", *requested]}
+
+    applied = [_run_timedatectl(*change.command[1:])["applied"] for change in changes]
+    return {"applied": applied[0] if len(applied) == 1 else applied}
+
+
+def cmd_set_timezone(args):
+    try:
+        tz_engine.get_zone(args.timezone)
+    except tz_engine.TimezoneEngineError as e:
+        raise CliError(str(e))
+    return _apply_changes(["set-timezone", args.timezone], timezone=args.timezone)
+
+
+def cmd_set_time(args):
+    try:
+        datetime.datetime.strptime(args.time, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise CliError("Time must be given as \"YYYY-MM-DD HH:MM:SS\"")
+    date_str, time_str = args.time.split(" ")
+    return _apply_changes(
+        ["set-time", args.time], date_str=date_str, time_str=time_str, set_time=True
+    )
+
+
+def cmd_set_ntp(args):
+    value = _to_bool_arg(args.enabled)
+    return _apply_changes(["set-ntp", value], ntp=value == "true")
+
+
+def cmd_set_local_rtc(args):
+    value = _to_bool_arg(args.enabled)
+    return _apply_changes(["set-local-rtc", value], use_utc=value != "true")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="comm-xfce-datetime --cli",
+        description="Manage system date, time and timezone without a GUI."
+    )
+    parser.add_argument(
+        "--trace", action="store_true",
+        help="append a JSON-lines record of every external command to the default trace file"
+    )
+    parser.add_argument(
+        "--trace-file", metavar="PATH",
+        help="like --trace, to PATH instead of the default trace file"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_zones = subparsers.add_parser("list", help="list the available timezones")
+    list_zones.add_argument(
+        "--sort", choices=tz_records.SORT_KEYS, default=tz_records.SORT_REGION,
+        help="order of the zones, by zone name (region) by default"
+    )
+    list_zones.set_defaults(func=cmd_list)
+
+    search = subparsers.add_parser("search", help="search timezones, best match first")
+    search.add_argument("query", help="city, country, zone, abbreviation or offset")
+    search.add_argument("--limit", type=int, default=20, help="maximum number of results")
+    search.set_defaults(func=cmd_search)
+
+    subparsers.add_parser("status", help="show the current settings").set_defaults(func=cmd_status)
+
+    set_timezone = subparsers.add_parser("set-timezone", help="set the system timezone")
+    set_timezone.add_argument("timezone")
+    set_timezone.set_defaults(func=cmd_set_timezone)
+
+    set_time = subparsers.add_parser("set-time", help="set the system time")
+    set_time.add_argument("time", help="\"YYYY-MM-DD HH:MM:SS\"")
+    set_time.set_defaults(func=cmd_set_time)
+
+    set_ntp = subparsers.add_parser("set-ntp", help="enable or disable network time sync")
+    set_ntp.add_argument("enabled", choices=BOOLEAN_CHOICES)
+    set_ntp.set_defaults(func=cmd_set_ntp)
+
+    set_local_rtc = subparsers.add_parser("set-local-rtc", help="keep the hardware clock in local time")
+    set_local_rtc.add_argument("enabled", choices=BOOLEAN_CHOICES)
+    set_local_rtc.set_defaults(func=cmd_set_local_rtc)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace or args.trace_file:
+        commands.enable_tracing(args.trace_file)
+
+    try:
+        result = args.func(args)
+        exit_code = 0
+    except CliError as e:
+        result = {"error": str(e)}
+        exit_code = 1
+
+    # Encoded in one piece, json.dump would issue a write per token
+    sys.stdout.write(json.dumps(result, ensure_ascii=False, indent=2) + "\n")
+
+    startup.timer.mark("command")
+    startup.timer.report()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
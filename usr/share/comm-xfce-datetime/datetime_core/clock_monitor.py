@@ -0,0 +1,212 @@
+"""
+Clock offset monitoring.
+
+Offset samples come either from the kernel clock discipline (adjtimex) or
+from an SNTP probe, and are kept in a fixed-size ring buffer backed by an
+array, with running statistics. Memory use does not grow with time.
+"""
+
+# Standard library imports
+import array
+import ctypes
+import ctypes.util
+import math
+
+# Local imports
+from datetime_core import sntp
+
+DEFAULT_CAPACITY = 120
+SPARKLINE_BLOCKS = "▁▂▃▄▅▆▇█"
+
+# adjtimex status flag: offset is in nanoseconds instead of microseconds
+STA_NANO = 0x2000
+# adjtimex return value when the clock is not synchronized
+TIME_ERROR = 5
+
+
+class RingBuffer:
+    """Fixed-size buffer of float samples with running statistics."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._data = array.array("d", bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+        self._sum = 0.0
+        # Sum of squared differences between consecutive samples
+        self._sum_diff_squares = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    def __len__(self):
+        return self._count
+
+    def _at(self, index):
+        return self._data[(self._start + index) % self.capacity]
+
+    def append(self, value):
+        """Add a sample, evicting the oldest one when the buffer is full."""
+        if self._count == self.capacity:
+            evicted = self._at(0)
+            following = self._at(1) if self.capacity > 1 else None
+
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+            self._sum -= evicted
+            if following is not None:
+                self._sum_diff_squares -= (following - evicted) ** 2
+
+            # Only rescan when the evicted sample held an extreme
+            if evicted <= self._min or evicted >= self._max:
+                self._rescan_extremes()
+
+        if self._count:
+            self._sum_diff_squares += (value - self._at(self._count - 1)) ** 2
+
+        self._data[(self._start + self._count) % self.capacity] = value
+        self._count += 1
+        self._sum += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+
+    def _rescan_extremes(self):
+        values = self.values()
+        self._min = min(values, default=math.inf)
+        self._max = max(values, default=-math.inf)
+
+    def values(self):
+        """Return the samples, oldest first."""
+        return [self._at(index) for index in range(self._count)]
+
+    @property
+    def last(self):
+        return self._at(self._count - 1) if self._count else None
+
+    @property
+    def minimum(self):
+        return self._min if self._count else None
+
+    @property
+    def maximum(self):
+        return self._max if self._count else None
+
+    @property
+    def mean(self):
+        return self._sum / self._count if self._count else None
+
+    @property
+    def jitter(self):
+        """RMS of the differences between consecutive samples."""
+        if self._count < 2:
+            return None
+        return math.sqrt(max(self._sum_diff_squares, 0.0) / (self._count - 1))
+
+
+def sparkline(values, width=None):
+    """Render values as a line of Unicode block characters."""
+    if width is not None:
+        values = values[-width:]
+    if not values:
+        return ""
+
+    low, high = min(values), max(values)
+    span = high - low
+    last_block = len(SPARKLINE_BLOCKS) - 1
+    if span == 0:
+        return SPARKLINE_BLOCKS[last_block // 2] * len(values)
+    return "".join(
+        SPARKLINE_BLOCKS[round((value - low) / span * last_block)] for value in values
+    )
+
+
+class _Timex(ctypes.Structure):
+    """struct timex from <sys/timex.h>."""
+
+    _fields_ = [
+        ("modes", ctypes.c_uint),
+        ("offset", ctypes.c_long),
+        ("freq", ctypes.c_long),
+        ("maxerror", ctypes.c_long),
+        ("esterror", ctypes.c_long),
+        ("status", ctypes.c_int),
+        ("constant", ctypes.c_long),
+        ("precision", ctypes.c_long),
+        ("tolerance", ctypes.c_long),
+        ("time_sec", ctypes.c_long),
+        ("time_usec", ctypes.c_long),
+        ("tick", ctypes.c_long),
+        ("ppsfreq", ctypes.c_long),
+        ("jitter", ctypes.c_long),
+        ("shift", ctypes.c_int),
+        ("stabil", ctypes.c_long),
+        ("jitcnt", ctypes.c_long),
+        ("calcnt", ctypes.c_long),
+        ("errcnt", ctypes.c_long),
+        ("stbcnt", ctypes.c_long),
+        ("tai", ctypes.c_int),
+        ("reserved", ctypes.c_int * 11),
+    ]
+
+
+_libc = None
+
+
+def read_kernel_offset():
+    """
+    Return the offset the kernel clock discipline is correcting, in seconds.
+
+    Only reads the state (modes = 0), so no privileges are required.
+
+    Raises:
+        OSError: If adjtimex is unavailable or the clock is unsynchronized
+    """
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+    timex = _Timex()
+    state = _libc.adjtimex(ctypes.byref(timex))
+    if state < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, "adjtimex failed")
+    if state == TIME_ERROR:
+        raise OSError("clock is not synchronized")
+
+    scale = 1e-9 if timex.status & STA_NANO else 1e-6
+    return timex.offset * scale
+
+
+class ClockMonitor:
+    """Collects clock offset samples from one source into a RingBuffer."""
+
+    SOURCE_KERNEL = "kernel"
+    SOURCE_SNTP = "sntp"
+
+    def __init__(self, source=SOURCE_KERNEL, servers=None, capacity=DEFAULT_CAPACITY):
+        self.source = source
+        self.servers = servers or []
+        self.samples = RingBuffer(capacity)
+
+    def sample(self):
+        """
+        Take one sample and store it.
+
+        SNTP sampling blocks for up to the probe timeout and should be run
+        off the main thread.
+
+        Returns:
+            float: The offset in seconds
+
+        Raises:
+            OSError: If no offset could be measured
+        """
+        if self.source == self.SOURCE_SNTP:
+            results = sntp.probe_servers(self.servers)
+            if not results or results[0].error is not None:
+                raise OSError(results[0].error if results else "no NTP server configured")
+            offset = results[0].offset
+        else:
+            offset = read_kernel_offset()
+
+        self.samples.append(offset)
+        return offset
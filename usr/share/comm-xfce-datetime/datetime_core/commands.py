@@ -0,0 +1,125 @@
+"""
+Instrumented execution of external commands.
+
+Every external command of the application goes through run(), a drop-in
+for subprocess.run. When tracing is enabled, each call is appended to a
+JSON-lines file with its argv, start time, wall time, exit status and
+caller. D-Bus method calls are recorded in the same file through record().
+
+Tracing is enabled with COMM_XFCE_DATETIME_TRACE=<path> (or =1 for the
+default path in the cache directory), or on the command line of both the
+GUI and the CLI with --trace, or --trace-file PATH for another file.
+"""
+
+# Standard library imports
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+TRACE_ENV = "COMM_XFCE_DATETIME_TRACE"
+DEFAULT_TRACE_FILE = "trace.jsonl"
+
+_lock = threading.Lock()
+_trace_path = None
+
+
+def default_trace_path():
+    """Return the trace file used when no path is given."""
+    # Imported here to keep this module free of other local dependencies
+    from datetime_core.tz_catalog import get_cache_dir
+    return os.path.join(get_cache_dir(), DEFAULT_TRACE_FILE)
+
+
+def enable_tracing(path=None):
+    """Start appending a record of every command to the trace file at path."""
+    global _trace_path
+    path = path or default_trace_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _trace_path = path
+
+
+def enable_tracing_from_env():
+    """Enable tracing if the environment asks for it."""
+    value = os.environ.get(TRACE_ENV, "")
+    if value.lower() in ("", "0", "no", "false"):
+        return
+    enable_tracing(None if value.lower() in ("1", "yes", "true") else value)
+
+
+def _caller(depth):
+    """Describe the code depth frames above the caller, as module:function:line."""
+    try:
+        frame = sys._getframe(depth + 1)
+    except ValueError:
+        return None
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def record(argv, started_at, wall_seconds, exit_status=None, error=None, caller=None):
+    """
+    Append one record to the trace, if tracing is enabled.
+
+    Args:
+        argv: Command line, or a description of the call for D-Bus calls
+        started_at: Unix time at which the call started
+        wall_seconds: Duration of the call
+        exit_status: Exit status of the command, None if it did not run
+        error: Why the call failed, if it did
+        caller: Code that made the call, defaults to the caller of record()
+    """
+    if _trace_path is None:
+        return
+
+    entry = {
+        "argv": [str(arg) for arg in argv],
+        "start": round(started_at, 6),
+        "wall_ms": round(wall_seconds * 1000, 3),
+        "exit_status": exit_status,
+        "error": error,
+        "caller": caller or _caller(1),
+        "thread": threading.current_thread().name,
+    }
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+    with _lock:
+        try:
+            with open(_trace_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Warning: Failed to write command trace: {e}")
+
+
+def run(argv, **kwargs):
+    """
+    Run a command like subprocess.run and trace it.
+
+    Accepts and raises exactly what subprocess.run does.
+    """
+    if _trace_path is None:
+        return subprocess.run(argv, **kwargs)
+
+    started_at = time.time()
+    started = time.perf_counter()
+    exit_status = error = None
+    try:
+        result = subprocess.run(argv, **kwargs)
+        exit_status = result.returncode
+        return result
+    except subprocess.CalledProcessError as e:
+        exit_status = e.returncode
+        error = (e.stderr or "").strip() if isinstance(e.stderr, str) else None
+        raise
+    except (OSError, subprocess.SubprocessError) as e:
+        error = str(e)
+        raise
+    finally:
+        record(argv, started_at, time.perf_counter() - started,
+               exit_status, error or None, _caller(1))
+
+
+enable_tracing_from_env()
@@ -0,0 +1,26 @@
+"""
+Translation support shared by the GUI and the command line interface.
+
+The message catalog is only opened on the first translated string.
+"""
+
+# Standard library imports
+import gettext
+
+TEXT_DOMAIN = "comm-xfce-datetime"
+LOCALE_DIR = "/usr/share/locale"
+
+_translations = None
+
+
+def get_translations():
+    """Return the (lazily loaded) translations of the application."""
+    global _translations
+    if _translations is None:
+        _translations = gettext.translation(TEXT_DOMAIN, localedir=LOCALE_DIR, fallback=True)
+    return _translations
+
+
+def _(message):
+    """Translate a message."""
+    return get_translations().gettext(message)
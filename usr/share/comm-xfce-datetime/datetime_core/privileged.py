@@ -0,0 +1,442 @@
+"""
+Privileged command execution.
+
+timedatectl commands are sent to timedated over D-Bus with interactive
+polkit authorization. Anything else, or a timedated that cannot be reached,
+goes through a temporary script run with pkexec so that the user is asked
+for the password only once.
+
+Before anything runs, the desired settings are compared with the current
+ones, and only the commands of the settings that differ are issued.
+"""
+
+# Standard library imports
+import collections
+import datetime
+import os
+import subprocess
+import tempfile
+import time
+
+# Local imports
+from datetime_core import commands, timedate, tz_engine, workers
+from datetime_core.i18n import _
+
+# A requested time this close to the clock is considered already set
+TIME_TOLERANCE_SECONDS = 2
+
+# One setting to change: the timedatectl action, its current value (None if
+# unknown), the requested value and the command that applies it
+# timezone is the zone a set-time value is local time of, None for other settings
+Change = collections.namedtuple(
+    "Change", ["setting", "current", "desired", "command", "timezone"], defaults=(None,)
+)
+
+
+def _command_error(error_msg):
+    """Turn the stderr of a failed command into a RuntimeError."""
+    # Check if it's an authorization error
+    if "polkit" in error_msg.lower() or "authentication" in error_msg.lower():
+        return RuntimeError(_("Permission denied. Please provide administrator password when prompted."))
+    return RuntimeError(f"{_('Command failed')}: {error_msg}")
+
+
+def run_command(command):
+    """Run a command with better error handling"""
+    try:
+        # Use check=True to raise an exception in case of error
+        result = commands.run(
+            command,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return result.stdout.strip()
+    except subprocess.CalledProcessError as e:
+        raise _command_error(e.stderr.strip() if e.stderr else str(e))
+
+
+def create_temp_script(command_list):
+    """
+    Creates a temporary Python script that executes the provided commands with privileges.
+
+    Args:
+        command_list: List of lists, where each inner list is a command to be executed
+
+    Returns:
+        str: Path to the created temporary script
+    """
+    # Create a temporary file with correct permissions
+    fd, script_path = tempfile.mkstemp(suffix='.py', prefix='datetime_')
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            # Write shebang and imports
+            f.write("#!/usr/bin/env python3\n")
+            f.write("import os, sys, subprocess\n\n")
+
+            # Check for root privileges
+            f.write("if os.geteuid() != 0:\n")
+            f.write("    print('This script must be run as root', file=sys.stderr)\n")
+            f.write("    sys.exit(1)\n\n")
+
+            # Command execution function
+            f.write("def run_command(cmd):\n")
+            f.write("    try:\n")
+            f.write("        subprocess.run(cmd, check=True)\n")
+            f.write("        print(f'Successfully executed: {\" \".join(cmd)}')\n")
+            f.write("        return True\n")
+            f.write("    except subprocess.CalledProcessError as e:\n")
+            f.write("        print(f'Error executing {\" \".join(cmd)}: {e}', file=sys.stderr)\n")
+            f.write("        return False\n\n")
+
+            # Setup success tracking
+            f.write("success = True\n\n")
+
+            # Add each command
+            for cmd in command_list:
+                cmd_str = str(cmd).replace("'", "\"")
+                f.write(f"success = run_command({cmd_str}) and success\n")
+
+            # Exit with appropriate status
+            f.write("\nsys.exit(0 if success else 1)\n")
+
+        # Make the script executable
+        os.chmod(script_path, 0o755)
+        return script_path
+
+    except Exception as e:
+        # Clean up in case of error
+        try:
+            os.unlink(script_path)
+        except Exception:
+            pass
+        raise RuntimeError(f"Failed to create temporary script: {e}")
+
+
+def run_privileged_commands(command_list):
+    """
+    Execute multiple commands with administrator privileges using a single authentication.
+
+    This function creates a temporary script containing all the specified commands,
+    then executes it with administrative privileges using pkexec. This approach
+    ensures the user is only prompted for a password once, regardless of how many
+    privileged operations need to be performed.
+
+    Args:
+        command_list: List of lists, where each inner list is a command to be executed
+                Example: [["timedatectl", "set-timezone", "America/Sao_Paulo"],
+                        ["timedatectl", "set-time", "2023-01-01 12:00:00"]]
+
+    Raises:
+        RuntimeError: If authentication fails or any command fails; the script
+                      then exits non-zero with the failures on stderr
+    """
+    script_path = None
+
+    try:
+        # Create temporary script
+        script_path = create_temp_script(command_list)
+
+        # Execute the script with pkexec (single authentication)
+        commands.run(
+            ["pkexec", script_path],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+    except subprocess.CalledProcessError as e:
+        raise _command_error(e.stderr.strip() if e.stderr else str(e))
+
+    finally:
+        # Remove the temporary script regardless of the outcome
+        if script_path and os.path.exists(script_path):
+            try:
+                os.unlink(script_path)
+            except OSError as e:
+                print(f"Warning: Failed to remove temporary script: {e}")
+
+
+def get_ntp_sync_command():
+    """
+    Determine the appropriate NTP synchronization command for the system.
+
+    Returns:
+        list: Command to execute for NTP synchronization
+    """
+    # Try to detect which time synchronization system is available
+    try:
+        # Check for systemd-timesyncd
+        result = commands.run(
+            ["systemctl", "status", "systemd-timesyncd"],
+            capture_output=True, text=True
+        )
+        if "active" in result.stdout:
+            return ["systemctl", "restart", "systemd-timesyncd"]
+    except Exception:
+        pass
+
+    try:
+        # Check for chronyd
+        result = commands.run(
+            ["systemctl", "status", "chronyd"],
+            capture_output=True, text=True
+        )
+        if "active" in result.stdout:
+            return ["chronyc", "makestep"]
+    except Exception:
+        pass
+
+    # Default to ntpd if available
+    return ["ntpd", "-gq"]
+
+
+def _time_differs(time_value, timezone, now=None):
+    """Check if a "YYYY-MM-DD HH:MM:SS" time in a zone is away from the clock."""
+    if now is None:
+        now = time.time()
+    if not timezone:
+        return True
+    try:
+        chosen = datetime.datetime.strptime(time_value, "%Y-%m-%d %H:%M:%S")
+        instant = chosen.replace(tzinfo=tz_engine.get_zone(timezone)).timestamp()
+    except (ValueError, tz_engine.TimezoneEngineError):
+        return True
+    return abs(instant - now) > TIME_TOLERANCE_SECONDS
+
+
+def plan_timezone_changes(current, timezone, date_str, time_str, use_utc, set_time, now=None, ntp=None):
+    """
+    List the changes that bring the system from its current to the desired settings.
+
+    Args:
+        current: timedate.TimedateProperties of the system, None if unknown,
+                 in which case every desired setting is set
+        timezone: Desired zone name, None to leave the timezone alone
+        date_str: Desired date as "YYYY-MM-DD", local time of the desired zone
+                  (of the system zone if timezone is None)
+        time_str: Desired time as "HH:MM:SS"
+        use_utc: True to keep the hardware clock in UTC, None to leave it alone
+        set_time: False to leave the time alone, e.g. when NTP is active or
+                  the user did not pick a time
+        now: Unix time the desired time is compared with, defaults to the clock
+        ntp: Desired network time synchronization, None to leave it alone
+
+    Returns:
+        list: Change items, in the order their commands must run
+    """
+    changes = []
+
+    if use_utc is not None:
+        local_rtc = not use_utc
+        current_rtc = None if current is None else current.local_rtc
+        if current_rtc != local_rtc:
+            changes.append(Change(
+                "set-local-rtc", current_rtc, local_rtc,
+                ["timedatectl", "set-local-rtc", "true" if local_rtc else "false"]
+            ))
+
+    current_timezone = None if current is None else current.timezone
+    if timezone is not None and current_timezone != timezone:
+        changes.append(Change(
+            "set-timezone", current_timezone, timezone, ["timedatectl", "set-timezone", timezone]
+        ))
+
+    current_ntp = None if current is None else current.ntp
+    ntp_change = None
+    if ntp is not None and current_ntp != ntp:
+        ntp_change = Change(
+            "set-ntp", current_ntp, ntp, ["timedatectl", "set-ntp", "true" if ntp else "false"]
+        )
+        # timedated refuses to set the time while synchronization is on
+        if not ntp:
+            changes.append(ntp_change)
+
+    # Set after the timezone, so it is read as local time of the new zone
+    time_value = f"{date_str} {time_str}"
+    time_zone = timezone or current_timezone
+    if set_time and _time_differs(time_value, time_zone, now):
+        changes.append(Change(
+            "set-time", None, time_value, ["timedatectl", "set-time", time_value], time_zone
+        ))
+
+    if ntp_change is not None and ntp:
+        changes.append(ntp_change)
+
+    return changes
+
+
+class PrivilegedExecutor:
+    """
+    Runs privileged commands without blocking the caller.
+
+    Commands that cannot go over D-Bus run on a workers.WorkerPool, whose
+    dispatch function delivers their callbacks; a GUI passes a pool that
+    hands them to its main loop.
+    """
+
+    def __init__(self, client=None, state=None, pool=None):
+        self.client = client or timedate.get_client()
+        self.state = state
+        self.pool = pool or workers.WorkerPool()
+
+    def run_async(self, command_list, callback, timezone=None, on_unavailable=None):
+        """
+        Execute privileged commands asynchronously.
+
+        timedatectl commands are sent directly to timedated over D-Bus with
+        interactive polkit authorization. Other commands, or a timedated that
+        cannot be reached, go through run_privileged_commands on a thread.
+
+        Args:
+            command_list: List of lists, as accepted by run_privileged_commands
+            callback: Called as callback(error), where error is None on
+                      success or the exception that occurred
+            timezone: Zone set-time values are local time of, by default the
+                      system zone as last read
+            on_unavailable: Called as on_unavailable(error) instead of falling
+                      back to pkexec when timedated cannot be reached
+        """
+        try:
+            calls = timedate.commands_to_calls(
+                command_list, timezone or self._get_system_timezone()
+            )
+        except Exception as e:
+            print(f"Warning: Cannot translate commands to D-Bus calls: {e}")
+            calls = None
+
+        if calls is None:
+            self.run_in_thread(lambda: run_privileged_commands(command_list), callback)
+            return
+
+        def on_dbus_finished(error):
+            if isinstance(error, timedate.TimedateUnavailableError) and on_unavailable is not None:
+                on_unavailable(error)
+            elif isinstance(error, timedate.TimedateUnavailableError):
+                print(f"Warning: {error}; falling back to pkexec")
+                self.run_in_thread(lambda: run_privileged_commands(command_list), callback)
+            elif isinstance(error, timedate.TimedateAuthError):
+                callback(RuntimeError(_("Permission denied. Please provide administrator password when prompted.")))
+            elif error is not None:
+                callback(RuntimeError(f"{_('Command failed')}: {error}"))
+            else:
+                callback(None)
+
+        self.client.call_async(calls, on_dbus_finished)
+
+    def run_in_thread(self, func, callback):
+        """Run func() on the worker pool and dispatch callback(error) afterwards."""
+        self.pool.submit(func, callback=lambda _result, error: callback(error))
+
+    def _get_system_timezone(self):
+        """Return the timezone configured on the system, or None."""
+        try:
+            if self.state is not None:
+                # Never query here, run_async is called from the main loop
+                snapshot = self.state.peek()
+                if snapshot is None:
+                    return None
+                return snapshot.timezone or None
+            return self.client.get_properties().timezone or None
+        except timedate.TimedateError:
+            return None
+
+
+class PrivilegedBatch:
+    """
+    Planned changes applied one at a time, with a single pkexec fallback.
+
+    Each change goes to timedated over D-Bus on its own, so its progress can
+    be shown as a step. If timedated cannot be reached before any change was
+    applied, all the remaining ones run in one pkexec script, so the password
+    is asked for once; the steps of those changes then finish with the
+    script's outcome.
+    """
+
+    def __init__(self, executor, changes):
+        """
+        Args:
+            executor: PrivilegedExecutor the changes are run through
+            changes: Change items, in the order they are run
+        """
+        self.executor = executor
+        self.changes = list(changes)
+        self.applied = 0
+        self._script_ran = False
+        self._script_error = None
+
+    def run(self, index, callback):
+        """Apply the change at index, then call callback(error) like run_async."""
+        if self._script_ran:
+            # Applied by the fallback script together with an earlier change
+            callback(self._script_error)
+            return
+
+        change = self.changes[index]
+
+        def on_done(error):
+            if error is None:
+                self.applied += 1
+            callback(error)
+
+        def on_unavailable(error):
+            if self.applied:
+                # Running everything again through pkexec would repeat applied changes
+                callback(RuntimeError(f"{_('Command failed')}: {error}"))
+                return
+
+            print(f"Warning: {error}; falling back to pkexec")
+            commands_left = [later.command for later in self.changes[index:]]
+            self.executor.run_in_thread(
+                lambda: run_privileged_commands(commands_left), on_script_done
+            )
+
+        def on_script_done(error):
+            self._script_ran = True
+            self._script_error = error
+            callback(error)
+
+        self.executor.run_async(
+            [change.command], on_done, timezone=change.timezone, on_unavailable=on_unavailable
+        )
+
+
+def set_process_timezone(timezone):
+    """
+    Switch this process to a timezone.
+
+    setenv and tzset are not thread safe, call this from the thread that
+    formats times, i.e. the main loop of a GUI.
+    """
+    os.environ['TZ'] = timezone
+    time.tzset()
+
+
+def apply_timezone_to_session(timezone):
+    """
+    Export a timezone to the session, for the applications started next.
+
+    Blocks on dbus-send, so it may run on a worker thread; the process itself
+    is switched by set_process_timezone.
+    """
+    # Update session environment using dbus for all applications
+    try:
+        run_command([
+            "dbus-send", "--session", "--dest=org.freedesktop.DBus",
+            "--type=method_call", "--print-reply", "/org/freedesktop/DBus",
+            "org.freedesktop.DBus.UpdateActivationEnvironment",
+            f"array:string:TZ={timezone}"
+        ])
+    except Exception as e:
+        print(f"Warning: Failed to update session environment: {e}")
+
+    # Export TZ to XDG runtime dir to ensure new applications have the setting
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR', f"/run/user/{os.getuid()}")
+    if os.path.exists(runtime_dir):
+        os.makedirs(f"{runtime_dir}/environment.d", exist_ok=True)
+        try:
+            with open(f"{runtime_dir}/environment.d/50-timezone.conf", "w") as f:
+                f.write(f"TZ={timezone}\n")
+        except Exception as e:
+            print(f"Warning: Failed to write timezone to runtime directory: {e}")
@@ -0,0 +1,198 @@
+"""
+Minimal asyncio SNTP client (RFC 4330) used to probe NTP servers.
+
+Several servers are queried in parallel, each with its own timeout. For
+every server the clock offset, round-trip delay and stratum are reported,
+and the answers can be ranked to pick the best candidate for a site.
+"""
+
+# Standard library imports
+import asyncio
+import collections
+import struct
+import time
+
+NTP_PORT = 123
+DEFAULT_TIMEOUT = 2.0
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_EPOCH_OFFSET = 2208988800
+NTP_PACKET_FORMAT = "!BBbbII4sQQQQ"
+NTP_PACKET_SIZE = struct.calcsize(NTP_PACKET_FORMAT)
+# LI = 0 (no warning), VN = 4, Mode = 3 (client)
+NTP_CLIENT_HEADER = (0 << 6) | (4 << 3) | 3
+NTP_MODE_SERVER = 4
+
+SntpResult = collections.namedtuple(
+    "SntpResult", ["server", "offset", "delay", "stratum", "error"]
+)
+
+
+class SntpError(Exception):
+    """Raised when a server does not give a usable answer."""
+
+
+def to_ntp_timestamp(seconds):
+    """Convert Unix time in seconds to a 64-bit NTP timestamp."""
+    return int((seconds + NTP_EPOCH_OFFSET) * 2 ** 32)
+
+
+def from_ntp_timestamp(timestamp):
+    """Convert a 64-bit NTP timestamp to Unix time in seconds."""
+    return timestamp / 2 ** 32 - NTP_EPOCH_OFFSET
+
+
+def build_request(transmit_time):
+    """Build a client request carrying transmit_time as its transmit timestamp."""
+    return struct.pack(
+        NTP_PACKET_FORMAT, NTP_CLIENT_HEADER, 0, 0, 0, 0, 0, b"\0" * 4,
+        0, 0, 0, to_ntp_timestamp(transmit_time)
+    )
+
+
+def parse_response(data, request_timestamp, receive_time):
+    """
+    Compute offset and delay from a server response.
+
+    Args:
+        data: Raw response packet
+        request_timestamp: NTP transmit timestamp sent in the request
+        receive_time: Local Unix time at which the response arrived
+
+    Returns:
+        tuple: (offset, delay, stratum), offset and delay in seconds
+
+    Raises:
+        SntpError: If the response is malformed or not usable
+    """
+    if len(data) < NTP_PACKET_SIZE:
+        raise SntpError("short response")
+
+    (header, stratum, _poll, _precision, _root_delay, _root_dispersion, _ref_id,
+     _ref_ts, originate_ts, receive_ts, transmit_ts) = struct.unpack(
+        NTP_PACKET_FORMAT, data[:NTP_PACKET_SIZE]
+    )
+
+    if header & 0x7 != NTP_MODE_SERVER:
+        raise SntpError("not a server response")
+    if originate_ts != request_timestamp:
+        raise SntpError("response does not match the request")
+    if stratum == 0 or stratum > 15:
+        raise SntpError(f"server is unsynchronized (stratum {stratum})")
+    if transmit_ts == 0:
+        raise SntpError("missing transmit timestamp")
+
+    t1 = from_ntp_timestamp(originate_ts)
+    t2 = from_ntp_timestamp(receive_ts)
+    t3 = from_ntp_timestamp(transmit_ts)
+    t4 = receive_time
+
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    delay = (t4 - t1) - (t3 - t2)
+    return offset, delay, stratum
+
+
+def split_server(server, default_port=NTP_PORT):
+    """Split "host", "host:port" or "[ipv6]:port" into (host, port)."""
+    if server.startswith("["):
+        host, _, rest = server[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+        return host, int(port) if port.isdigit() else default_port
+
+    if server.count(":") == 1:
+        host, _, port = server.partition(":")
+        if port.isdigit():
+            return host, int(port)
+
+    return server, default_port
+
+
+class _SntpProtocol(asyncio.DatagramProtocol):
+    """Sends one request and resolves a future with the first answer."""
+
+    def __init__(self, future):
+        self.future = future
+        self.transport = None
+        self.request_timestamp = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        request = build_request(time.time())
+        self.request_timestamp = struct.unpack_from("!Q", request, 40)[0]
+        transport.sendto(request)
+
+    def datagram_received(self, data, addr):
+        receive_time = time.time()
+        if self.future.done():
+            return
+        try:
+            self.future.set_result(parse_response(data, self.request_timestamp, receive_time))
+        except SntpError as e:
+            self.future.set_exception(e)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(SntpError(str(exc)))
+
+
+async def query(server, timeout=DEFAULT_TIMEOUT, port=NTP_PORT):
+    """
+    Query one server and return an SntpResult.
+
+    Errors and timeouts are reported in the result rather than raised.
+    """
+    host, port = split_server(server, port)
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport = None
+
+    try:
+        transport, _protocol = await asyncio.wait_for(
+            loop.create_datagram_endpoint(
+                lambda: _SntpProtocol(future), remote_addr=(host, port)
+            ),
+            timeout
+        )
+        offset, delay, stratum = await asyncio.wait_for(future, timeout)
+        return SntpResult(server, offset, delay, stratum, None)
+    except asyncio.TimeoutError:
+        return SntpResult(server, None, None, None, "timeout")
+    except (OSError, SntpError) as e:
+        return SntpResult(server, None, None, None, str(e) or e.__class__.__name__)
+    finally:
+        if transport is not None:
+            transport.close()
+
+
+async def probe(servers, timeout=DEFAULT_TIMEOUT, port=NTP_PORT):
+    """Query every server in parallel and return the results ranked."""
+    results = await asyncio.gather(
+        *(query(server, timeout, port) for server in servers)
+    )
+    return rank(results)
+
+
+def rank(results):
+    """
+    Order results from best to worst candidate.
+
+    Answering servers come first, by round-trip delay (which bounds the
+    offset error), then stratum; servers that failed are listed last.
+    """
+    return sorted(
+        results,
+        key=lambda result: (
+            result.error is not None,
+            result.delay if result.delay is not None else 0,
+            result.stratum or 0,
+        )
+    )
+
+
+def probe_servers(servers, timeout=DEFAULT_TIMEOUT, port=NTP_PORT):
+    """Blocking wrapper around probe(), for use from worker threads."""
+    return asyncio.run(probe(servers, timeout, port))
+
+
+def parse_server_list(text):
+    """Split a user supplied list of servers separated by commas or spaces."""
+    return [server for server in text.replace(",", " ").split() if server]
@@ -0,0 +1,66 @@
+"""
+Startup time budget.
+
+Startup is split into layers (core imports, GTK import, GTK setup, window
+construction, first paint). Each layer is timed against a budget, and
+setting COMM_XFCE_DATETIME_STARTUP_REPORT=1 prints the layers on stderr
+with the ones that ran over budget flagged.
+"""
+
+# Standard library imports
+import os
+import sys
+import time
+
+REPORT_ENV = "COMM_XFCE_DATETIME_STARTUP_REPORT"
+
+# Budget of each layer in milliseconds
+LAYER_BUDGETS_MS = {
+    "core": 30,
+    "gtk-import": 150,
+    "gtk-setup": 30,
+    "window": 150,
+    "first-paint": 250,
+    "command": 60,
+}
+
+_started_at = time.perf_counter()
+
+
+class StartupTimer:
+    """Records the time taken by each startup layer."""
+
+    def __init__(self, started_at=None, budgets=None):
+        self.budgets = budgets or LAYER_BUDGETS_MS
+        self.layers = []  # (name, milliseconds) in the order they finished
+        self._last_mark = started_at if started_at is not None else _started_at
+
+    def mark(self, layer):
+        """Close the current layer, timed from the previous mark."""
+        now = time.perf_counter()
+        self.layers.append((layer, (now - self._last_mark) * 1000))
+        self._last_mark = now
+
+    @property
+    def total_ms(self):
+        return sum(elapsed for _layer, elapsed in self.layers)
+
+    def report(self, stream=None):
+        """Print every layer when requested through the environment."""
+        if not os.environ.get(REPORT_ENV):
+            return
+
+        stream = stream or sys.stderr
+        for layer, elapsed in self.layers:
+            budget = self.budgets.get(layer)
+            if budget is None:
+                note = ""
+            elif elapsed > budget:
+                note = f" (over budget of {budget} ms)"
+            else:
+                note = f" (budget {budget} ms)"
+            print(f"startup: {layer}: {elapsed:.1f} ms{note}", file=stream)
+        print(f"startup: total: {self.total_ms:.1f} ms", file=stream)
+
+
+timer = StartupTimer()
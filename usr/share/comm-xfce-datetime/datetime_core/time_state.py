@@ -0,0 +1,104 @@
+"""
+Cached snapshot of the system time settings.
+
+All readers share one TimedateProperties snapshot that is reused for a short
+TTL. When it has to be refreshed, concurrent requests are merged into a
+single in-flight query (one D-Bus GetAll or one `timedatectl show`).
+get() blocks while it queries; code on a main loop reads peek() and runs
+get() through a workers.WorkerPool.
+"""
+
+# Standard library imports
+import threading
+import time
+
+# Local imports
+from datetime_core import timedate
+
+# Seconds a snapshot is served before the system is queried again
+DEFAULT_TTL = 2.0
+
+
+class _Query:
+    """A query in flight, shared by every caller waiting for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot = None
+        self.error = None
+
+
+class TimeState:
+    """Serves TimedateProperties snapshots with a TTL and coalesced refreshes."""
+
+    def __init__(self, client=None, ttl=DEFAULT_TTL):
+        self.client = client or timedate.get_client()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fetched_at = 0.0
+        self._query = None
+
+    def get(self, max_age=None):
+        """
+        Return the current TimedateProperties snapshot.
+
+        Args:
+            max_age: Oldest snapshot accepted in seconds, defaults to the TTL
+
+        Raises:
+            timedate.TimedateError: If the settings cannot be read
+            Exception: Any other error raised by the client, e.g. while
+                       parsing its reply
+        """
+        if max_age is None:
+            max_age = self.ttl
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._fetched_at <= max_age:
+                return self._snapshot
+
+            query = self._query
+            owner = query is None
+            if owner:
+                query = self._query = _Query()
+
+        if owner:
+            self._run_query(query)
+        else:
+            query.done.wait()
+
+        if query.error is not None:
+            raise query.error
+        return query.snapshot
+
+    def invalidate(self):
+        """Force the next read to query the system."""
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def peek(self):
+        """
+        Return the last snapshot read, however old, without querying.
+
+        Returns:
+            TimedateProperties: The snapshot, or None if none was read yet
+        """
+        with self._lock:
+            return self._snapshot
+
+    def _run_query(self, query):
+        """Query the system and publish the result to every waiter."""
+        try:
+            query.snapshot = self.client.get_properties()
+        except Exception as e:
+            # Anything the client raises reaches the waiters instead of leaving them blocked
+            query.error = e
+        finally:
+            with self._lock:
+                if query.snapshot is not None:
+                    self._snapshot = query.snapshot
+                    self._fetched_at = time.monotonic()
+                self._query = None
+
+            query.done.set()
@@ -0,0 +1,319 @@
+"""
+Clients for the systemd-timedated service (org.freedesktop.timedate1).
+
+The D-Bus client reads every property in a single GetAll round trip over a
+shared proxy. When the system bus or gi is not available, the same data is
+parsed from `timedatectl show` instead.
+
+Settings can also be applied over the same proxy: `timedatectl` commands are
+translated into SetLocalRTC, SetTimezone, SetTime and SetNTP calls made with
+interactive polkit authorization, without any helper process.
+"""
+
+# Standard library imports
+import collections
+import datetime
+import subprocess
+import time
+
+# Local imports
+from datetime_core import commands
+
+TIMEDATE_BUS_NAME = "org.freedesktop.timedate1"
+TIMEDATE_OBJECT_PATH = "/org/freedesktop/timedate1"
+TIMEDATE_INTERFACE = "org.freedesktop.timedate1"
+DBUS_CALL_TIMEOUT_MS = 5000
+# Setters may wait for the user to answer the polkit dialog
+DBUS_INTERACTIVE_TIMEOUT_MS = 5 * 60 * 1000
+
+# Remote errors meaning polkit refused the call
+DBUS_AUTH_ERRORS = {
+    "org.freedesktop.DBus.Error.AccessDenied",
+    "org.freedesktop.DBus.Error.InteractiveAuthorizationRequired",
+}
+# Remote errors meaning timedated itself is not reachable; any other error,
+# a timeout included, may come after timedated acted on the call
+DBUS_UNAVAILABLE_ERRORS = {
+    "org.freedesktop.DBus.Error.ServiceUnknown",
+    "org.freedesktop.DBus.Error.NameHasNoOwner",
+    "org.freedesktop.DBus.Error.Spawn.ServiceNotFound",
+}
+
+TimedateProperties = collections.namedtuple(
+    "TimedateProperties",
+    ["timezone", "ntp", "local_rtc", "ntp_synchronized", "can_ntp"]
+)
+
+
+class TimedateError(Exception):
+    """Raised when the time settings cannot be read or changed."""
+
+
+class TimedateAuthError(TimedateError):
+    """Raised when the user is not authorized to change the settings."""
+
+
+class TimedateUnavailableError(TimedateError):
+    """Raised when timedated cannot be reached over D-Bus, before any change."""
+
+
+TimedateCall = collections.namedtuple("TimedateCall", ["method", "signature", "args"])
+
+
+def _parse_bool(value):
+    """Parse the yes/no values printed by timedatectl."""
+    return value.strip().lower() in ("yes", "true", "1")
+
+
+def _time_to_usec(time_str, timezone):
+    """Convert "YYYY-MM-DD HH:MM:SS" in a zone to microseconds since the epoch."""
+    local = datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
+    if timezone:
+        from zoneinfo import ZoneInfo
+        local = local.replace(tzinfo=ZoneInfo(timezone))
+    return int(local.timestamp()) * 1000000
+
+
+def commands_to_calls(commands, timezone=None):
+    """
+    Translate timedatectl commands into timedate1 method calls.
+
+    Args:
+        commands: List of argv lists, e.g. [["timedatectl", "set-ntp", "true"]]
+        timezone: Zone set-time values are expressed in, unless the batch
+                  sets a new timezone first (as timedatectl would see it)
+
+    Returns:
+        list: TimedateCall items, or None if any command has no D-Bus equivalent
+    """
+    calls = []
+
+    for command in commands:
+        if len(command) != 3 or command[0] != "timedatectl":
+            return None
+
+        action, value = command[1], command[2]
+        if action == "set-local-rtc":
+            calls.append(TimedateCall("SetLocalRTC", "(bbb)", (_parse_bool(value), False, True)))
+        elif action == "set-timezone":
+            timezone = value
+            calls.append(TimedateCall("SetTimezone", "(sb)", (value, True)))
+        elif action == "set-time":
+            calls.append(TimedateCall("SetTime", "(xbb)", (_time_to_usec(value, timezone), False, True)))
+        elif action == "set-ntp":
+            calls.append(TimedateCall("SetNTP", "(bb)", (_parse_bool(value), True)))
+        else:
+            return None
+
+    return calls
+
+
+def _dbus_error(e, action, applied=False):
+    """
+    Wrap a GLib.Error raised by a D-Bus call into a TimedateError.
+
+    Only an unreachable timedated with nothing applied yet (applied is
+    False) is a TimedateUnavailableError, which callers may retry elsewhere.
+    """
+    from gi.repository import Gio
+
+    remote = Gio.DBusError.get_remote_error(e) if Gio.DBusError.is_remote_error(e) else None
+    # Drop the "GDBus.Error:<name>: " prefix of remote errors;
+    # Gio.DBusError.strip_remote_error only edits the GError in place
+    message = e.message or str(e)
+    if remote is not None and message.startswith("GDBus.Error:"):
+        message = message.partition(": ")[2] or remote
+
+    if remote in DBUS_AUTH_ERRORS:
+        return TimedateAuthError(message)
+    if remote in DBUS_UNAVAILABLE_ERRORS and not applied:
+        return TimedateUnavailableError(f"{action} failed: {message}")
+    return TimedateError(f"{action} failed: {message}")
+
+
+def _record_dbus_call(method, args, started_at, started, error=None):
+    """Add a timedate1 method call to the command trace."""
+    commands.record(
+        ["dbus", TIMEDATE_BUS_NAME, method, *args], started_at,
+        time.perf_counter() - started, None if error else 0,
+        str(error) if error else None, caller=f"{__name__}:{method}"
+    )
+
+
+class DBusTimedateClient:
+    """Reads timedate1 properties through one shared Gio.DBusProxy."""
+
+    def __init__(self):
+        self._proxy = None
+
+    def _get_proxy(self):
+        """Create the proxy on first use."""
+        if self._proxy is None:
+            try:
+                # gi is imported lazily so this module stays usable without it
+                from gi.repository import Gio
+            except ImportError as e:
+                raise TimedateUnavailableError(f"gi is not available: {e}")
+
+            self._proxy = Gio.DBusProxy.new_for_bus_sync(
+                Gio.BusType.SYSTEM,
+                Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES
+                | Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS,
+                None,
+                TIMEDATE_BUS_NAME,
+                TIMEDATE_OBJECT_PATH,
+                TIMEDATE_INTERFACE,
+                None,
+            )
+        return self._proxy
+
+    def get_properties(self):
+        """Return a TimedateProperties snapshot read with one GetAll call."""
+        started_at, started = time.time(), time.perf_counter()
+        try:
+            from gi.repository import GLib
+
+            result = self._get_proxy().call_sync(
+                "org.freedesktop.DBus.Properties.GetAll",
+                GLib.Variant("(s)", (TIMEDATE_INTERFACE,)),
+                0,
+                DBUS_CALL_TIMEOUT_MS,
+                None,
+            )
+        except TimedateError:
+            raise
+        except Exception as e:
+            _record_dbus_call("GetAll", (), started_at, started, e)
+            raise TimedateUnavailableError(f"D-Bus query to {TIMEDATE_BUS_NAME} failed: {e}")
+
+        _record_dbus_call("GetAll", (), started_at, started)
+        values = result.unpack()[0]
+        return TimedateProperties(
+            timezone=values.get("Timezone", ""),
+            ntp=bool(values.get("NTP", False)),
+            local_rtc=bool(values.get("LocalRTC", False)),
+            ntp_synchronized=bool(values.get("NTPSynchronized", False)),
+            can_ntp=bool(values.get("CanNTP", False)),
+        )
+
+    def call_async(self, calls, callback):
+        """
+        Run timedate1 method calls one after another without blocking.
+
+        Each call asks timedated for interactive polkit authorization, so the
+        user is prompted only if no cached authorization applies.
+
+        Args:
+            calls: List of TimedateCall items, see commands_to_calls()
+            callback: Called on the main loop as callback(error) once all calls
+                      completed (error is None) or one failed (a TimedateError,
+                      TimedateUnavailableError only if none was applied)
+        """
+        try:
+            proxy = self._get_proxy()
+        except TimedateError as e:
+            callback(e)
+            return
+        except Exception as e:
+            callback(TimedateUnavailableError(f"D-Bus connection failed: {e}"))
+            return
+
+        self._call_next(proxy, list(calls), callback, 0)
+
+    def _call_next(self, proxy, calls, callback, completed):
+        """Start the first pending call, or report success when none is left."""
+        if not calls:
+            callback(None)
+            return
+
+        from gi.repository import Gio, GLib
+
+        call = calls.pop(0)
+        proxy.call(
+            call.method,
+            GLib.Variant(call.signature, call.args),
+            Gio.DBusCallFlags.ALLOW_INTERACTIVE_AUTHORIZATION,
+            DBUS_INTERACTIVE_TIMEOUT_MS,
+            None,
+            self._on_call_finished,
+            (call, calls, callback, completed, time.time(), time.perf_counter()),
+        )
+
+    def _on_call_finished(self, proxy, result, user_data):
+        """Continue with the next call, or report the failure."""
+        from gi.repository import GLib
+
+        call, calls, callback, completed, started_at, started = user_data
+        try:
+            proxy.call_finish(result)
+        except GLib.Error as e:
+            _record_dbus_call(call.method, call.args, started_at, started, e)
+            callback(_dbus_error(e, call.method, applied=completed > 0))
+            return
+
+        _record_dbus_call(call.method, call.args, started_at, started)
+        self._call_next(proxy, calls, callback, completed + 1)
+
+
+class TimedatectlClient:
+    """Reads the same properties by parsing `timedatectl show`."""
+
+    def get_properties(self):
+        """Return a TimedateProperties snapshot read with one timedatectl call."""
+        try:
+            result = commands.run(
+                ["timedatectl", "show"],
+                capture_output=True, text=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise TimedateError(f"timedatectl failed: {e}")
+
+        values = {}
+        for line in result.stdout.splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                values[key] = value
+
+        return TimedateProperties(
+            timezone=values.get("Timezone", ""),
+            ntp=_parse_bool(values.get("NTP", "no")),
+            local_rtc=_parse_bool(values.get("LocalRTC", "no")),
+            ntp_synchronized=_parse_bool(values.get("NTPSynchronized", "no")),
+            can_ntp=_parse_bool(values.get("CanNTP", "no")),
+        )
+
+
+class TimedateClient:
+    """Reads time settings over D-Bus, falling back to timedatectl."""
+
+    def __init__(self, backends=None):
+        self.backends = backends or [DBusTimedateClient(), TimedatectlClient()]
+
+    def get_properties(self):
+        """Return a TimedateProperties snapshot from the first working backend."""
+        errors = []
+        for backend in self.backends:
+            try:
+                return backend.get_properties()
+            except TimedateError as e:
+                errors.append(str(e))
+        raise TimedateError("; ".join(errors))
+
+    def call_async(self, calls, callback):
+        """Run timedate1 method calls on the first backend that supports it."""
+        for backend in self.backends:
+            if hasattr(backend, "call_async"):
+                backend.call_async(calls, callback)
+                return
+        callback(TimedateUnavailableError("No D-Bus backend available"))
+
+
+_shared_client = None
+
+
+def get_client():
+    """Return the TimedateClient shared by the whole application."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = TimedateClient()
+    return _shared_client
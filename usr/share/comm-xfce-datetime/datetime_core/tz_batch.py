@@ -0,0 +1,342 @@
+"""
+Offsets of every zone at an arbitrary instant, resolved in one pass.
+
+The TZif file of each zone is read once through mmap and its transition
+table kept in memory. The yearly rule in the file's footer, which governs
+instants after the last stored transition, is expanded into transitions
+for RULE_YEARS_AHEAD years. With NumPy the tables of all zones are laid
+end to end in one sorted array, each zone shifted into its own band, so a
+single searchsorted finds the local time type of every zone at once.
+Without NumPy each zone is looked up with bisect.
+
+Zones whose file cannot be parsed, and instants past the expanded rules,
+are resolved through tz_engine instead.
+"""
+
+# Standard library imports
+import bisect
+import calendar
+import datetime
+import mmap
+import os
+import re
+import struct
+
+# Local imports
+from datetime_core import tz_engine
+from datetime_core.tz_catalog import ZONEINFO_DIR
+
+# Years after the current one covered by the expanded footer rules
+RULE_YEARS_AHEAD = 20
+# Instants are clamped to +-2**39 s (about 17000 years) so every zone fits in
+# its own band of ZONE_BAND seconds in the combined NumPy array
+TIME_LIMIT = 2 ** 39
+ZONE_BAND = 2 ** 41
+
+# NumPy module once looked up, False when it is not installed
+_numpy = None
+
+TZIF_HEADER = struct.Struct(">4sc15x6l")
+TTINFO = struct.Struct(">lBB")
+
+# "std offset [dst [offset] [,start[/time],end[/time]]]" of POSIX TZ strings
+ABBREVIATION_RE = r"(<[^>]+>|[A-Za-z]+)"
+OFFSET_RE = r"([+-]?\d{1,3}(?::\d{2}(?::\d{2})?)?)"
+POSIX_TZ_RE = re.compile(
+    rf"^{ABBREVIATION_RE}{OFFSET_RE}(?:{ABBREVIATION_RE}{OFFSET_RE}?"
+    rf"(?:,([^,/]+)(?:/{OFFSET_RE})?,([^,/]+)(?:/{OFFSET_RE})?)?)?$"
+)
+DEFAULT_RULE_TIME = 2 * 3600
+
+
+def _load_numpy():
+    """Return the NumPy module, or None without it, importing it on first use."""
+    global _numpy
+    if _numpy is None:
+        try:
+            # Imported here, NumPy alone takes longer to import than the whole core
+            import numpy
+            _numpy = numpy
+        except ImportError:  # Optional, only speeds up the lookup
+            _numpy = False
+    return _numpy or None
+
+
+class TzifError(Exception):
+    """Raised when a TZif file cannot be parsed."""
+
+
+def _parse_seconds(text):
+    """Convert "[+-]hh[:mm[:ss]]" into seconds."""
+    sign = -1 if text.startswith("-") else 1
+    parts = [int(part) for part in text.lstrip("+-").split(":")]
+    parts += [0] * (3 - len(parts))
+    return sign * (parts[0] * 3600 + parts[1] * 60 + parts[2])
+
+
+def _rule_day(rule, year):
+    """
+    Return the date a POSIX TZ rule ("Mm.w.d", "Jn" or "n") falls on in a year.
+
+    Raises:
+        TzifError: If the rule is malformed
+    """
+    try:
+        if rule.startswith("M"):
+            month, week, weekday = (int(part) for part in rule[1:].split("."))
+            # POSIX weekdays start on Sunday, Python's on Monday
+            first_weekday = (datetime.date(year, month, 1).weekday() + 1) % 7
+            day = 1 + (weekday - first_weekday) % 7 + (week - 1) * 7
+            days_in_month = calendar.monthrange(year, month)[1]
+            while day > days_in_month:
+                day -= 7
+            return datetime.date(year, month, day)
+
+        if rule.startswith("J"):
+            # 1 to 365, February 29 is never counted
+            day = int(rule[1:])
+            if calendar.isleap(year) and day >= 60:
+                day += 1
+            return datetime.date(year, 1, 1) + datetime.timedelta(days=day - 1)
+
+        return datetime.date(year, 1, 1) + datetime.timedelta(days=int(rule))
+    except ValueError as e:
+        raise TzifError(f"Invalid rule {rule!r}: {e}")
+
+
+def parse_posix_tz(text):
+    """
+    Parse the POSIX TZ string found in the footer of a TZif file.
+
+    Returns:
+        tuple: ((std_offset, std_abbreviation), (dst_offset, dst_abbreviation),
+            start_rule, start_time, end_rule, end_time) with UTC offsets in
+            seconds east; the DST part is None if the zone has no DST
+
+    Raises:
+        TzifError: If the string is not understood
+    """
+    match = POSIX_TZ_RE.match(text)
+    if not match:
+        raise TzifError(f"Unsupported TZ string {text!r}")
+
+    std_abbr, std_offset, dst_abbr, dst_offset, start, start_time, end, end_time = match.groups()
+    # POSIX offsets count hours west of Greenwich
+    std = (-_parse_seconds(std_offset), std_abbr.strip("<>"))
+    if not dst_abbr:
+        return std, None, None, None, None, None
+    if not start:
+        raise TzifError(f"TZ string without DST rules {text!r}")
+
+    dst_seconds = -_parse_seconds(dst_offset) if dst_offset else std[0] + 3600
+    return (
+        std, (dst_seconds, dst_abbr.strip("<>")),
+        start, _parse_seconds(start_time) if start_time else DEFAULT_RULE_TIME,
+        end, _parse_seconds(end_time) if end_time else DEFAULT_RULE_TIME,
+    )
+
+
+def expand_posix_tz(rule, first_year, last_year):
+    """
+    List the transitions of a parsed POSIX TZ rule.
+
+    Returns:
+        list: Sorted (UTC timestamp, (offset, abbreviation)) pairs
+    """
+    std, dst, start, start_time, end, end_time = rule
+    if dst is None:
+        return []
+
+    transitions = []
+    for year in range(first_year, last_year + 1):
+        # Rule times are local time in the type in effect before the change
+        dst_start = calendar.timegm(_rule_day(start, year).timetuple()) + start_time - std[0]
+        dst_end = calendar.timegm(_rule_day(end, year).timetuple()) + end_time - dst[0]
+        transitions.append((dst_start, dst))
+        transitions.append((dst_end, std))
+
+    transitions.sort()
+    return transitions
+
+
+def read_tzif(path):
+    """
+    Read the transitions and local time types of a TZif file.
+
+    The 64-bit (version 2+) data is used when present.
+
+    Returns:
+        tuple: (transition times, type index of each transition, types as
+            (offset, abbreviation), footer TZ string or "")
+
+    Raises:
+        TzifError: If the file is missing or malformed
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse_tzif(data)
+    except (OSError, ValueError, struct.error) as e:
+        raise TzifError(f"Cannot read {path}: {e}")
+
+
+def _parse_tzif(data):
+    magic, version, isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = (
+        TZIF_HEADER.unpack_from(data, 0)
+    )
+    if magic != b"TZif":
+        raise TzifError("Not a TZif file")
+
+    time_size, leap_size, position = 4, 8, TZIF_HEADER.size
+    if version != b"\x00":
+        # Skip the 32-bit block to the 64-bit header that follows it
+        position += timecnt * 5 + typecnt * 6 + charcnt + leapcnt * 8 + isstdcnt + isutcnt
+        magic, version, isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = (
+            TZIF_HEADER.unpack_from(data, position)
+        )
+        time_size, leap_size, position = 8, 12, position + TZIF_HEADER.size
+
+    times = list(struct.unpack_from(f">{timecnt}{'q' if time_size == 8 else 'l'}", data, position))
+    position += timecnt * time_size
+    indices = list(data[position:position + timecnt])
+    position += timecnt
+
+    raw_types = [TTINFO.unpack_from(data, position + i * TTINFO.size) for i in range(typecnt)]
+    position += typecnt * TTINFO.size
+    chars = bytes(data[position:position + charcnt])
+    position += charcnt + leapcnt * leap_size + isstdcnt + isutcnt
+
+    types = []
+    for offset, _is_dst, abbreviation_index in raw_types:
+        end = chars.find(b"\0", abbreviation_index)
+        types.append((offset, chars[abbreviation_index:end if end >= 0 else None].decode("ascii", "replace")))
+
+    footer = ""
+    if time_size == 8 and data[position:position + 1] == b"\n":
+        end = data.find(b"\n", position + 1)
+        if end >= 0:
+            footer = bytes(data[position + 1:end]).decode("ascii", "replace")
+
+    return times, indices, types, footer
+
+
+class ZoneTables:
+    """Transition tables of a list of zones, resolved together at any instant."""
+
+    def __init__(self, zones, zoneinfo_dir=ZONEINFO_DIR, now=None):
+        """
+        Load the tables of the given zones.
+
+        Args:
+            zones: Zone names, results are returned in the same order
+            zoneinfo_dir: Directory of the TZif files
+            now: Aware datetime the rule expansion counts years from
+        """
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+
+        self.zones = list(zones)
+        last_year = now.year + RULE_YEARS_AHEAD
+        # Instants from here on may be past the expanded rules
+        self.covered_until = calendar.timegm((last_year + 1, 1, 1, 0, 0, 0)) - 86400
+
+        self.types = []  # (offset, abbreviation) shared by all zones
+        type_ids = {}
+        self._times = []  # Per zone, transition times starting with -TIME_LIMIT
+        self._type_ids = []  # Per zone, type of each transition
+        self.unresolved = set()  # Positions of zones left to tz_engine
+
+        for position, zone in enumerate(self.zones):
+            try:
+                times, type_list = self._load_zone(zone, zoneinfo_dir, last_year)
+            except TzifError:
+                self.unresolved.add(position)
+                times, type_list = [-TIME_LIMIT], [(0, "")]
+
+            ids = []
+            for zone_type in type_list:
+                if zone_type not in type_ids:
+                    type_ids[zone_type] = len(self.types)
+                    self.types.append(zone_type)
+                ids.append(type_ids[zone_type])
+            self._times.append(times)
+            self._type_ids.append(ids)
+
+        self._keys = self._ids = None
+        numpy = self._numpy = _load_numpy()
+        if numpy is not None:
+            self._keys = numpy.concatenate([
+                numpy.array(times, dtype=numpy.int64) + position * ZONE_BAND
+                for position, times in enumerate(self._times)
+            ]) if self._times else numpy.zeros(0, dtype=numpy.int64)
+            self._ids = numpy.array(
+                [type_id for ids in self._type_ids for type_id in ids], dtype=numpy.int64
+            )
+            self._bands = numpy.arange(len(self._times), dtype=numpy.int64) * ZONE_BAND
+
+    @staticmethod
+    def _load_zone(zone, zoneinfo_dir, last_year):
+        """Return the transition times of a zone and the type after each."""
+        times, indices, types, footer = read_tzif(os.path.join(zoneinfo_dir, zone))
+        if not types:
+            raise TzifError(f"No local time types in {zone}")
+
+        # Before the first transition the first type applies
+        zone_times = [-TIME_LIMIT]
+        zone_types = [types[0]]
+        for when, index in zip(times, indices):
+            if -TIME_LIMIT < when < TIME_LIMIT and index < len(types):
+                zone_times.append(when)
+                zone_types.append(types[index])
+
+        if footer:
+            # The rule takes over from the year of the last stored transition
+            first_year = datetime.datetime.fromtimestamp(
+                max(zone_times[-1], 0), datetime.timezone.utc
+            ).year
+            rule = parse_posix_tz(footer)
+            for when, zone_type in expand_posix_tz(rule, first_year, last_year):
+                if when > zone_times[-1]:
+                    zone_times.append(when)
+                    zone_types.append(zone_type)
+
+        return zone_times, zone_types
+
+    def __len__(self):
+        return len(self.zones)
+
+    def resolve(self, when):
+        """
+        Return the offset and abbreviation of every zone at an instant.
+
+        Args:
+            when: Aware datetime
+
+        Returns:
+            list: (offset in seconds, abbreviation) per zone, in the order the
+                zones were given; None for zones that cannot be resolved
+        """
+        timestamp = int(when.timestamp())
+        if timestamp >= self.covered_until or not -TIME_LIMIT < timestamp < TIME_LIMIT:
+            return [self._resolve_engine(zone, when) for zone in self.zones]
+
+        numpy = self._numpy
+        if numpy is not None:
+            positions = numpy.searchsorted(self._keys, self._bands + timestamp, side="right") - 1
+            type_ids = self._ids[positions].tolist()
+        else:
+            type_ids = [
+                ids[bisect.bisect_right(times, timestamp) - 1]
+                for times, ids in zip(self._times, self._type_ids)
+            ]
+
+        results = [self.types[type_id] for type_id in type_ids]
+        for position in self.unresolved:
+            results[position] = self._resolve_engine(self.zones[position], when)
+        return results
+
+    @staticmethod
+    def _resolve_engine(zone, when):
+        try:
+            return tz_engine.get_offset_seconds(zone, when), tz_engine.get_abbreviation(zone, when)
+        except tz_engine.TimezoneEngineError:
+            return None
@@ -0,0 +1,240 @@
+"""
+Timezone catalog with a persistent on-disk cache.
+
+The catalog is the list of selectable zones together with the data shown
+for them (display city, country, region path, ISO country codes and
+coordinates). Building it requires `timedatectl list-timezones` and the
+tzdata tab files, so the result is stored in $XDG_CACHE_HOME, per locale,
+and reused until the installed tzdata changes.
+"""
+
+# Standard library imports
+import collections
+import json
+import os
+import re
+import subprocess
+
+# Local imports
+from datetime_core import commands, tz_countries, workers
+
+ZONEINFO_DIR = "/usr/share/zoneinfo"
+CACHE_APP_DIR = "comm-xfce-datetime"
+CACHE_FORMAT_VERSION = 2
+
+TimezoneEntry = collections.namedtuple(
+    "TimezoneEntry",
+    ["timezone", "city", "country", "region_path", "country_codes", "latitude", "longitude"]
+)
+
+
+def get_cache_dir():
+    """Return the cache directory of the application."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, CACHE_APP_DIR)
+
+
+def current_locale_tag():
+    """Return the message locale in effect, used to key translated data."""
+    for var in ("LANGUAGE", "LC_ALL", "LC_MESSAGES", "LANG"):
+        value = os.environ.get(var)
+        if value:
+            # LANGUAGE may hold a priority list, the first entry wins
+            value = value.split(":")[0]
+            return re.sub(r"[^A-Za-z0-9_@.-]", "_", value) or "C"
+    return "C"
+
+
+def get_tzdata_version(zoneinfo_dir=ZONEINFO_DIR):
+    """Return the installed tzdata version (e.g. "2025b"), or "" if unknown."""
+    try:
+        with open(os.path.join(zoneinfo_dir, "+VERSION")) as f:
+            return f.read().strip()
+    except OSError:
+        pass
+
+    try:
+        with open(os.path.join(zoneinfo_dir, "tzdata.zi")) as f:
+            match = re.match(r"#\s*version\s+(\S+)", f.readline())
+            if match:
+                return match.group(1)
+    except OSError:
+        pass
+
+    return ""
+
+
+def get_tzdata_stamp(zoneinfo_dir=ZONEINFO_DIR):
+    """Return the values that invalidate the cache when tzdata changes."""
+    try:
+        mtime = int(os.stat(zoneinfo_dir).st_mtime)
+    except OSError:
+        mtime = 0
+    return {"version": get_tzdata_version(zoneinfo_dir), "mtime": mtime}
+
+
+def read_cache_file(path, format_version):
+    """
+    Return the data of a JSON cache file written by write_cache_file.
+
+    Returns:
+        dict: The data, or None if the file is missing, unreadable or of
+            another format version
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != format_version:
+        return None
+    return data
+
+
+def write_cache_file(path, format_version, data, description):
+    """
+    Atomically write data, tagged with its format version, to a JSON cache file.
+
+    A failure is only reported, as a warning naming the description.
+    """
+    data = {"format": format_version, **data}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Failed to write {description}: {e}")
+
+
+def list_system_timezones():
+    """Return the zone names known to the system."""
+    try:
+        result = commands.run(
+            ["timedatectl", "list-timezones"],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout.splitlines()
+    except (OSError, subprocess.CalledProcessError):
+        # Fall back to the zones zoneinfo can see directly
+        import zoneinfo
+        return list(zoneinfo.available_timezones())
+
+
+def build_entries(timezones, locations, country_names):
+    """
+    Turn raw zone names into sorted catalog entries.
+
+    Args:
+        timezones: Iterable of zone names, e.g. "America/Sao_Paulo"
+        locations: Dict mapping zone names to tz_countries.ZoneLocation
+        country_names: Dict mapping ISO country codes to display names
+
+    Returns:
+        list: TimezoneEntry items, sorted by zone name
+    """
+    entries = []
+    no_location = tz_countries.ZoneLocation((), None, None)
+
+    for timezone in sorted(timezones):
+        parts = timezone.split('/')
+
+        if len(parts) >= 2:
+            region = parts[0]
+            city_raw = parts[-1]
+            location = locations.get(timezone, no_location)
+            codes = location.country_codes
+
+            entries.append(TimezoneEntry(
+                timezone,
+                city_raw.replace('_', ' '),
+                country_names.get(codes[0], "") if codes else "",
+                f"{region}/{city_raw}",
+                codes,
+                location.latitude,
+                location.longitude,
+            ))
+
+    return entries
+
+
+class TimezoneCatalog:
+    """Loads the timezone catalog, from the cache when it is still valid."""
+
+    def __init__(self, locale_tag=None, cache_dir=None, zoneinfo_dir=ZONEINFO_DIR, pool=None):
+        self.locale_tag = locale_tag or current_locale_tag()
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.zoneinfo_dir = zoneinfo_dir
+        self.pool = pool  # workers.WorkerPool a stale catalog is rebuilt on
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.cache_dir, f"timezones-{self.locale_tag}.json")
+
+    def load(self, on_update=None):
+        """
+        Return the catalog entries as fast as possible.
+
+        A valid cache is returned as is. When the cache exists but tzdata
+        changed and on_update is given, the stale entries are returned right
+        away and the catalog is rebuilt on the worker pool; on_update is then
+        called through the pool's dispatch function with the new entries if
+        they differ. Without a usable cache the catalog is built synchronously.
+        """
+        cached_entries, cached_stamp = self._read_cache()
+        if cached_entries is not None:
+            stamp = get_tzdata_stamp(self.zoneinfo_dir)
+            if cached_stamp == stamp:
+                return cached_entries
+
+            if on_update is not None:
+                pool = self.pool or workers.WorkerPool()
+                pool.submit(
+                    self.rebuild,
+                    callback=lambda entries, error: self._on_rebuilt(
+                        entries, error, cached_entries, on_update
+                    )
+                )
+                return cached_entries
+
+        return self.rebuild()
+
+    def rebuild(self):
+        """Build the catalog from the system and refresh the cache."""
+        stamp = get_tzdata_stamp(self.zoneinfo_dir)
+        entries = build_entries(
+            list_system_timezones(),
+            tz_countries.load_zone_locations(self.zoneinfo_dir),
+            tz_countries.get_country_names(self.locale_tag, self.zoneinfo_dir),
+        )
+        self._write_cache(entries, stamp)
+        return entries
+
+    @staticmethod
+    def _on_rebuilt(entries, error, cached_entries, on_update):
+        """Report a rebuilt stale catalog if anything changed."""
+        if error is not None:
+            print(f"Warning: Failed to refresh timezone catalog: {error}")
+        elif entries != cached_entries:
+            on_update(entries)
+
+    def _read_cache(self):
+        """Return (entries, stamp) from the cache, or (None, None)."""
+        data = read_cache_file(self.cache_path, CACHE_FORMAT_VERSION)
+        if data is None:
+            return None, None
+        try:
+            entries = [TimezoneEntry(*item) for item in data["entries"]]
+            # JSON has no tuples, keep entries comparable with rebuilt ones
+            entries = [entry._replace(country_codes=tuple(entry.country_codes)) for entry in entries]
+            return entries, data["stamp"]
+        except (KeyError, TypeError, AttributeError):
+            return None, None
+
+    def _write_cache(self, entries, stamp):
+        """Atomically write the catalog to the cache file."""
+        write_cache_file(self.cache_path, CACHE_FORMAT_VERSION, {
+            "stamp": stamp,
+            "entries": [list(entry) for entry in entries],
+        }, "timezone cache")
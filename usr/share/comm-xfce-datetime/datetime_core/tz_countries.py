@@ -0,0 +1,167 @@
+"""
+Country and location data of the timezones, from the tzdata tab files.
+
+zone1970.tab lists every canonical zone with the countries it serves and
+the coordinates of its principal location; zone.tab adds the backward
+compatible zones (one country each) and the links of tzdata.zi give old
+names like "Asia/Calcutta" the data of their target. iso3166.tab names
+the countries.
+
+Country names are localized through the iso-codes translations when they
+are installed, and fall back to the English names of iso3166.tab.
+"""
+
+# Standard library imports
+import collections
+import functools
+import gettext
+import json
+import os
+import re
+
+ISO_CODES_JSON = "/usr/share/iso-codes/json/iso_3166-1.json"
+ISO_CODES_DOMAIN = "iso_3166-1"
+
+ZoneLocation = collections.namedtuple(
+    "ZoneLocation", ["country_codes", "latitude", "longitude"]
+)
+
+# ±DDMM±DDDMM or ±DDMMSS±DDDMMSS
+COORDINATES_RE = re.compile(r"^([+-])(\d{2})(\d{2})(\d{2})?([+-])(\d{3})(\d{2})(\d{2})?$")
+
+
+def _read_tab(path):
+    """Yield the tab separated fields of the non-comment lines of a file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield line.rstrip("\n").split("\t")
+
+
+def parse_coordinates(text):
+    """
+    Convert ISO 6709 coordinates as used by tzdata into degrees.
+
+    Returns:
+        tuple: (latitude, longitude), or (None, None) if malformed
+    """
+    match = COORDINATES_RE.match(text)
+    if not match:
+        return None, None
+
+    lat_sign, lat_deg, lat_min, lat_sec, lon_sign, lon_deg, lon_min, lon_sec = match.groups()
+    latitude = int(lat_deg) + int(lat_min) / 60 + int(lat_sec or 0) / 3600
+    longitude = int(lon_deg) + int(lon_min) / 60 + int(lon_sec or 0) / 3600
+    return (
+        round(-latitude if lat_sign == "-" else latitude, 4),
+        round(-longitude if lon_sign == "-" else longitude, 4),
+    )
+
+
+def parse_iso3166(path):
+    """Return {country code: English name} from iso3166.tab."""
+    return {fields[0]: fields[1] for fields in _read_tab(path) if len(fields) >= 2}
+
+
+def parse_zone_tab(path):
+    """
+    Return {zone: ZoneLocation} from zone1970.tab or zone.tab.
+
+    Both files share their first three columns; zone1970.tab may list
+    several comma separated countries, the most populous first.
+    """
+    locations = {}
+    for fields in _read_tab(path):
+        if len(fields) < 3:
+            continue
+        latitude, longitude = parse_coordinates(fields[1])
+        locations[fields[2]] = ZoneLocation(tuple(fields[0].split(",")), latitude, longitude)
+    return locations
+
+
+def parse_links(path):
+    """Return {link name: target zone} from the "L" lines of tzdata.zi."""
+    links = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("L "):
+                fields = line.split()
+                if len(fields) >= 3:
+                    links[fields[2]] = fields[1]
+    return links
+
+
+def load_zone_locations(zoneinfo_dir):
+    """
+    Return {zone: ZoneLocation} for every zone the tab files know.
+
+    A zone's own country from zone.tab comes first, followed by the other
+    countries zone1970.tab assigns to it.
+    """
+    locations = {}
+
+    for name in ("zone1970.tab", "zone.tab"):
+        try:
+            parsed = parse_zone_tab(os.path.join(zoneinfo_dir, name))
+        except OSError:
+            continue
+
+        for zone, location in parsed.items():
+            known = locations.get(zone)
+            if known is None:
+                locations[zone] = location
+            else:
+                codes = location.country_codes + tuple(
+                    code for code in known.country_codes if code not in location.country_codes
+                )
+                locations[zone] = known._replace(country_codes=codes)
+
+    try:
+        links = parse_links(os.path.join(zoneinfo_dir, "tzdata.zi"))
+    except OSError:
+        links = {}
+
+    for link, target in links.items():
+        if link not in locations and target in locations:
+            locations[link] = locations[target]
+
+    return locations
+
+
+def _load_iso_codes_names():
+    """Return {country code: iso-codes name}, the msgids of its translations."""
+    try:
+        with open(ISO_CODES_JSON, encoding="utf-8") as f:
+            countries = json.load(f)["3166-1"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+    return {
+        country["alpha_2"]: country.get("common_name") or country["name"]
+        for country in countries
+        if "alpha_2" in country and "name" in country
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_country_names(locale_tag, zoneinfo_dir):
+    """
+    Return {country code: localized name}, memoized per locale.
+
+    locale_tag only keys the cache; the translations follow the process
+    environment, from which the tag is derived (see tz_catalog).
+    """
+    try:
+        names = parse_iso3166(os.path.join(zoneinfo_dir, "iso3166.tab"))
+    except OSError:
+        names = {}
+
+    iso_names = _load_iso_codes_names()
+    if iso_names:
+        translations = gettext.translation(ISO_CODES_DOMAIN, fallback=True)
+        for code in set(names) | set(iso_names):
+            if code in iso_names:
+                names[code] = translations.gettext(iso_names[code])
+
+    return names
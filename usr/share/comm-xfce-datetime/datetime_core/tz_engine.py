@@ -0,0 +1,195 @@
+"""
+In-process timezone engine.
+
+Resolves UTC offsets, abbreviations and local times directly from the
+system TZif database through zoneinfo, so the application does not need
+to spawn `env TZ=... date` once per zone. The `date` based fallbacks are
+only used when zoneinfo cannot resolve a zone.
+"""
+
+# Standard library imports
+import collections
+import datetime
+import functools
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+# Local imports
+from datetime_core import commands
+
+# Format used for the time shown next to each zone in the list
+ROW_TIME_FORMAT = "%a %H:%M"
+
+# How far ahead the next transition of a zone is looked for
+TRANSITION_HORIZON_DAYS = 366
+# Stride of the transition search; two transitions closer than this are missed
+TRANSITION_STEP_DAYS = 7
+
+Transition = collections.namedtuple(
+    "Transition", ["instant", "offset_seconds", "abbreviation"]
+)
+
+
+class TimezoneEngineError(Exception):
+    """Raised when a zone cannot be resolved in-process."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_zone(timezone):
+    """Return the (cached) ZoneInfo object for a zone name."""
+    if ZoneInfo is None:
+        raise TimezoneEngineError("zoneinfo is not available")
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError, OSError) as e:
+        raise TimezoneEngineError(f"Unknown timezone {timezone}: {e}")
+
+
+def clear_caches():
+    """Forget the loaded zones, so an updated tzdata is read again."""
+    get_zone.cache_clear()
+    if ZoneInfo is not None:
+        ZoneInfo.clear_cache()
+
+
+def now_in_zone(timezone, when=None):
+    """
+    Return an aware datetime for the given instant in the given zone.
+
+    Args:
+        timezone: Zone name, e.g. "America/Sao_Paulo"
+        when: Aware datetime to convert, defaults to the current instant
+    """
+    if when is None:
+        when = datetime.datetime.now(datetime.timezone.utc)
+    return when.astimezone(get_zone(timezone))
+
+
+def get_offset_seconds(timezone, when=None):
+    """Return the UTC offset of a zone in seconds."""
+    return int(now_in_zone(timezone, when).utcoffset().total_seconds())
+
+
+def get_abbreviation(timezone, when=None):
+    """Return the zone abbreviation (e.g. "CET", "-03") in effect."""
+    return now_in_zone(timezone, when).tzname() or ""
+
+
+def get_offset_and_abbreviation(timezone, when=None):
+    """Return the UTC offset in seconds and the abbreviation in effect."""
+    local = now_in_zone(timezone, when)
+    return int(local.utcoffset().total_seconds()), local.tzname() or ""
+
+
+def next_transition(timezone, when=None, horizon_days=TRANSITION_HORIZON_DAYS):
+    """
+    Find the next change of offset or abbreviation of a zone.
+
+    zoneinfo does not expose its transition table, so the zone is sampled
+    every TRANSITION_STEP_DAYS and a change is narrowed down to the second
+    by bisection.
+
+    Args:
+        timezone: Zone name, e.g. "Europe/Berlin"
+        when: Aware datetime to search from, defaults to the current instant
+        horizon_days: Days to search ahead
+
+    Returns:
+        Transition: First instant (UTC) of the new offset, and the offset and
+            abbreviation from then on; None if none within the horizon
+    """
+    zone = get_zone(timezone)
+    if when is None:
+        when = datetime.datetime.now(datetime.timezone.utc)
+
+    def state(timestamp):
+        local = datetime.datetime.fromtimestamp(timestamp, zone)
+        return local.utcoffset(), local.tzname()
+
+    start = int(when.timestamp())
+    end = start + horizon_days * 86400
+    step = TRANSITION_STEP_DAYS * 86400
+    current = state(start)
+
+    low = start
+    while low < end:
+        high = min(low + step, end)
+        if state(high) == current:
+            low = high
+            continue
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            if state(middle) == current:
+                low = middle
+            else:
+                high = middle
+
+        offset, abbreviation = state(high)
+        return Transition(
+            datetime.datetime.fromtimestamp(high, datetime.timezone.utc),
+            int(offset.total_seconds()),
+            abbreviation or ""
+        )
+
+    return None
+
+
+def format_offset(seconds):
+    """Format an offset in seconds as "UTC+H" or "UTC+H:MM"."""
+    sign = "-" if seconds < 0 else "+"
+    hours, remainder = divmod(abs(seconds), 3600)
+    minutes = remainder // 60
+
+    if minutes == 0:
+        return f"UTC{sign}{hours}"
+    return f"UTC{sign}{hours}:{minutes:02d}"
+
+
+def format_local_time(timezone, fmt=ROW_TIME_FORMAT, when=None):
+    """
+    Return the local time in a zone formatted with strftime.
+
+    Weekday names follow the process LC_TIME locale, which Gtk sets up
+    from the environment on startup, matching what `date` would print.
+    """
+    return now_in_zone(timezone, when).strftime(fmt)
+
+
+def date_local_time(timezone):
+    """Fallback: get the time in a timezone by running date."""
+    try:
+        # Use env to set TZ environment variable properly
+        result = commands.run(
+            ["env", f"TZ={timezone}", "date", "+%a %H:%M"],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except Exception:
+        return ""
+
+
+def date_utc_offset(timezone):
+    """Fallback: get the formatted UTC offset of a timezone by running date."""
+    try:
+        # Use env to set TZ environment variable properly
+        result = commands.run(
+            ["env", f"TZ={timezone}", "date", "+%z"],
+            capture_output=True, text=True, check=True
+        )
+        offset_raw = result.stdout.strip()
+
+        # Parse offset properly
+        if offset_raw and len(offset_raw) >= 5:  # Format should be +HHMM or -HHMM
+            sign = -1 if offset_raw[0] == "-" else 1
+            hours = int(offset_raw[1:3])
+            minutes = int(offset_raw[3:5])
+            return format_offset(sign * (hours * 3600 + minutes * 60))
+    except Exception as e:
+        print(f"Error getting timezone offset for {timezone}: {e}")
+
+    return None
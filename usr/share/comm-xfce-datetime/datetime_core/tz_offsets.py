@@ -0,0 +1,107 @@
+"""
+Cache of the current offset of each timezone.
+
+An entry holds the offset and abbreviation of a zone together with the
+instant they stop being valid, the zone's next transition, and what the
+zone changes to then. Entries are recomputed lazily on the first lookup
+after they expire, so a window left open across a DST change shows the
+new offsets, and the least recently used entries are evicted past a bound.
+"""
+
+# Standard library imports
+import collections
+import datetime
+import threading
+
+# Local imports
+from datetime_core import tz_engine
+
+# Upper bound of cached zones, above the size of the catalog
+DEFAULT_MAX_ENTRIES = 1024
+# Validity of an offset resolved through `date`, whose transitions are unknown
+FALLBACK_TTL = datetime.timedelta(hours=1)
+
+# offset_seconds is None when the zone could only be resolved through `date`;
+# next_utc_offset and next_abbreviation are None if nothing changes at valid_until
+OffsetInfo = collections.namedtuple(
+    "OffsetInfo",
+    ["offset_seconds", "utc_offset", "abbreviation", "valid_until",
+     "next_utc_offset", "next_abbreviation"]
+)
+
+
+def resolve(timezone, now):
+    """
+    Compute the OffsetInfo of a zone at an instant.
+
+    Args:
+        timezone: Zone name, e.g. "Europe/Berlin"
+        now: Aware datetime the offset is resolved for
+    """
+    try:
+        offset_seconds = tz_engine.get_offset_seconds(timezone, now)
+        abbreviation = tz_engine.get_abbreviation(timezone, now)
+        transition = tz_engine.next_transition(timezone, now)
+    except tz_engine.TimezoneEngineError:
+        return OffsetInfo(
+            None, tz_engine.date_utc_offset(timezone), "", now + FALLBACK_TTL, None, None
+        )
+
+    if transition is None:
+        # Nothing ahead within the horizon, look again once it has passed
+        valid_until = now + datetime.timedelta(days=tz_engine.TRANSITION_HORIZON_DAYS)
+        return OffsetInfo(
+            offset_seconds, tz_engine.format_offset(offset_seconds), abbreviation,
+            valid_until, None, None
+        )
+
+    return OffsetInfo(
+        offset_seconds, tz_engine.format_offset(offset_seconds), abbreviation,
+        transition.instant, tz_engine.format_offset(transition.offset_seconds),
+        transition.abbreviation
+    )
+
+
+class OffsetCache:
+    """OffsetInfo by zone, valid until the zone's next transition, LRU bounded."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, timezone, now=None):
+        """
+        Return the OffsetInfo of a zone, recomputing it if it expired.
+
+        Args:
+            timezone: Zone name, e.g. "Europe/Berlin"
+            now: Aware datetime to check the validity against, defaults to now
+        """
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+
+        with self._lock:
+            info = self._entries.get(timezone)
+            if info is not None and now < info.valid_until:
+                self._entries.move_to_end(timezone)
+                return info
+
+        # Resolved outside the lock, a duplicate computation is harmless
+        info = resolve(timezone, now)
+
+        with self._lock:
+            self._entries[timezone] = info
+            self._entries.move_to_end(timezone)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return info
+
+    def clear(self):
+        """Drop every entry, e.g. after the tzdata was updated."""
+        with self._lock:
+            self._entries.clear()
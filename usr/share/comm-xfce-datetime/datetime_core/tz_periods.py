@@ -0,0 +1,160 @@
+"""
+Offsets of every zone over one year, cached on disk next to the catalog.
+
+For each zone the cache holds the offset and abbreviation in effect at the
+start of the year and after each transition during the year. Any instant
+of that year is then resolved by bisection, without loading the zone's
+TZif file, so listing or searching every zone from the command line does
+not pay for loading the whole database. The cache is keyed to the tzdata
+stamp and the year, and rebuilt when either changes.
+"""
+
+# Standard library imports
+import bisect
+import datetime
+import os
+
+# Local imports
+from datetime_core import tz_engine
+from datetime_core.tz_catalog import (
+    ZONEINFO_DIR, get_cache_dir, get_tzdata_stamp, read_cache_file, write_cache_file
+)
+
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE = "offsets.json"
+
+
+def year_bounds(year):
+    """Return the first instants (UTC) of a year and of the following one."""
+    return (
+        datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(year + 1, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+def build_periods(timezone, year):
+    """
+    Return the offsets of a zone over a year.
+
+    Returns:
+        list: (start timestamp, offset in seconds, abbreviation) of the
+            start of the year and of each transition in it; None if the
+            zone cannot be resolved in-process
+    """
+    start, end = year_bounds(year)
+    try:
+        offset_seconds, abbreviation = tz_engine.get_offset_and_abbreviation(timezone, start)
+        periods = [(int(start.timestamp()), offset_seconds, abbreviation)]
+
+        when = start
+        while True:
+            transition = tz_engine.next_transition(
+                timezone, when, horizon_days=(end - when).days + 1
+            )
+            if transition is None or transition.instant >= end:
+                return periods
+            periods.append((
+                int(transition.instant.timestamp()),
+                transition.offset_seconds, transition.abbreviation
+            ))
+            when = transition.instant
+    except tz_engine.TimezoneEngineError:
+        return None
+
+
+class PeriodTable:
+    """Offsets of zones over one year, looked up by instant."""
+
+    def __init__(self, year, periods):
+        """
+        Args:
+            year: Year (UTC) the periods cover
+            periods: Dict mapping zone names to the list build_periods returns
+        """
+        self.year = year
+        self.periods = periods
+        self._starts = {
+            timezone: [start for start, _offset, _abbreviation in zone_periods]
+            for timezone, zone_periods in periods.items() if zone_periods
+        }
+
+    def get(self, timezone, when=None):
+        """
+        Return the offset in seconds and the abbreviation of a zone.
+
+        Instants outside the year and zones missing from the table are
+        resolved through tz_engine, like tz_engine.get_offset_and_abbreviation.
+
+        Raises:
+            tz_engine.TimezoneEngineError: If the zone cannot be resolved
+        """
+        if when is None:
+            when = datetime.datetime.now(datetime.timezone.utc)
+
+        if timezone not in self.periods or when.astimezone(datetime.timezone.utc).year != self.year:
+            return tz_engine.get_offset_and_abbreviation(timezone, when)
+
+        zone_periods = self.periods[timezone]
+        if zone_periods is None:
+            raise tz_engine.TimezoneEngineError(f"Cannot resolve timezone {timezone}")
+
+        position = bisect.bisect_right(self._starts[timezone], when.timestamp()) - 1
+        _start, offset_seconds, abbreviation = zone_periods[max(position, 0)]
+        return offset_seconds, abbreviation
+
+
+class PeriodCache:
+    """Loads the PeriodTable of the current year, from the cache when valid."""
+
+    def __init__(self, cache_dir=None, zoneinfo_dir=ZONEINFO_DIR):
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.zoneinfo_dir = zoneinfo_dir
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.cache_dir, CACHE_FILE)
+
+    def load(self, timezones, now=None):
+        """
+        Return the table of the given zones for the year of now.
+
+        The cache is used if it was built for the installed tzdata and that
+        year and covers every zone; otherwise the table is built and cached.
+        """
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+        year = now.astimezone(datetime.timezone.utc).year
+        stamp = get_tzdata_stamp(self.zoneinfo_dir)
+
+        cached = self._read_cache()
+        if (
+            cached is not None and cached["stamp"] == stamp and cached["year"] == year
+            and all(timezone in cached["zones"] for timezone in timezones)
+        ):
+            return PeriodTable(year, cached["zones"])
+
+        periods = {timezone: build_periods(timezone, year) for timezone in timezones}
+        self._write_cache(periods, stamp, year)
+        return PeriodTable(year, periods)
+
+    def _read_cache(self):
+        """Return the cached data, or None if it is missing or unreadable."""
+        data = read_cache_file(self.cache_path, CACHE_FORMAT_VERSION)
+        if data is None:
+            return None
+        try:
+            zones = {
+                timezone: [tuple(period) for period in periods] if periods is not None else None
+                for timezone, periods in data["zones"].items()
+            }
+            return {"stamp": data["stamp"], "year": data["year"], "zones": zones}
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+    def _write_cache(self, periods, stamp, year):
+        """Atomically write the periods to the cache file."""
+        write_cache_file(self.cache_path, CACHE_FORMAT_VERSION, {
+            "stamp": stamp,
+            "year": year,
+            "zones": periods,
+        }, "timezone offset cache")
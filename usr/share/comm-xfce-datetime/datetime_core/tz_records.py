@@ -0,0 +1,167 @@
+"""
+Compact store of the timezone rows shown by the application.
+
+Each zone is one slotted TimezoneRecord, addressed by its position in the
+store and looked up by zone name through a dict. The list model, search
+and selection all refer to records by position, so the data of a zone is
+held exactly once. Strings are interned, as countries and regions repeat
+across hundreds of zones.
+
+The store also keeps the orders the list can be sorted in (offset, city,
+country, region) as rank arrays computed once per key, so switching the
+sort is a single reorder of the list model. Only the offset ranks change
+over time, when a DST transition moves zones to another offset.
+"""
+
+# Standard library imports
+import collections
+import sys
+
+# Local imports
+from datetime_core.tz_search import normalize
+
+SORT_OFFSET = "offset"
+SORT_CITY = "city"
+SORT_COUNTRY = "country"
+SORT_REGION = "region"
+SORT_KEYS = (SORT_OFFSET, SORT_CITY, SORT_COUNTRY, SORT_REGION)
+
+
+def _intern(text):
+    return sys.intern(text) if text else ""
+
+
+def sort_key(record, key):
+    """
+    Return the value a record is ordered by for one of SORT_KEYS.
+
+    Ties are broken by city then zone name, zones without a country or a
+    known offset come last.
+    """
+    city = normalize(record.city)
+    if key == SORT_OFFSET:
+        offset = record.offset_seconds
+        return (offset is None, offset or 0, city, record.timezone)
+    if key == SORT_CITY:
+        return (city, record.timezone)
+    if key == SORT_COUNTRY:
+        return (not record.country, normalize(record.country), city, record.timezone)
+    if key == SORT_REGION:
+        # Zone names are region paths, this is the catalog order
+        return (record.timezone,)
+    raise ValueError(f"Unknown sort key: {key}")
+
+
+class TimezoneRecord:
+    """The data of one zone, see tz_catalog.TimezoneEntry."""
+
+    __slots__ = (
+        "index", "timezone", "city", "country", "region_path", "utc_offset",
+        "offset_seconds", "country_codes", "latitude", "longitude",
+    )
+
+    def __init__(self, index, timezone, city, country, region_path, utc_offset="",
+                 offset_seconds=None, country_codes=(), latitude=None, longitude=None):
+        self.index = index
+        self.timezone = _intern(timezone)
+        self.city = _intern(city)
+        self.country = _intern(country)
+        self.region_path = _intern(region_path)
+        self.utc_offset = _intern(utc_offset)
+        self.offset_seconds = offset_seconds
+        self.country_codes = tuple(_intern(code) for code in country_codes)
+        self.latitude = latitude
+        self.longitude = longitude
+
+    def __repr__(self):
+        return f"TimezoneRecord({self.index}, {self.timezone!r})"
+
+
+class RecordStore:
+    """TimezoneRecord items indexed by position, with lookup by zone name."""
+
+    def __init__(self, entries=()):
+        self._records = []
+        self._positions = {}
+        self._ranks = {}  # Rank of each position, by sort key
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, timezone):
+        return timezone in self._positions
+
+    def append(self, entry, utc_offset="", offset_seconds=None):
+        """
+        Add a catalog entry at the end of the store.
+
+        Args:
+            entry: tz_catalog.TimezoneEntry of the zone
+            utc_offset: Formatted current UTC offset, e.g. "UTC-3"
+            offset_seconds: Current UTC offset in seconds, None if unknown
+
+        Returns:
+            TimezoneRecord: The new record, its index is its position
+        """
+        record = TimezoneRecord(
+            len(self._records), entry.timezone, entry.city, entry.country,
+            entry.region_path, utc_offset, offset_seconds,
+            entry.country_codes, entry.latitude, entry.longitude
+        )
+        self._records.append(record)
+        self._positions[record.timezone] = record.index
+        self._ranks.clear()
+        return record
+
+    def update_offset(self, timezone, utc_offset, offset_seconds):
+        """
+        Record a new current offset of a zone, e.g. after a DST transition.
+
+        Returns:
+            TimezoneRecord: The updated record, None if the offset is unchanged
+        """
+        record = self.get(timezone)
+        if record is None or record.offset_seconds == offset_seconds:
+            return None
+
+        record.utc_offset = _intern(utc_offset)
+        record.offset_seconds = offset_seconds
+        self._ranks.pop(SORT_OFFSET, None)
+        return record
+
+    def ranks(self, key):
+        """
+        Return the rank of every record in the order of a sort key.
+
+        Returns:
+            list: Rank of the record at each position, computed once per key
+        """
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            order = sorted(range(len(self._records)), key=lambda i: sort_key(self._records[i], key))
+            ranks = [0] * len(order)
+            for rank, position in enumerate(order):
+                ranks[position] = rank
+            self._ranks[key] = ranks
+        return ranks
+
+    def offset_groups(self):
+        """Return a Counter of the records per current offset in seconds."""
+        return collections.Counter(record.offset_seconds for record in self._records)
+
+    def get(self, timezone):
+        """Return the record of a zone, or None."""
+        index = self._positions.get(timezone)
+        return None if index is None else self._records[index]
+
+    def index_of(self, timezone):
+        """Return the position of a zone, or -1."""
+        return self._positions.get(timezone, -1)
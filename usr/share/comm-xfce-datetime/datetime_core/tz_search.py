@@ -0,0 +1,385 @@
+"""
+Precomputed search index over the timezone catalog.
+
+Each zone gets one normalized key (casefolded, accents stripped) built from
+its city, country and zone name, plus an entry in a trigram index. ISO
+country codes ("br", "de") are matched exactly. Queries
+of three or more characters are answered from the trigram index; a query
+that only extends the previous one narrows the previous result instead.
+
+When nothing matches, city names within a small edit distance of the query
+are accepted, so typos with swapped, missing or extra letters ("berlni")
+still find the zone.
+
+On top of the substring lookup, candidates are ranked using per-zone tokens
+computed once: city and country words, the zone path, the current and
+alternate (DST) abbreviations and UTC offsets, resolved through tz_engine
+or a cached tz_periods.PeriodTable. This lets "sao paulo", "EST",
+"IST" or "+5:30" find the expected zones, best match first.
+"""
+
+# Standard library imports
+import datetime
+import re
+import unicodedata
+
+# Local imports
+from datetime_core import tz_engine
+
+# Separates fields inside a key so a match cannot span two fields
+FIELD_SEPARATOR = "\x00"
+NGRAM_SIZE = 3
+# Shortest query that is also matched as a fuzzy subsequence of city names
+FUZZY_MIN_LENGTH = 3
+# Shortest query that is corrected for typos, and the length from which two
+# typos are allowed instead of one
+TYPO_MIN_LENGTH = 4
+TYPO_TWO_EDITS_LENGTH = 8
+
+# Offset queries like "+5:30", "-03", "UTC+1" or "gmt-0530"
+OFFSET_QUERY_RE = re.compile(r"^(?:utc|gmt)?\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?$")
+
+# Relevance of each kind of match, the best one wins for a zone
+SCORE_CITY_EXACT = 100
+SCORE_ABBREVIATION = 90
+SCORE_OFFSET = 90
+SCORE_CITY_PREFIX = 80
+SCORE_ALT_ABBREVIATION = 70
+SCORE_ALT_OFFSET = 60
+SCORE_CITY_WORD_PREFIX = 60
+SCORE_COUNTRY_EXACT = 50
+SCORE_COUNTRY_PREFIX = 40
+SCORE_CITY_SUBSTRING = 40
+SCORE_PATH_SUBSTRING = 30
+SCORE_COUNTRY_SUBSTRING = 20
+SCORE_FUZZY = 10
+SCORE_TYPO = 5
+
+
+def normalize(text):
+    """Casefold text and strip accents, so "São" matches "sao"."""
+    if text.isascii():
+        # Nothing to strip, which holds for most names and every abbreviation
+        return text.casefold().replace("_", " ")
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold().replace("_", " ")
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    """Return the set of n-grams of a string."""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def parse_offset_query(query):
+    """Return the offset in seconds for queries like "+5:30", or None."""
+    match = OFFSET_QUERY_RE.match(query)
+    if not match:
+        return None
+
+    sign, hours, minutes = match.groups()
+    seconds = int(hours) * 3600 + int(minutes or 0) * 60
+    return -seconds if sign == "-" else seconds
+
+
+def is_subsequence(query, text):
+    """Check if the characters of query appear in text in order."""
+    remaining = iter(text)
+    return all(char in remaining for char in query)
+
+
+def edit_distance(query, text, limit):
+    """
+    Return the edit distance between query and text, or limit + 1 if larger.
+
+    Insertions, deletions, substitutions and swaps of adjacent characters
+    count as one edit each (optimal string alignment distance).
+    """
+    if abs(len(query) - len(text)) > limit:
+        return limit + 1
+
+    previous2 = None
+    previous = list(range(len(text) + 1))
+    for i, query_char in enumerate(query, 1):
+        current = [i] + [0] * len(text)
+        for j, text_char in enumerate(text, 1):
+            cost = query_char != text_char
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous2 is not None and i > 1 and j > 1
+                and query_char == text[j - 2] and query[i - 2] == text_char
+            ):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        # Every later row is at least the minimum of this one
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def reference_instants(now=None):
+    """Return the instants used to sample a zone: now, January and July."""
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+    return (
+        now,
+        datetime.datetime(now.year, 1, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(now.year, 7, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+class ZoneTokens:
+    """Normalized search tokens of one zone."""
+
+    __slots__ = (
+        "city", "country", "path", "city_words", "country_words", "country_codes",
+        "abbreviation", "alt_abbreviations", "offset", "alt_offsets",
+    )
+
+    def __init__(self, entry, instants, resolve=tz_engine.get_offset_and_abbreviation):
+        self.city = normalize(entry.city)
+        self.country = normalize(entry.country)
+        self.path = normalize(entry.timezone)
+        self.city_words = self.city.split()
+        self.country_words = self.country.split()
+        self.country_codes = frozenset(code.casefold() for code in entry.country_codes)
+
+        abbreviations = []
+        offsets = []
+        for when in instants:
+            try:
+                offset_seconds, abbreviation = resolve(entry.timezone, when)
+            except tz_engine.TimezoneEngineError:
+                break
+            abbreviations.append(normalize(abbreviation))
+            offsets.append(offset_seconds)
+
+        # Numeric abbreviations like "+0530" are covered by offset queries
+        abbreviations = [abbr if abbr[:1].isalpha() else "" for abbr in abbreviations]
+
+        self.abbreviation = abbreviations[0] if abbreviations else ""
+        self.alt_abbreviations = frozenset(abbreviations[1:]) - {self.abbreviation, ""}
+        self.offset = offsets[0] if offsets else None
+        self.alt_offsets = frozenset(offsets[1:]) - {self.offset}
+
+
+class SearchIndex:
+    """Ranked search over catalog entries with incremental narrowing."""
+
+    def __init__(self, entries, now=None, resolve=tz_engine.get_offset_and_abbreviation):
+        """
+        Args:
+            entries: tz_catalog.TimezoneEntry items
+            now: Aware datetime the offsets are sampled around, defaults to now
+            resolve: Function returning the offset in seconds and the
+                abbreviation of a zone at an instant, e.g. PeriodTable.get
+        """
+        instants = reference_instants(now)
+
+        self.timezones = [entry.timezone for entry in entries]
+        self.tokens = [ZoneTokens(entry, instants, resolve) for entry in entries]
+        self.keys = [
+            FIELD_SEPARATOR.join((tokens.city, tokens.country, tokens.path))
+            for tokens in self.tokens
+        ]
+
+        # Map each trigram to the positions of the keys containing it
+        self.trigrams = {}
+        for position, key in enumerate(self.keys):
+            for gram in ngrams(key):
+                self.trigrams.setdefault(gram, set()).add(position)
+
+        # Exact lookups for abbreviation, offset and country code queries
+        self.abbreviations = {}
+        self.offsets = {}
+        self.country_codes = {}
+        for position, tokens in enumerate(self.tokens):
+            for code in tokens.country_codes:
+                self.country_codes.setdefault(code, set()).add(position)
+            for abbr in {tokens.abbreviation} | tokens.alt_abbreviations:
+                if abbr:
+                    self.abbreviations.setdefault(abbr, set()).add(position)
+            for offset in {tokens.offset} | tokens.alt_offsets:
+                if offset is not None:
+                    self.offsets.setdefault(offset, set()).add(position)
+
+        self._last_query = ""
+        self._last_result = None
+        self._last_fuzzy = None
+        self._typo_words = None
+
+    def rank(self, query):
+        """
+        Return a dict mapping matching zone names to their relevance.
+
+        Args:
+            query: Raw search text as typed by the user
+
+        Returns:
+            dict: Zone name to score, higher is better; None if the query
+                is empty and every zone matches
+        """
+        query = normalize(query.strip())
+        if not query:
+            self._search_positions(query)
+            return None
+
+        words = query.split()
+        scores = self._rank_phrase(query)
+
+        # Fall back to requiring every word to match somewhere
+        if not scores and len(words) > 1:
+            word_scores = [self._rank_phrase(word, incremental=False) for word in words]
+            common = set.intersection(*(set(ranked) for ranked in word_scores))
+            scores = {
+                position: min(ranked[position] for ranked in word_scores)
+                for position in common
+            }
+
+        return {self.timezones[position]: score for position, score in scores.items()}
+
+    def _rank_phrase(self, query, incremental=True):
+        """Score every candidate position for a normalized query."""
+        if incremental:
+            candidates = set(self._search_positions(query))
+            candidates |= self._fuzzy_positions(query)
+        else:
+            candidates = self._lookup(query)
+
+        candidates |= self.abbreviations.get(query, set())
+        candidates |= self.country_codes.get(query, set())
+
+        offset = parse_offset_query(query)
+        if offset is not None:
+            candidates |= self.offsets.get(offset, set())
+
+        scores = {}
+        for position in candidates:
+            score = self._score(self.tokens[position], query, offset)
+            if score:
+                scores[position] = score
+        return scores or self._typo_scores(query)
+
+    def _typo_scores(self, query):
+        """Score the cities, or words of them, a few edits away from the query."""
+        if len(query) < TYPO_MIN_LENGTH:
+            return {}
+
+        if self._typo_words is None:
+            # (position, word, letters of the word), built on the first typo
+            self._typo_words = [
+                (position, word, frozenset(word))
+                for position, tokens in enumerate(self.tokens)
+                for word in {tokens.city, *tokens.city_words}
+            ]
+
+        limit = 1 if len(query) < TYPO_TWO_EDITS_LENGTH else 2
+        letters = set(query)
+        scores = {}
+        for position, word, word_letters in self._typo_words:
+            # Each edit brings at most one letter the word does not have
+            if (
+                position not in scores and len(letters - word_letters) <= limit
+                and edit_distance(query, word, limit) <= limit
+            ):
+                scores[position] = SCORE_TYPO
+        return scores
+
+    def _score(self, tokens, query, offset):
+        """Return the relevance of one zone for a normalized query."""
+        score = 0
+
+        if query == tokens.city:
+            score = SCORE_CITY_EXACT
+        elif tokens.city.startswith(query):
+            score = SCORE_CITY_PREFIX
+        elif any(word.startswith(query) for word in tokens.city_words):
+            score = SCORE_CITY_WORD_PREFIX
+        elif query in tokens.city:
+            score = SCORE_CITY_SUBSTRING
+
+        if query == tokens.abbreviation:
+            score = max(score, SCORE_ABBREVIATION)
+        elif query in tokens.alt_abbreviations:
+            score = max(score, SCORE_ALT_ABBREVIATION)
+
+        if offset is not None:
+            if offset == tokens.offset:
+                score = max(score, SCORE_OFFSET)
+            elif offset in tokens.alt_offsets:
+                score = max(score, SCORE_ALT_OFFSET)
+
+        if score >= SCORE_COUNTRY_EXACT:
+            return score
+
+        if query == tokens.country or query in tokens.country_codes:
+            score = max(score, SCORE_COUNTRY_EXACT)
+        elif tokens.country.startswith(query) or any(
+            word.startswith(query) for word in tokens.country_words
+        ):
+            score = max(score, SCORE_COUNTRY_PREFIX)
+        elif query in tokens.country:
+            score = max(score, SCORE_COUNTRY_SUBSTRING)
+
+        if query in tokens.path:
+            score = max(score, SCORE_PATH_SUBSTRING)
+
+        if not score and len(query) >= FUZZY_MIN_LENGTH and is_subsequence(query, tokens.city):
+            score = SCORE_FUZZY
+
+        return score
+
+    def _search_positions(self, query):
+        """Return the positions of the keys containing the normalized query."""
+        if not query:
+            result = None
+        elif self._last_result is not None and query.startswith(self._last_query):
+            # The query only grew, so matches are a subset of the last ones
+            result = self._scan(query, self._last_result)
+        else:
+            result = self._lookup(query)
+
+        self._last_query = query
+        self._last_result = result
+        return result if result is not None else ()
+
+    def _lookup(self, query):
+        """Find the keys containing the query without reusing earlier results."""
+        if len(query) >= NGRAM_SIZE:
+            return self._scan(query, self._trigram_candidates(query))
+        return self._scan(query, range(len(self.keys)))
+
+    def _fuzzy_positions(self, query):
+        """Return the positions whose city contains query as a subsequence."""
+        if len(query) < FUZZY_MIN_LENGTH:
+            return set()
+
+        # Subsequence matches also only shrink while the query grows
+        if self._last_fuzzy is not None and query.startswith(self._last_fuzzy[0]):
+            positions = self._last_fuzzy[1]
+        else:
+            positions = range(len(self.tokens))
+
+        result = {
+            position for position in positions
+            if is_subsequence(query, self.tokens[position].city)
+        }
+        self._last_fuzzy = (query, result)
+        return result
+
+    def _trigram_candidates(self, query):
+        """Return the positions that contain every trigram of the query."""
+        candidates = None
+        # Intersect the rarest sets first to keep intermediate sets small
+        for posting in sorted(
+            (self.trigrams.get(gram, set()) for gram in ngrams(query)), key=len
+        ):
+            candidates = posting.copy() if candidates is None else candidates & posting
+            if not candidates:
+                break
+        return candidates or set()
+
+    def _scan(self, query, positions):
+        """Keep only the positions whose key really contains the query."""
+        keys = self.keys
+        return {position for position in positions if query in keys[position]}
@@ -0,0 +1,206 @@
+"""
+Bounded pool of worker threads for everything that may block.
+
+Work is submitted as a function and its arguments and comes back as a
+Task, whose callbacks are delivered through a dispatch function; the GUI
+passes one that hands them to the GLib main loop, so handlers never wait
+on a subprocess, a socket or D-Bus themselves.
+
+Read-only queries can be submitted under a key: while a task with that key
+is in flight, the same query submitted again joins it instead of running
+twice. A task may also be given a timeout, after which its callbacks get a
+TaskTimeoutError; Python threads cannot be interrupted, so the function
+keeps its worker until it returns and its late result is dropped.
+
+The workers are daemon threads, a task still blocked when the application
+quits does not keep the process alive.
+"""
+
+# Standard library imports
+import queue
+import threading
+
+# Enough for a long running privileged command, an NTP probe and the
+# settings queries to proceed side by side
+DEFAULT_MAX_WORKERS = 4
+
+
+class TaskTimeoutError(Exception):
+    """Raised to the callbacks of a task that did not finish in time."""
+
+
+def _call_directly(callback, *args):
+    callback(*args)
+
+
+class Task:
+    """The pending result of a submitted function."""
+
+    def __init__(self, dispatch):
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._callbacks = []
+        self._timer = None
+        self.result = None
+        self.error = None
+
+    def done(self):
+        """Return True once the task finished, failed or timed out."""
+        return self._finished.is_set()
+
+    def add_callback(self, callback):
+        """
+        Have callback(result, error) dispatched when the task is done.
+
+        error is None on success, otherwise the exception raised by the
+        function or a TaskTimeoutError. A callback added to a task that is
+        already done is dispatched right away.
+        """
+        with self._lock:
+            if not self._finished.is_set():
+                self._callbacks.append(callback)
+                return
+        self._dispatch(callback, self.result, self.error)
+
+    def wait(self, timeout=None):
+        """
+        Block until the task is done, for callers without a main loop.
+
+        Returns:
+            The result of the function
+
+        Raises:
+            TaskTimeoutError: If the task or this wait timed out
+            Exception: Whatever the function raised
+        """
+        if not self._finished.wait(timeout):
+            raise TaskTimeoutError(f"Task not done after {timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def _finish(self, result, error):
+        """Publish the outcome, returns False if the task was already done."""
+        with self._lock:
+            if self._finished.is_set():
+                return False
+            self.result, self.error = result, error
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        if self._timer is not None:
+            self._timer.cancel()
+        for callback in callbacks:
+            self._dispatch(callback, result, error)
+        return True
+
+
+class WorkerPool:
+    """Runs submitted functions on at most max_workers threads."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, dispatch=None):
+        """
+        Args:
+            max_workers: Upper bound of worker threads, started on demand
+            dispatch: dispatch(callback, *args) delivers task callbacks;
+                      by default they are called on the worker thread
+        """
+        self.max_workers = max_workers
+        self.dispatch = dispatch or _call_directly
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._workers = 0
+        self._idle = 0
+        self._in_flight = {}  # Task of each key being queried
+        self._shutdown = False
+
+    def submit(self, func, *args, callback=None, key=None, timeout=None):
+        """
+        Run func(*args) on a worker thread.
+
+        Args:
+            func: Function to run
+            *args: Its arguments
+            callback: Optional, see Task.add_callback
+            key: Hashable identity of a read-only query; while a task with
+                 the same key is in flight it is returned instead
+            timeout: Seconds after which the task fails with TaskTimeoutError
+
+        Returns:
+            Task: The new task, or the one in flight under the same key
+
+        Raises:
+            RuntimeError: If the pool was shut down
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Worker pool is shut down")
+
+            task = self._in_flight.get(key) if key is not None else None
+            joined = task is not None
+            if not joined:
+                task = Task(self.dispatch)
+                if key is not None:
+                    self._in_flight[key] = task
+                self._queue.put((task, key, func, args))
+                if self._idle == 0 and self._workers < self.max_workers:
+                    self._workers += 1
+                    threading.Thread(
+                        target=self._worker, name=f"worker-{self._workers}", daemon=True
+                    ).start()
+                else:
+                    # Claimed now, so the next submit does not count on it too
+                    self._idle = max(self._idle - 1, 0)
+
+        if callback is not None:
+            task.add_callback(callback)
+
+        if timeout is not None and not joined:
+            task._timer = threading.Timer(
+                timeout, self._complete, (task, key, None, TaskTimeoutError(
+                    f"{getattr(func, '__name__', 'Task')} did not finish within {timeout} s"
+                ))
+            )
+            task._timer.daemon = True
+            task._timer.start()
+
+        return task
+
+    def shutdown(self):
+        """
+        Stop accepting work and let the workers exit once the queue drains.
+
+        Tasks still queued are run; their callbacks are dispatched as usual.
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            workers = self._workers
+
+        for _ in range(workers):
+            self._queue.put(None)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            task, key, func, args = item
+            if not task.done():  # Skip tasks that timed out while queued
+                try:
+                    result, error = func(*args), None
+                except Exception as e:
+                    result, error = None, e
+                self._complete(task, key, result, error)
+
+            with self._lock:
+                self._idle += 1
+
+    def _complete(self, task, key, result, error):
+        with self._lock:
+            if key is not None and self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        task._finish(result, error)